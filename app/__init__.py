@@ -42,9 +42,9 @@ def create_app():
              "https://115.68.219.189:443"
          ],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-         allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+         allow_headers=["Content-Type", "Authorization", "X-Requested-With", "If-None-Match"],
          supports_credentials=True,
-         expose_headers=["Content-Type", "Authorization"])
+         expose_headers=["Content-Type", "Authorization", "ETag"])
 
     # 데이터베이스 설정 (환경 변수 사용)
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
@@ -77,7 +77,7 @@ def create_app():
     
     # CORS 관련 추가 Flask 설정
     app.config['CORS_ALLOW_CREDENTIALS'] = True
-    app.config['CORS_EXPOSE_HEADERS'] = ['Content-Type', 'Authorization']
+    app.config['CORS_EXPOSE_HEADERS'] = ['Content-Type', 'Authorization', 'ETag']
 
     _app = app
     
@@ -87,7 +87,7 @@ def create_app():
         if request.method == "OPTIONS":
             response = make_response()
             response.headers.add("Access-Control-Allow-Origin", "*")
-            response.headers.add('Access-Control-Allow-Headers', "Content-Type,Authorization")
+            response.headers.add('Access-Control-Allow-Headers', "Content-Type,Authorization,If-None-Match")
             response.headers.add('Access-Control-Allow-Methods', "GET,PUT,POST,DELETE,OPTIONS")
             response.headers.add('Access-Control-Allow-Credentials', 'true')
             return response
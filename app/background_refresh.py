@@ -0,0 +1,109 @@
+"""
+백그라운드 주가 갱신 (stale-while-revalidate)
+대시보드 요청은 마지막으로 저장된 평가 결과를 즉시 반환하고,
+주가 갱신은 프로세스 전역에서 하나만 실행되는 백그라운드 작업으로 처리합니다.
+"""
+
+import logging
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _isoformat_utc(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def get_stale_as_of(holdings: Iterable) -> Optional[str]:
+    """응답에 사용된 보유 종목 평가가 마지막으로 저장된 시각 (UTC ISO 8601)"""
+    timestamps = [holding.updated_at for holding in holdings if holding.updated_at is not None]
+    return _isoformat_utc(max(timestamps)) if timestamps else None
+
+
+class PriceRefreshJob:
+    """단일 실행 백그라운드 주가 갱신 작업 (실행 중이면 새로 시작하지 않고 합류)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._state = {
+            'state': 'idle',
+            'job_id': None,
+            'started_at': None,
+            'finished_at': None,
+            'success': None,
+            'message': None,
+            'updated_count': 0,
+            'failed': [],
+        }
+
+    def is_running(self) -> bool:
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> Dict:
+        """현재/마지막 작업 상태"""
+        with self._lock:
+            return dict(self._state)
+
+    def start(self) -> Dict:
+        """
+        백그라운드 갱신 시작 (이미 실행 중이면 해당 작업에 합류)
+
+        Returns:
+            작업 상태 + 'joined' (기존 작업 합류 여부)
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return {**self._state, 'joined': True}
+
+            self._state = {
+                'state': 'running',
+                'job_id': uuid.uuid4().hex[:12],
+                'started_at': _isoformat_utc(datetime.now(timezone.utc)),
+                'finished_at': None,
+                'success': None,
+                'message': None,
+                'updated_count': 0,
+                'failed': [],
+            }
+            self._thread = threading.Thread(target=self._run, name='price-refresh', daemon=True)
+            self._thread.start()
+            return {**self._state, 'joined': False}
+
+    def _run(self):
+        from .scheduler import update_stock_price
+
+        try:
+            result = update_stock_price()
+        except Exception as e:
+            logger.error(f"Background price refresh failed: {e}")
+            result = {'success': False, 'message': str(e), 'updated': [], 'failed': []}
+
+        with self._lock:
+            self._state.update({
+                'state': 'idle',
+                'finished_at': _isoformat_utc(datetime.now(timezone.utc)),
+                'success': result.get('success'),
+                'message': result.get('message'),
+                'updated_count': len(result.get('updated', [])),
+                'failed': result.get('failed', []),
+            })
+            finished = dict(self._state)
+        logger.info(f"Background price refresh {finished['job_id']} finished: "
+                    f"{finished['updated_count']} updated, {len(finished['failed'])} failed")
+
+
+_job = PriceRefreshJob()
+
+
+def get_price_refresh_job() -> PriceRefreshJob:
+    """프로세스 전역 주가 갱신 작업"""
+    return _job
@@ -0,0 +1,182 @@
+"""
+거래/배당금 일괄 입력
+요청 배열 전체를 한 번에 검증하고, 한 번의 INSERT로 저장한 뒤
+영향받은 종목마다 보유 현황과 로트를 한 번씩만 재계산합니다 (커밋은 호출자가 한 번 수행).
+"""
+
+import logging
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from .models import Dividend, Transaction, db
+from .event_stream import publish_on_commit
+from .holdings_ledger import rebuild_ticker
+from .tax_lots import rebuild_ticker_lots
+from .ledger_index import fill_shares_held
+from .dividend_ledger import add_dividends
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 5000
+TRANSACTION_TYPES = ('BUY', 'SELL')
+TRANSACTION_REQUIRED_FIELDS = ['transaction_type', 'ticker', 'shares', 'price_per_share', 'total_amount_usd']
+DIVIDEND_REQUIRED_FIELDS = ['ticker', 'amount_usd']
+
+
+def _parse_date(value: Optional[str]) -> date:
+    if not value:
+        return datetime.now().date()
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _parse_decimal(data: Dict, field: str, required: bool = False) -> Optional[Decimal]:
+    value = data.get(field)
+    if value is None or value == '':
+        if required:
+            raise ValueError(f"필수 필드가 누락되었습니다: {field}")
+        return None
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"숫자가 아닌 값입니다: {field}={value!r}")
+
+
+def transaction_values(data: Dict) -> Dict:
+    """API 요청 필드 → transactions 컬럼 값 (단건/일괄 입력 공통)"""
+    for field in TRANSACTION_REQUIRED_FIELDS:
+        if field not in data:
+            raise ValueError(f"필수 필드가 누락되었습니다: {field}")
+
+    transaction_type = str(data['transaction_type']).upper()
+    if transaction_type not in TRANSACTION_TYPES:
+        raise ValueError(f"transaction_type은 {', '.join(TRANSACTION_TYPES)} 중 하나여야 합니다.")
+    ticker = str(data['ticker'] or '').strip().upper()
+    if not ticker or len(ticker) > 10:
+        raise ValueError(f"올바르지 않은 종목 코드입니다: {data['ticker']!r}")
+
+    shares = _parse_decimal(data, 'shares', required=True)
+    if shares <= 0:
+        raise ValueError("shares는 0보다 커야 합니다.")
+    amount = _parse_decimal(data, 'total_amount_usd', required=True)
+    amount_krw = _parse_decimal(data, 'krw_amount')
+
+    return {
+        'date': _parse_date(data.get('transaction_date')),
+        'type': transaction_type,
+        'ticker': ticker,
+        'shares': shares,
+        'price_per_share': _parse_decimal(data, 'price_per_share', required=True),
+        'amount': amount,
+        'exchange_rate': _parse_decimal(data, 'exchange_rate'),
+        'amount_krw': amount_krw,
+        'dividend_used': amount if data.get('dividend_reinvestment') else 0,
+        'cash_invested_krw': (amount_krw or 0) if not data.get('dividend_reinvestment') else 0,
+    }
+
+
+def dividend_values(data: Dict) -> Dict:
+    """API 요청 필드 → dividends 컬럼 값 (단건/일괄 입력 공통)"""
+    for field in DIVIDEND_REQUIRED_FIELDS:
+        if field not in data:
+            raise ValueError(f"필수 필드가 누락되었습니다: {field}")
+
+    ticker = str(data['ticker'] or '').strip().upper()
+    if not ticker or len(ticker) > 10:
+        raise ValueError(f"올바르지 않은 종목 코드입니다: {data['ticker']!r}")
+
+    return {
+        'date': _parse_date(data.get('payment_date')),
+        'ticker': ticker,
+        'amount': _parse_decimal(data, 'amount_usd', required=True),
+        'dividend_per_share': _parse_decimal(data, 'dividend_per_share') or 0,
+        'shares_held': _parse_decimal(data, 'shares'),  # 없으면 fill_shares_held로 지급일 기준 보유 수량 사용
+    }
+
+
+def _validate(items, to_values) -> Tuple[List[Dict], List[Dict]]:
+    if not isinstance(items, list) or not items:
+        return [], [{"index": None, "error": "비어 있지 않은 배열이 필요합니다."}]
+    if len(items) > MAX_BATCH_SIZE:
+        return [], [{"index": None, "error": f"한 번에 최대 {MAX_BATCH_SIZE}건까지 입력할 수 있습니다."}]
+
+    rows, errors = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "객체가 필요합니다."})
+            continue
+        try:
+            rows.append(to_values(item))
+        except ValueError as e:
+            errors.append({"index": index, "error": str(e)})
+    return rows, errors
+
+
+def validate_transactions(items) -> Tuple[List[Dict], List[Dict]]:
+    """
+    거래 배열 전체 검증
+
+    Returns:
+        (컬럼 값 딕셔너리 리스트, [{'index', 'error'}, ...])
+    """
+    return _validate(items, transaction_values)
+
+
+def validate_dividends(items) -> Tuple[List[Dict], List[Dict]]:
+    """배당금 배열 전체 검증 (반환 형식은 validate_transactions와 같음)"""
+    return _validate(items, dividend_values)
+
+
+def recompute_tickers(tickers: List[str]):
+    """거래가 추가된 종목들의 보유 현황과 로트를 종목당 한 번씩 재계산 (커밋하지 않음)"""
+    for ticker in tickers:
+        rebuild_ticker(ticker)
+        rebuild_ticker_lots(ticker)
+
+
+def insert_transactions(rows: List[Dict]) -> List[str]:
+    """
+    검증된 거래들을 한 번의 INSERT로 저장하고 영향받은 종목을 한 번씩 재계산 (커밋하지 않음)
+
+    일괄 입력은 날짜가 섞여 있으므로 증분 반영 대신 종목별 재계산(원가 엔진)을 사용하며,
+    새 매도는 기본 로트 매칭 방식으로 처리됨
+
+    Returns:
+        영향받은 종목 목록
+    """
+    if not rows:
+        return []
+    db.session.execute(insert(Transaction), rows)
+
+    tickers = sorted({row['ticker'] for row in rows})
+    recompute_tickers(tickers)
+
+    publish_on_commit(db.session, 'transaction', {
+        "action": "batch_created",
+        "count": len(rows),
+        "tickers": tickers
+    })
+    logger.info(f"Batch inserted {len(rows)} transactions for {len(tickers)} tickers")
+    return tickers
+
+
+def insert_dividends(rows: List[Dict]) -> List[str]:
+    """
+    검증된 배당금들을 한 번의 INSERT로 저장하고 종목별 배당금 집계에 반영 (커밋하지 않음)
+    보유 수량이 없는 행은 지급일 기준 보유 수량으로 채움
+    """
+    if not rows:
+        return []
+    db.session.execute(insert(Dividend), fill_shares_held(rows))
+    add_dividends(rows)
+
+    tickers = sorted({row['ticker'] for row in rows})
+    publish_on_commit(db.session, 'dividend', {
+        "action": "batch_created",
+        "count": len(rows),
+        "tickers": tickers
+    })
+    logger.info(f"Batch inserted {len(rows)} dividends for {len(tickers)} tickers")
+    return tickers
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+평균 원가 계산 엔진 벤치마크 스크립트
+가상 거래 내역으로 기존 Decimal 한 건씩 재계산과 벡터 연산 엔진의 속도를 비교하고 결과 일치 여부를 검증합니다.
+
+사용법:
+    python app/benchmark_cost_basis.py --tickers 200 --rows 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+# 현재 디렉터리를 sys.path에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cost_basis import compute_positions, final_states, replay_decimal, to_columns, verify_against_decimal
+
+
+def generate_transactions(tickers: int, rows_per_ticker: int, seed: int = 42):
+    """DRIP 매수 위주 + 부분/전량 매도가 섞인 가상 거래 내역 (종목/날짜순)"""
+    rng = random.Random(seed)
+    rows = []
+    for t in range(tickers):
+        ticker = f"T{t:04d}"
+        shares_held = Decimal('0')
+        for _ in range(rows_per_ticker):
+            roll = rng.random()
+            if shares_held <= 0 or roll < 0.8:
+                txn_type, shares = 'BUY', Decimal(rng.randint(1, 50000)) / 10000
+            elif roll < 0.82:
+                txn_type, shares = 'SELL', shares_held  # 전량 매도
+            else:
+                txn_type, shares = 'SELL', min(shares_held, Decimal(rng.randint(1, 30000)) / 10000)
+            shares_held += shares if txn_type == 'BUY' else -shares
+
+            price = Decimal(rng.randint(500, 20000)) / 100
+            exchange_rate = Decimal(rng.randint(130000, 150000)) / 100
+            amount = (shares * price).quantize(Decimal('0.00000001'))
+            rows.append(SimpleNamespace(
+                ticker=ticker,
+                type=txn_type,
+                shares=shares,
+                amount=amount,
+                exchange_rate=exchange_rate,
+                amount_krw=(amount * exchange_rate).quantize(Decimal('0.01')),
+            ))
+    return rows
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="평균 원가 계산 엔진 벤치마크")
+    parser.add_argument('--tickers', type=int, default=100, help="종목 수")
+    parser.add_argument('--rows', type=int, default=2000, help="종목당 거래 수")
+    parser.add_argument('--repeat', type=int, default=3, help="반복 횟수 (최소 시간 사용)")
+    args = parser.parse_args()
+
+    rows = generate_transactions(args.tickers, args.rows)
+    print(f"📊 거래 {len(rows):,}건 ({args.tickers}개 종목 × {args.rows}건)")
+
+    decimal_time = min(timed(replay_decimal, rows)[1] for _ in range(args.repeat))
+    columns, convert_time = timed(to_columns, rows)
+    compute_time = min(timed(compute_positions, columns)[1] for _ in range(args.repeat))
+    states, finalize_time = timed(final_states, columns)
+    engine_time = convert_time + compute_time + finalize_time
+
+    print(f"  Decimal 한 건씩 재계산: {decimal_time * 1000:10.1f} ms")
+    print(f"  벡터 엔진 (변환 포함):  {engine_time * 1000:10.1f} ms  → {decimal_time / engine_time:.1f}x")
+    print(f"    - 컬럼 변환:          {convert_time * 1000:10.1f} ms")
+    print(f"    - 누적 계산:          {compute_time * 1000:10.1f} ms  → {decimal_time / compute_time:.1f}x")
+    print(f"    - Decimal 결과 변환:  {finalize_time * 1000:10.1f} ms")
+
+    mismatches = verify_against_decimal(rows, states)
+    if mismatches:
+        print(f"❌ Decimal 결과와 불일치 {len(mismatches)}건")
+        for item in mismatches[:10]:
+            print(f"  {item['ticker']} {item['field']}: {item['vectorized']} vs {item['decimal']} (diff {item['diff']})")
+        sys.exit(1)
+    print("✅ 모든 종목이 Decimal 재계산 결과와 일치 (DB 컬럼 자릿수 기준)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+데이터 버전 기반 조건부 GET (ETag / If-None-Match → 304)
+응답에 관련 테이블의 데이터 버전으로 만든 strong ETag를 붙이고, 클라이언트가 같은 ETag로 재검증하면
+뷰 함수(ORM 조회/직렬화)를 실행하지 않고 본문 없는 304를 반환합니다.
+
+버전은 커밋된 변경에서만 올라가므로(data_versions) 같은 ETag면 같은 데이터입니다.
+"""
+
+import hashlib
+from datetime import date
+from functools import wraps
+from typing import Callable
+
+from flask import make_response, request
+
+from .data_versions import data_version
+
+CACHE_CONTROL = 'private, no-cache'
+
+# 요청이 데이터를 바꾸거나 매번 다른 결과를 내는 경우 (예: 주가 즉시 갱신)
+BYPASS_ARGS = ('update_prices',)
+
+
+def versioned_etag(*tables: str) -> Callable:
+    """
+    GET 응답에 tables 데이터 버전 기반 ETag를 붙이는 데코레이터 (@jwt_required 아래에 사용)
+
+    ETag = 테이블 버전 + 날짜(일자별로 바뀌는 수익률 등) + 쿼리 문자열 해시
+    """
+    def decorator(f: Callable) -> Callable:
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET' or any(request.args.get(arg, '').lower() == 'true' for arg in BYPASS_ARGS):
+                return f(*args, **kwargs)
+
+            # 뷰 실행 전에 버전을 읽음 (실행 중 커밋된 변경은 다음 요청에서 새 ETag가 됨)
+            query_hash = hashlib.sha1(request.query_string).hexdigest()[:8]
+            etag = f"{data_version(*tables)}-{date.today():%Y%m%d}-{query_hash}"
+
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = CACHE_CONTROL
+                return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = CACHE_CONTROL
+            return response
+
+        return decorated_function
+    return decorator
@@ -0,0 +1,234 @@
+"""
+평균 원가(cost basis) 계산 엔진
+- LedgerState: 거래 한 건씩 반영하는 Decimal 기준 구현 (증분 갱신, 검증 기준값)
+- compute_positions: 모든 종목의 거래를 컬럼 배열로 받아 한 번의 벡터 연산으로 누적값 계산
+
+평균 원가 규칙:
+    BUY  : 수량 += s, 원가 += 금액, 투입 원화 += 원화 금액, 환율 가중 원가 += 금액 × 환율
+    SELL : 수량 -= s, 매도 후 수량 >= 0이고 매도 전 수량 > 0이면 원가들에 (1 - s / 매도 전 수량) 곱함
+
+원가들은 c[i] = c[i-1] × m[i] + a[i] 형태의 선형 점화식이므로
+전량 매도(m = 0)로 구간을 나누면 c[i] = P[i] × Σ(a[j] / P[j]) (P는 구간 내 m의 누적곱)로 계산할 수 있습니다.
+부분 매도가 길게 이어져 P가 PRODUCT_FLOOR 아래로 내려가면 그 행에서 구간을 다시 나누고 직전 원가를 이월합니다.
+"""
+
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_EXCHANGE_RATE = Decimal('1400')
+
+# 구간 내 누적곱 하한 (이보다 작아지면 구간을 나눠 a / P의 오버플로 방지)
+PRODUCT_FLOOR = 1e-150
+
+SHARE_SCALE = 10 ** 8  # shares DECIMAL(18, 8): 정수로 바꿔 누적 수량을 오차 없이 계산
+
+# 결과를 Decimal로 돌려줄 때의 자릿수 (DB 컬럼 자릿수 이상)
+USD_QUANT = Decimal('0.00000001')
+KRW_QUANT = Decimal('0.00000001')
+
+# 검증 허용 오차: DB 컬럼 자릿수 기준 마지막 자리 1단위
+VERIFY_TOLERANCE = {
+    'shares': Decimal('0'),
+    'cost_basis': Decimal('0.00000001'),
+    'invested_krw': Decimal('0.01'),
+    'cost_krw': Decimal('0.01'),
+}
+
+
+def _decimal(value) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+class LedgerState:
+    """종목 하나의 누적 상태 (Decimal 연산)"""
+
+    def __init__(self, shares=0, cost_basis=0, invested_krw=0, cost_krw=0):
+        self.shares = _decimal(shares)
+        self.cost_basis = _decimal(cost_basis)
+        self.invested_krw = _decimal(invested_krw)
+        self.cost_krw = _decimal(cost_krw)  # 가중평균 환율 계산용
+
+    def apply(self, txn):
+        """거래 한 건 반영 (type, shares, amount, exchange_rate, amount_krw 속성을 가진 객체)"""
+        shares = _decimal(abs(txn.shares))  # 절댓값으로 처리
+        total_amount_usd = _decimal(abs(txn.amount))
+        exchange_rate = Decimal(str(txn.exchange_rate or DEFAULT_EXCHANGE_RATE))
+        amount_krw = _decimal(abs(txn.amount_krw or 0))
+
+        if txn.type.upper() == 'BUY':
+            self.shares += shares
+            self.cost_basis += total_amount_usd
+            self.invested_krw += amount_krw
+            self.cost_krw += total_amount_usd * exchange_rate
+        elif txn.type.upper() == 'SELL':
+            old_shares = self.shares
+            self.shares -= shares
+            # 매도 시 비례적으로 원가 감소
+            if self.shares >= 0 and old_shares > 0:
+                remaining = 1 - shares / old_shares
+                self.cost_basis *= remaining
+                self.invested_krw *= remaining
+                self.cost_krw *= remaining
+
+    def averages(self):
+        """(평균 매수가, 가중평균 환율)"""
+        avg_price = self.cost_basis / self.shares
+        avg_exchange_rate = self.cost_krw / self.cost_basis if self.cost_basis > 0 else DEFAULT_EXCHANGE_RATE
+        return avg_price, avg_exchange_rate
+
+    def as_dict(self) -> Dict[str, Decimal]:
+        return {
+            'shares': self.shares,
+            'cost_basis': self.cost_basis,
+            'invested_krw': self.invested_krw,
+            'cost_krw': self.cost_krw,
+        }
+
+
+def replay_decimal(rows: Iterable) -> Dict[str, LedgerState]:
+    """종목/날짜순 거래를 한 건씩 Decimal로 재계산 (검증 기준값)"""
+    states: Dict[str, LedgerState] = {}
+    for row in rows:
+        states.setdefault(row.ticker, LedgerState()).apply(row)
+    return states
+
+
+def to_columns(rows: Iterable) -> Dict[str, np.ndarray]:
+    """
+    거래 행(ORM 객체 또는 Row)들을 컬럼 배열로 변환
+
+    행은 종목별로 모여 있고 종목 안에서 날짜순이어야 함 (ORDER BY ticker, date, transaction_id)
+    """
+    rows = list(rows)
+    # DECIMAL(18, 8) 수량은 float 변환 후 1e-8 단위 정수로 반올림해도 정확함 (9천만 주 미만)
+    shares = np.abs(np.array([row.shares or 0 for row in rows], dtype=np.float64))
+    return {
+        'ticker': np.array([row.ticker for row in rows], dtype=object),
+        'type': np.array([row.type.upper() for row in rows], dtype=object),
+        'shares': np.rint(shares * SHARE_SCALE).astype(np.int64),
+        'amount': np.abs(np.array([row.amount or 0 for row in rows], dtype=np.float64)),
+        'exchange_rate': np.array([row.exchange_rate or DEFAULT_EXCHANGE_RATE for row in rows], dtype=np.float64),
+        'amount_krw': np.abs(np.array([row.amount_krw or 0 for row in rows], dtype=np.float64)),
+    }
+
+
+def _segment_costs(multiplier: np.ndarray, additions: np.ndarray, segment_start: np.ndarray):
+    """구간별 c[i] = P[i] × Σ(a[j] / P[j]) 계산 → (구간 번호, P, 원가 배열)"""
+    segments = np.cumsum(segment_start)
+    factors = np.where(segment_start, 1.0, multiplier)  # 구간 첫 행 이전 원가는 0(또는 a에 이월)이므로 m은 의미 없음
+    products = pd.Series(factors).groupby(segments).cumprod().to_numpy()
+    # 언더플로한 행의 값은 버리고 다시 계산하므로 0 나눗셈/오버플로 경고는 무시
+    with np.errstate(divide='ignore', over='ignore', invalid='ignore'):
+        scaled = pd.DataFrame(additions / products[:, None]).groupby(segments).cumsum().to_numpy()
+        return segments, products, scaled * products[:, None]
+
+
+def compute_positions(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    모든 종목의 거래별 누적 상태를 한 번에 계산
+
+    Returns:
+        거래 행과 같은 길이의 배열들
+        {'shares' (int64, 1e-8주 단위), 'cost_basis', 'invested_krw', 'cost_krw'}
+    """
+    count = len(columns['ticker'])
+    if count == 0:
+        empty = np.zeros(0, dtype=np.float64)
+        return {'shares': np.zeros(0, dtype=np.int64), 'cost_basis': empty,
+                'invested_krw': empty, 'cost_krw': empty}
+
+    ticker_codes = pd.factorize(columns['ticker'])[0]
+    is_buy = columns['type'] == 'BUY'
+    is_sell = columns['type'] == 'SELL'
+
+    # 누적 수량 (정수 연산이라 Decimal 결과와 정확히 일치)
+    signed_shares = np.where(is_buy, columns['shares'], np.where(is_sell, -columns['shares'], 0))
+    shares = pd.Series(signed_shares).groupby(ticker_codes).cumsum().to_numpy()
+    old_shares = shares - signed_shares
+
+    # 매도 시 원가에 곱할 비율 m (매수/기타 거래는 1)
+    scale_down = is_sell & (shares >= 0) & (old_shares > 0)
+    multiplier = np.ones(count, dtype=np.float64)
+    multiplier[scale_down] = shares[scale_down] / old_shares[scale_down]
+
+    # 원가에 더할 값 a (매수만)
+    additions = np.zeros((count, 3), dtype=np.float64)
+    additions[is_buy, 0] = columns['amount'][is_buy]
+    additions[is_buy, 1] = columns['amount_krw'][is_buy]
+    additions[is_buy, 2] = columns['amount'][is_buy] * columns['exchange_rate'][is_buy]
+
+    # 종목 시작과 전량 매도 지점에서 구간을 나누면 구간 내 m은 모두 양수
+    segment_start = np.ones(count, dtype=bool)
+    segment_start[1:] = ticker_codes[1:] != ticker_codes[:-1]
+    segment_start |= multiplier == 0
+
+    # 부분 매도가 길게 이어지면 누적곱 P가 0으로 언더플로하므로(a / P → inf),
+    # P가 PRODUCT_FLOOR 아래로 내려가는 첫 행에서 구간을 새로 시작하고 직전 원가 × m을 그 행의 a에 이월
+    while True:
+        segments, products, costs = _segment_costs(multiplier, additions, segment_start)
+        underflow = products < PRODUCT_FLOOR
+        if not underflow.any():
+            break
+        rows = np.flatnonzero(underflow & (pd.Series(underflow).groupby(segments).cumsum().to_numpy() == 1))
+        # 구간 첫 행은 P = 1이므로 rows - 1은 같은 구간의 (언더플로 전) 유효한 원가
+        additions[rows] += multiplier[rows, None] * costs[rows - 1]
+        segment_start[rows] = True
+
+    return {
+        'shares': shares,
+        'cost_basis': costs[:, 0],
+        'invested_krw': costs[:, 1],
+        'cost_krw': costs[:, 2],
+    }
+
+
+def final_states(columns: Dict[str, np.ndarray],
+                 positions: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, LedgerState]:
+    """종목별 마지막 거래 시점의 누적 상태 (Decimal)"""
+    if positions is None:
+        positions = compute_positions(columns)
+    tickers = columns['ticker']
+    if len(tickers) == 0:
+        return {}
+
+    last_rows = np.flatnonzero(np.append(tickers[1:] != tickers[:-1], True))
+    states = {}
+    for i in last_rows:
+        states[tickers[i]] = LedgerState(
+            Decimal(int(positions['shares'][i])) / SHARE_SCALE,
+            Decimal(repr(float(positions['cost_basis'][i]))).quantize(USD_QUANT),
+            Decimal(repr(float(positions['invested_krw'][i]))).quantize(KRW_QUANT),
+            Decimal(repr(float(positions['cost_krw'][i]))).quantize(KRW_QUANT),
+        )
+    return states
+
+
+def compute_final_states(rows: Iterable) -> Dict[str, LedgerState]:
+    """거래 행들(종목/날짜순)에서 종목별 최종 상태 계산"""
+    return final_states(to_columns(rows))
+
+
+def verify_against_decimal(rows: List, states: Optional[Dict[str, LedgerState]] = None) -> List[Dict]:
+    """
+    벡터 연산 결과를 Decimal 한 건씩 재계산 결과와 비교
+
+    Returns:
+        허용 오차(DB 컬럼 마지막 자리 1단위)를 넘는 차이 목록
+        [{'ticker', 'field', 'vectorized', 'decimal', 'diff'}, ...]
+    """
+    if states is None:
+        states = compute_final_states(rows)
+    expected = replay_decimal(rows)
+
+    mismatches = []
+    for ticker, reference in expected.items():
+        actual = states.get(ticker, LedgerState()).as_dict()
+        for field, reference_value in reference.as_dict().items():
+            diff = actual[field] - reference_value
+            if abs(diff) > VERIFY_TOLERANCE[field]:
+                mismatches.append({'ticker': ticker, 'field': field, 'vectorized': actual[field],
+                                   'decimal': reference_value, 'diff': diff})
+    return mismatches
@@ -0,0 +1,109 @@
+"""
+테이블별 데이터 버전 카운터 (data_versions 테이블)
+세션이 변경한 테이블(ORM flush, insert()/update()/delete() 실행)을 모아 두었다가 커밋 직전에
+같은 트랜잭션 안에서 해당 테이블의 버전을 1씩 올립니다. 파생 데이터 캐시는 버전이 같으면 재계산 없이 재사용할 수 있습니다.
+
+- 버전은 DB에 있으므로 CLI 가져오기(statement_importer), populate 스크립트 등 다른 프로세스의 커밋도 반영됨
+- 롤백된 트랜잭션의 버전 증가는 변경과 함께 취소됨
+- 세션을 거치지 않는 변경(외부 SQL 등)은 bump()를 호출하거나 data_versions를 직접 갱신 (rebuild_data.sql 참고)
+"""
+
+import time
+from typing import Dict, Iterable
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from .models import DataVersion, db
+
+PENDING_TABLES_KEY = 'pending_version_tables'
+VERSIONS_KEY = 'data_versions'
+
+_table = DataVersion.__table__
+
+
+def _increment(connection, tables: Iterable[str]):
+    """
+    현재 트랜잭션에서 테이블 버전 증가
+
+    행이 없으면 현재 시각(ms)으로 생성해, 테이블을 비우거나 다시 만든 뒤에도 이전 버전과 겹치지 않게 함
+    """
+    # 항상 같은 순서로 잠가 동시 커밋 간 교착 방지
+    for table in sorted(tables):
+        result = connection.execute(
+            update(_table).where(_table.c.table_name == table).values(version=_table.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(_table).values(table_name=table, version=int(time.time() * 1000)))
+
+
+def bump(*tables: str):
+    """세션 밖에서 커밋된 변경의 테이블 버전 증가 (별도 트랜잭션)"""
+    with db.engine.begin() as connection:
+        _increment(connection, tables)
+
+
+def get_versions(*tables: str) -> Dict[str, int]:
+    """
+    {테이블명: 버전} (한 번도 변경되지 않은 테이블은 0)
+
+    트랜잭션당 한 번 전체 버전을 읽어 세션에 보관 (같은 트랜잭션의 다른 조회와 같은 시점)
+    """
+    versions = db.session.info.get(VERSIONS_KEY)
+    if versions is None:
+        rows = db.session.execute(select(_table.c.table_name, _table.c.version)).all()
+        versions = {row.table_name: row.version for row in rows}
+        db.session.info[VERSIONS_KEY] = versions
+    return {table: versions.get(table, 0) for table in tables}
+
+
+def data_version(*tables: str) -> str:
+    """캐시 키/ETag용 버전 문자열 (예: 'v1760680000123.1760680000456')"""
+    versions = get_versions(*tables)
+    return 'v' + '.'.join(str(versions[table]) for table in tables)
+
+
+def _mark(session: Session, tables: Iterable[str]):
+    session.info.setdefault(PENDING_TABLES_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    tables = {obj.__table__.name for obj in (*session.new, *session.dirty, *session.deleted)
+              if hasattr(obj, '__table__')}
+    if tables:
+        _mark(session, tables)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_executed_tables(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and hasattr(table, 'name'):
+            _mark(orm_execute_state.session, [table.name])
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_pending_tables(session):
+    # 커밋 시 자동 flush는 이 이벤트 뒤에 일어나므로 먼저 flush해 남은 변경 테이블까지 모음
+    session.flush()
+    # 앱 모델 테이블만 (카드 DB 세션 등 다른 메타데이터의 세션은 제외)
+    tables = (session.info.get(PENDING_TABLES_KEY, set()) & set(db.metadata.tables)) - {_table.name}
+    if tables:
+        _increment(session.connection(), tables)
+
+
+@event.listens_for(Session, 'after_commit')
+def _clear_committed_tables(session):
+    session.info.pop(PENDING_TABLES_KEY, None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_tables(session):
+    session.info.pop(PENDING_TABLES_KEY, None)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _forget_read_versions(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(VERSIONS_KEY, None)
@@ -0,0 +1,143 @@
+"""
+배당금 집계 원장 (Holding.total_dividends_received / dividends_reinvested / dividends_withdrawn)
+배당금 등록/수정/삭제와 같은 DB 트랜잭션 안에서 종목별 증감분만 Holding 집계 컬럼에 원자적으로 더하므로
+포트폴리오 조회 시 dividends 테이블을 다시 합산하지 않아도 됩니다.
+
+집계는 현재 Holding이 있는 종목에만 유지되며, 새로 생기는 Holding은 dividend_totals()로 초기화합니다.
+reconcile_dividend_aggregates()는 GROUP BY 한 번으로 전체 집계를 다시 계산해 차이를 보고/수정합니다.
+"""
+
+import logging
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, func, select, update
+
+from .models import Dividend, Holding, db
+
+logger = logging.getLogger(__name__)
+
+# Dividend 컬럼 → Holding 집계 컬럼
+AGGREGATE_COLUMNS = {
+    'amount': 'total_dividends_received',
+    'reinvested_amount': 'dividends_reinvested',
+    'withdrawn_amount': 'dividends_withdrawn',
+}
+
+DRIFT_TOLERANCE = Decimal('0.000001')
+
+
+def _value(record, field: str) -> Decimal:
+    value = record.get(field) if isinstance(record, dict) else getattr(record, field)
+    return Decimal(str(value or 0))
+
+
+def _ticker_deltas(records: Iterable, sign: int = 1) -> Dict[str, Dict[str, Decimal]]:
+    """배당금 행들(Dividend 객체 또는 컬럼 값 딕셔너리)의 종목별 합계"""
+    deltas: Dict[str, Dict[str, Decimal]] = {}
+    for record in records:
+        ticker = record['ticker'] if isinstance(record, dict) else record.ticker
+        totals = deltas.setdefault(ticker, {field: Decimal('0') for field in AGGREGATE_COLUMNS})
+        for field in AGGREGATE_COLUMNS:
+            totals[field] += sign * _value(record, field)
+    return deltas
+
+
+def _apply_deltas(deltas: Dict[str, Dict[str, Decimal]]):
+    """종목별 증감분을 한 번의 UPDATE(executemany)로 반영: 컬럼 = COALESCE(컬럼, 0) + 증감"""
+    if not deltas:
+        return
+    table = Holding.__table__
+    statement = (
+        update(table)
+        .where(table.c.ticker == bindparam('b_ticker'))
+        .values({column: func.coalesce(table.c[column], 0) + bindparam(f'b_{field}')
+                 for field, column in AGGREGATE_COLUMNS.items()})
+    )
+    db.session.execute(statement, [
+        {'b_ticker': ticker, **{f'b_{field}': amount for field, amount in totals.items()}}
+        for ticker, totals in deltas.items()
+    ])
+
+
+def add_dividends(records: Iterable):
+    """새로 저장한 배당금들을 Holding 집계에 더함 (커밋하지 않음)"""
+    _apply_deltas(_ticker_deltas(records))
+
+
+def remove_dividends(records: Iterable):
+    """삭제할 배당금들을 Holding 집계에서 뺌 (커밋하지 않음)"""
+    _apply_deltas(_ticker_deltas(records, sign=-1))
+
+
+def update_dividend(dividend: Dividend, values: Dict):
+    """배당금 수정: 기존 기여분을 빼고 값을 바꾼 뒤 새 기여분을 더함 (종목 변경 포함, 커밋하지 않음)"""
+    remove_dividends([dividend])
+    for field, value in values.items():
+        setattr(dividend, field, value)
+    add_dividends([dividend])
+
+
+def dividend_totals(ticker: Optional[str] = None) -> Dict[str, Dict[str, Decimal]]:
+    """dividends 테이블의 종목별 합계 (GROUP BY 한 번)"""
+    statement = select(
+        Dividend.ticker,
+        *(func.coalesce(func.sum(getattr(Dividend, field)), 0) for field in AGGREGATE_COLUMNS),
+    ).group_by(Dividend.ticker)
+    if ticker:
+        statement = statement.where(Dividend.ticker == ticker)
+
+    return {
+        row[0]: {field: Decimal(str(value)) for field, value in zip(AGGREGATE_COLUMNS, row[1:])}
+        for row in db.session.execute(statement)
+    }
+
+
+def seed_holding_dividends(holding: Holding):
+    """새 Holding의 배당금 집계를 해당 종목의 기존 배당금 합계로 초기화"""
+    totals = dividend_totals(holding.ticker).get(holding.ticker, {})
+    for field, column in AGGREGATE_COLUMNS.items():
+        setattr(holding, column, totals.get(field, Decimal('0')))
+
+
+def reconcile_dividend_aggregates(fix: bool = False) -> Dict:
+    """
+    GROUP BY 한 번으로 종목별 배당금 합계를 다시 계산해 Holding 집계와 비교
+
+    Args:
+        fix: True면 차이가 있는 Holding을 한 번의 UPDATE로 재작성하고 커밋
+
+    Returns:
+        {'checked': Holding 수, 'drift': [{'ticker', 'field', 'stored', 'expected', 'diff'}, ...], 'fixed': [...]}
+    """
+    expected_totals = dividend_totals()
+    holdings = db.session.execute(
+        select(Holding.ticker, *(getattr(Holding, column) for column in AGGREGATE_COLUMNS.values()))
+    ).all()
+
+    drift = []
+    corrections = {}
+    for row in holdings:
+        expected = expected_totals.get(row.ticker, {})
+        for field, column in AGGREGATE_COLUMNS.items():
+            stored = Decimal(str(getattr(row, column) or 0))
+            expected_value = expected.get(field, Decimal('0'))
+            diff = stored - expected_value
+            if abs(diff) > DRIFT_TOLERANCE:
+                drift.append({'ticker': row.ticker, 'field': column, 'stored': float(stored),
+                              'expected': float(expected_value), 'diff': float(diff)})
+                # 저장값과의 차이만큼 빼서 기대값으로 맞춤
+                corrections.setdefault(row.ticker, {f: Decimal('0') for f in AGGREGATE_COLUMNS})[field] = -diff
+
+    fixed: List[str] = []
+    if fix and corrections:
+        _apply_deltas(corrections)
+        db.session.commit()
+        fixed = sorted(corrections)
+        logger.info(f"Dividend aggregates reconciled for {len(fixed)} tickers")
+
+    return {
+        'checked': len(holdings),
+        'drift': drift,
+        'fixed': fixed,
+    }
@@ -0,0 +1,174 @@
+"""
+실시간 변경 이벤트 스트림 (Server-Sent Events)
+DB 커밋이 성공한 변경(주가 갱신, 거래/배당금 등록, 환율 변경)만 프로세스 내 이벤트 버스로 전달하고,
+/stream 구독자에게 변경분(delta)만 push합니다.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SIZE = 500        # 재접속(Last-Event-ID) 시 다시 보내줄 최근 이벤트 수
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_INTERVAL = 15   # 연결 유지용 주석 전송 간격 (초)
+
+PENDING_EVENTS_KEY = 'pending_stream_events'
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class Subscriber:
+    """구독자 하나의 수신 큐 (처리가 밀려 큐가 가득 차면 overflowed 표시 후 재동기화 요청)"""
+
+    def __init__(self, maxsize: int):
+        self.queue: "queue.Queue[Dict]" = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+
+class EventBus:
+    """스레드 안전 프로세스 내 이벤트 버스"""
+
+    def __init__(self, history_size: int = HISTORY_SIZE, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._history: deque = deque(maxlen=history_size)
+        self._subscribers: List[Subscriber] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Dict) -> Dict:
+        """이벤트 발행 (커밋 이후에만 호출해야 함, 트랜잭션 안에서는 publish_on_commit 사용)"""
+        with self._lock:
+            message = {
+                'id': self._next_id,
+                'type': event_type,
+                'data': data,
+                'timestamp': time.time(),
+            }
+            self._next_id += 1
+            self._history.append(message)
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(message)
+            except queue.Full:
+                subscriber.overflowed = True
+        return message
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Tuple[Subscriber, List[Dict]]:
+        """
+        구독 등록
+
+        Returns:
+            (구독자, last_event_id 이후 놓친 이벤트 목록)
+            놓친 이벤트가 보관 범위를 벗어났으면 구독자에 overflowed 표시
+        """
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if last_event_id is None:
+                return subscriber, []
+            backlog = [m for m in self._history if m['id'] > last_event_id]
+            oldest_kept = self._history[0]['id'] if self._history else self._next_id
+            # 보관 범위 밖이거나 서버 재시작 전에 받은 ID면 중간 변경을 알 수 없음
+            if oldest_kept > last_event_id + 1 or last_event_id >= self._next_id:
+                subscriber.overflowed = True
+        return subscriber, backlog
+
+    def last_event_id(self) -> int:
+        with self._lock:
+            return self._next_id - 1
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+_bus = EventBus()
+
+
+def get_event_bus() -> EventBus:
+    """프로세스 전역 이벤트 버스"""
+    return _bus
+
+
+def publish_on_commit(session: Session, event_type: str, data: Dict):
+    """
+    현재 트랜잭션이 커밋되면 이벤트 발행 (롤백되면 폐기)
+
+    Args:
+        session: 변경을 커밋할 세션 (보통 db.session)
+        event_type: 'prices', 'transaction', 'dividend', 'fx' 등
+        data: 이벤트 본문 (JSON 직렬화 가능해야 함)
+    """
+    session.info.setdefault(PENDING_EVENTS_KEY, []).append((event_type, data))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending_events(session):
+    pending = session.info.pop(PENDING_EVENTS_KEY, None)
+    for event_type, data in pending or ():
+        _bus.publish(event_type, data)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_events(session):
+    session.info.pop(PENDING_EVENTS_KEY, None)
+
+
+def format_sse(message: Dict) -> str:
+    """SSE 프레임 문자열로 변환"""
+    payload = json.dumps(message['data'], default=_json_default, ensure_ascii=False)
+    return f"id: {message['id']}\nevent: {message['type']}\ndata: {payload}\n\n"
+
+
+def stream_events(last_event_id: Optional[int] = None,
+                  heartbeat_interval: float = HEARTBEAT_INTERVAL) -> Iterator[str]:
+    """
+    SSE 응답 본문 생성기
+    재접속 시 Last-Event-ID 이후 이벤트를 먼저 보내고, 이후 새 이벤트를 실시간으로 전달
+    """
+    bus = get_event_bus()
+    subscriber, backlog = bus.subscribe(last_event_id)
+    try:
+        # 브라우저 EventSource 재접속 간격 (ms)
+        yield "retry: 5000\n\n"
+        for message in backlog:
+            yield format_sse(message)
+
+        while True:
+            if subscriber.overflowed:
+                # 놓친 이벤트가 있으므로 클라이언트가 전체 데이터를 다시 불러오도록 알림
+                # (현재 마지막 ID를 넘겨 재접속 시 그 이후 이벤트부터 이어받도록 함)
+                yield f"id: {bus.last_event_id()}\nevent: resync\ndata: {{}}\n\n"
+                return
+            try:
+                message = subscriber.queue.get(timeout=heartbeat_interval)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_sse(message)
+    finally:
+        bus.unsubscribe(subscriber)
@@ -12,6 +12,8 @@ from decimal import Decimal
 from typing import Dict, Optional
 
 from .models import ExchangeRate, db
+from .event_stream import publish_on_commit
+from .portfolio_snapshots import save_snapshot
 from flask import current_app
 
 logger = logging.getLogger(__name__)
@@ -99,6 +101,11 @@ class ExchangeRateService:
                 )
                 
                 db.session.add(exchange_rate)
+                publish_on_commit(db.session, 'fx', {
+                    'usd_krw': float(rate_info['usd_krw']),
+                    'source': rate_info['source'],
+                    'timestamp': rate_info['timestamp']
+                })
                 db.session.commit()
                 
                 logger.info(f"환율 정보 저장 완료: USD/KRW {rate_info['usd_krw']} at {rate_info['timestamp']}")
@@ -165,8 +172,15 @@ class ExchangeRateService:
                 'error': f"오류: {str(e)}"
             }
     
+    def record_portfolio_snapshot(self):
+        """환율 반영 후 오늘자 포트폴리오 스냅샷 기록 (원화 평가액이 최신 환율 기준이 되도록)"""
+        from .__init__ import get_app
+        app = get_app()
+        with app.app_context():
+            save_snapshot()
+    
     def update_exchange_rate(self) -> Dict:
-        """환율 업데이트 실행 (API 호출 + DB 저장)"""
+        """환율 업데이트 실행 (API 호출 + DB 저장 + 포트폴리오 스냅샷 기록)"""
         logger.info("환율 업데이트 시작...")
         
         # 1. API에서 최신 환율 정보 가져오기
@@ -193,6 +207,7 @@ class ExchangeRateService:
                 change_pct = (change / old_rate * 100) if old_rate else 0
                 
                 logger.info(f"환율 업데이트 완료: {old_rate} → {new_rate} (변화: {change:+.2f}원, {change_pct:+.2f}%)")
+                self.record_portfolio_snapshot()
                 
                 return {
                     'success': True,
@@ -212,6 +227,7 @@ class ExchangeRateService:
                 }
         else:
             logger.info(f"환율 변화 없음: {new_rate} (변화: {new_rate - old_rate:+.4f}원)")
+            self.record_portfolio_snapshot()
             return {
                 'success': True,
                 'message': '환율 변화 없음',
@@ -0,0 +1,143 @@
+"""
+거래/배당금 내역 조회 (필터 + 키셋 페이지네이션 + 필드 선택)
+(date, id) 내림차순으로 정렬하고, 다음 페이지는 OFFSET 대신 마지막 행의 (date, id) 커서 이후부터 조회합니다.
+ticker 필터는 (ticker, date) 인덱스로 범위 조회되며, fields= 로 요청한 컬럼만 불러와 직렬화합니다.
+
+limit/cursor 파라미터가 없으면 기존처럼 전체 배열을 반환합니다 (필터/필드 선택은 동일하게 적용).
+첫 페이지(cursor 없음)에는 필터 조건 전체 건수 등 요약(summary)을 함께 담아, 화면이 전체 목록 없이 총 건수를 표시합니다.
+"""
+
+import base64
+import binascii
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only
+
+PAGE_PARAMS = ('limit', 'cursor')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(row_date: date, row_id: int) -> str:
+    """마지막 행의 (date, id) → URL에 그대로 쓸 수 있는 불투명 커서"""
+    raw = f"{row_date.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(value: str) -> Tuple[date, int]:
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode()
+        row_date, row_id = raw.split('|')
+        return datetime.strptime(row_date, '%Y-%m-%d').date(), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("cursor 형식이 올바르지 않습니다.")
+
+
+def _parse_date(args, name: str) -> Optional[date]:
+    if not args.get(name):
+        return None
+    try:
+        return datetime.strptime(args[name], '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"{name} 형식은 YYYY-MM-DD여야 합니다.")
+
+
+def _parse_limit(args) -> int:
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit은 정수여야 합니다.")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit은 1~{MAX_PAGE_SIZE} 사이여야 합니다.")
+    return limit
+
+
+def parse_fields(value: Optional[str], field_map: Dict) -> Optional[List[str]]:
+    """fields=a,b,c → 응답 필드 목록 (없으면 전체)"""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in field_map]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드입니다: {', '.join(unknown)}")
+    return fields
+
+
+def query_history(model, id_column, field_map: Dict, serialize: Callable, args,
+                  type_column=None, allowed_types: Tuple[str, ...] = (),
+                  summarize: Optional[Callable] = None):
+    """
+    거래/배당금 내역 조회
+
+    Args:
+        model: Transaction 또는 Dividend
+        id_column: 정렬/커서용 PK 컬럼 (Transaction.transaction_id 등)
+        field_map: {응답 필드: (모델 속성명, 변환 함수)}
+        serialize: serialize(row, fields) → dict
+        args: 요청 파라미터 (ticker, type, from, to, fields, limit, cursor)
+        type_column: type 필터 대상 컬럼 (없으면 type 필터 미지원)
+        summarize: summarize(필터 적용 쿼리) → 첫 페이지 summary에 추가할 값 (dict)
+
+    Returns:
+        limit/cursor가 없으면 배열, 있으면 {'items', 'next_cursor', 'has_more'}
+        첫 페이지에는 {'summary': {'count', ...summarize 결과}} 추가
+
+    Raises:
+        ValueError: 잘못된 파라미터
+    """
+    fields = parse_fields(args.get('fields'), field_map)
+    query = model.query
+
+    if args.get('ticker'):
+        query = query.filter(model.ticker == args['ticker'].strip().upper())
+    if args.get('type'):
+        if type_column is None:
+            raise ValueError("type 필터는 거래 내역에서만 사용할 수 있습니다.")
+        transaction_type = args['type'].strip().upper()
+        if transaction_type not in allowed_types:
+            raise ValueError(f"type은 {', '.join(allowed_types)} 중 하나여야 합니다.")
+        query = query.filter(type_column == transaction_type)
+    start, end = _parse_date(args, 'from'), _parse_date(args, 'to')
+    if start:
+        query = query.filter(model.date >= start)
+    if end:
+        query = query.filter(model.date <= end)
+    filtered = query
+
+    if fields is not None:
+        # 요청한 필드의 컬럼 + 정렬/커서용 (date, id)만 조회
+        columns = {field_map[field][0] for field in fields} | {'date', id_column.key}
+        query = query.options(load_only(*(getattr(model, column) for column in columns)))
+
+    query = query.order_by(model.date.desc(), id_column.desc())
+
+    if not any(param in args for param in PAGE_PARAMS):
+        return [serialize(row, fields) for row in query.all()]
+
+    limit = _parse_limit(args)
+    if args.get('cursor'):
+        cursor_date, cursor_id = decode_cursor(args['cursor'])
+        query = query.filter(or_(
+            model.date < cursor_date,
+            and_(model.date == cursor_date, id_column < cursor_id),
+        ))
+
+    # 한 건 더 조회해 다음 페이지 존재 여부 확인
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+
+    page = {
+        "items": [serialize(row, fields) for row in rows],
+        "next_cursor": encode_cursor(last.date, getattr(last, id_column.key)) if has_more else None,
+        "has_more": has_more,
+    }
+    if not args.get('cursor'):
+        summary = {"count": filtered.order_by(None).count()}
+        if summarize is not None:
+            summary.update(summarize(filtered))
+        page["summary"] = summary
+    return page
@@ -0,0 +1,303 @@
+"""
+보유 종목 원장 (Holdings ledger)
+거래 한 건이 추가될 때 해당 거래만으로 Holding의 누적값(보유 수량, 달러 원가, 투입 원화, 환율 가중 원가)을 갱신합니다.
+전체 거래 재계산(replay)은 검증/재구축 모드에서만 실행하며, 저장된 값과의 차이(drift)를 보고합니다.
+"""
+
+import logging
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import Holding, Transaction, db
+from .event_stream import publish_on_commit
+from .cost_basis import LedgerState, compute_final_states
+from .dividend_ledger import AGGREGATE_COLUMNS, dividend_totals, seed_holding_dividends
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 1000  # 전체 재구축 시 서버 사이드 커서에서 한 번에 가져올 행 수
+
+# 원가 엔진 필드 → Holding 컬럼
+HOLDING_COLUMNS = {
+    'shares': 'current_shares',
+    'cost_basis': 'total_cost_basis',
+    'invested_krw': 'total_invested_krw',
+    'cost_krw': 'total_cost_krw',
+}
+
+# 검증 시 허용 오차 (컬럼 자릿수 반올림이 거래마다 누적되는 정도)
+DRIFT_TOLERANCE = {
+    'shares': Decimal('0.000001'),
+    'cost_basis': Decimal('0.0001'),
+    'invested_krw': Decimal('1'),
+    'cost_krw': Decimal('1'),
+}
+
+
+def _transaction_rows():
+    """원가 계산에 필요한 거래 컬럼만 (종목, 날짜, ID 순)"""
+    return (
+        select(Transaction.ticker, Transaction.type, Transaction.shares, Transaction.amount,
+               Transaction.exchange_rate, Transaction.amount_krw)
+        .order_by(Transaction.ticker, Transaction.date, Transaction.transaction_id)
+    )
+
+
+def _holding_state(holding: Optional[Holding]) -> LedgerState:
+    """저장된 Holding 누적값"""
+    if holding is None:
+        return LedgerState()
+    return LedgerState(holding.current_shares, holding.total_cost_basis,
+                       holding.total_invested_krw, holding.total_cost_krw)
+
+
+def replay_ticker(ticker: str) -> LedgerState:
+    """종목 하나의 전체 거래를 원가 엔진으로 재계산"""
+    rows = db.session.execute(_transaction_rows().where(Transaction.ticker == ticker)).all()
+    return compute_final_states(rows).get(ticker) or LedgerState()
+
+
+def _write_state(ticker: str, holding: Optional[Holding], state: LedgerState) -> Optional[Holding]:
+    """누적 상태를 Holding에 반영 (보유 수량이 0 이하이면 삭제), 커밋은 호출자 담당"""
+    if state.shares <= 0:
+        if holding is not None and holding.holding_id is not None:
+            db.session.delete(holding)
+            publish_on_commit(db.session, 'holding', {"action": "deleted", "ticker": ticker})
+            print(f"Deleted holding for {ticker} (no shares remaining)")
+        return None
+
+    if holding is None:
+        holding = Holding()
+        holding.ticker = ticker
+        seed_holding_dividends(holding)
+        db.session.add(holding)
+
+    avg_price, avg_exchange_rate = state.averages()
+
+    holding.current_shares = state.shares
+    holding.avg_purchase_price = avg_price
+    holding.total_cost_basis = state.cost_basis
+    holding.total_invested_krw = state.invested_krw
+    holding.total_cost_krw = state.cost_krw
+    holding.avg_exchange_rate = avg_exchange_rate
+
+    # 현재 시장가가 없으면 평균 매수가로 설정
+    if not holding.current_market_price:
+        holding.current_market_price = avg_price
+
+    publish_on_commit(db.session, 'holding', {
+        "action": "updated",
+        "ticker": ticker,
+        "total_shares": float(state.shares),
+        "average_price": float(avg_price),
+        "total_invested_usd": float(state.cost_basis),
+        "total_invested_krw": float(state.invested_krw),
+        "current_price": float(holding.current_market_price)
+    })
+    print(f"Updated holding for {ticker}: {state.shares} shares @ ${avg_price:.4f}")
+    return holding
+
+
+def rebuild_ticker(ticker: str) -> Optional[Holding]:
+    """종목 하나의 전체 거래를 재계산해 Holding 재작성 (커밋하지 않음)"""
+    holding = Holding.query.filter_by(ticker=ticker).first()
+    return _write_state(ticker, holding, replay_ticker(ticker))
+
+
+def is_backdated(txn: Transaction) -> bool:
+    """같은 종목에 이 거래보다 나중 날짜의 거래가 이미 있는지 (평균 원가는 순서에 의존)"""
+    later = (db.session.query(Transaction.transaction_id)
+             .filter(Transaction.ticker == txn.ticker,
+                     Transaction.date > txn.date,
+                     Transaction.transaction_id != txn.transaction_id)
+             .first())
+    return later is not None
+
+
+def apply_transaction(txn: Transaction) -> Optional[Holding]:
+    """
+    새 거래 한 건을 Holding 누적값에 반영 (거래 INSERT와 같은 DB 트랜잭션 안에서 호출, 커밋하지 않음)
+
+    이전 날짜로 입력된 거래이거나 누적 원가(total_cost_krw)가 아직 없는 기존 Holding이면
+    해당 종목만 전체 재계산으로 대체
+
+    Returns:
+        갱신된 Holding 또는 None (보유 수량이 0이 되어 삭제된 경우)
+    """
+    holding = Holding.query.filter_by(ticker=txn.ticker).with_for_update().first()
+
+    if is_backdated(txn) or (holding is not None and holding.total_cost_krw is None):
+        logger.info(f"Holdings ledger: full replay for {txn.ticker}")
+        return rebuild_ticker(txn.ticker)
+
+    state = _holding_state(holding)
+    state.apply(txn)
+    return _write_state(txn.ticker, holding, state)
+
+
+def verify_holdings(ticker: Optional[str] = None, fix: bool = False) -> Dict:
+    """
+    전체 거래를 재계산해 저장된 Holding 누적값과 비교 (검증/재구축 모드)
+
+    Args:
+        ticker: 특정 종목만 검증 (None이면 거래가 있는 모든 종목)
+        fix: True면 차이가 있는 종목의 Holding을 재계산 값으로 재작성하고 커밋
+
+    Returns:
+        {'checked': 종목 수, 'drift': [{'ticker', 'field', 'stored', 'expected', 'diff'}, ...], 'fixed': [...]}
+    """
+    if ticker:
+        ticker = ticker.upper()
+        expected_states = {ticker: replay_ticker(ticker)}
+        holdings = {h.ticker: h for h in Holding.query.filter_by(ticker=ticker).all()}
+    else:
+        # 종목 수만큼 쿼리하지 않고 전체 거래를 한 번에 스트리밍해 재계산
+        expected_states = dict(stream_ledger_states())
+        holdings = {h.ticker: h for h in Holding.query.all()}
+    # 거래 없이 남아 있는 Holding도 검사
+    tickers = sorted(set(expected_states) | set(holdings))
+
+    drift = []
+    drifted_tickers = []
+    for symbol in tickers:
+        holding = holdings.get(symbol)
+        expected = expected_states.get(symbol) or LedgerState()
+
+        if expected.shares <= 0:
+            expected = LedgerState()
+        stored = _holding_state(holding).as_dict()
+
+        ticker_drift = []
+        for field, expected_value in expected.as_dict().items():
+            column = HOLDING_COLUMNS[field]
+            if holding is not None and field == 'cost_krw' and holding.total_cost_krw is None:
+                # 누적 원가 컬럼 추가 이전 데이터: 수치 비교 대신 미기록으로 보고
+                ticker_drift.append({'ticker': symbol, 'field': column, 'stored': None,
+                                     'expected': float(expected_value), 'diff': None})
+                continue
+            diff = stored[field] - expected_value
+            if abs(diff) > DRIFT_TOLERANCE[field]:
+                ticker_drift.append({'ticker': symbol, 'field': column, 'stored': float(stored[field]),
+                                     'expected': float(expected_value), 'diff': float(diff)})
+
+        if ticker_drift:
+            drift.extend(ticker_drift)
+            drifted_tickers.append(symbol)
+
+    if fix and drifted_tickers:
+        for symbol in drifted_tickers:
+            rebuild_ticker(symbol)
+        db.session.commit()
+        logger.info(f"Holdings ledger rebuilt for {len(drifted_tickers)} tickers")
+
+    return {
+        'checked': len(tickers),
+        'drift': drift,
+        'fixed': drifted_tickers if fix else [],
+    }
+
+
+def stream_ledger_states(batch_size: int = REBUILD_BATCH_SIZE) -> Iterable:
+    """
+    전체 거래를 (ticker, date) 인덱스 순서로 스트리밍하며 종목별 최종 상태 생성
+
+    ORM 객체 대신 필요한 컬럼만 서버 사이드 커서로 batch_size 행씩 가져오고,
+    종목 경계에서 끊은 묶음 단위로 원가 엔진을 실행하므로 메모리에는 한 묶음만 유지됨
+
+    Yields:
+        (ticker, LedgerState)
+    """
+    statement = _transaction_rows().execution_options(stream_results=True, yield_per=batch_size)
+    pending = []
+    for row in db.session.execute(statement):
+        # 묶음이 찼고 새 종목이 시작되면 이전 종목들까지 계산 (한 종목은 한 묶음 안에서 계산)
+        if len(pending) >= batch_size and row.ticker != pending[-1].ticker:
+            yield from compute_final_states(pending).items()
+            pending = []
+        pending.append(row)
+    if pending:
+        yield from compute_final_states(pending).items()
+
+
+def _upsert_holdings(rows: List[Dict]):
+    """Holding 행들을 한 번의 INSERT ... ON DUPLICATE KEY UPDATE(SQLite: ON CONFLICT)로 기록"""
+    if not rows:
+        return
+    update_columns = ['current_shares', 'avg_purchase_price', 'total_cost_basis', 'total_invested_krw',
+                      'total_cost_krw', 'avg_exchange_rate', 'updated_at']
+
+    if db.engine.dialect.name == 'sqlite':
+        statement = sqlite_insert(Holding.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=['ticker'],
+            set_={column: statement.excluded[column] for column in update_columns},
+        )
+    else:
+        statement = mysql_insert(Holding.__table__)
+        statement = statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in update_columns}
+        )
+    # 기존 종목의 현재 시장가/배당금 누적값은 유지, 새 종목만 평균 매수가를 시장가로 사용
+    db.session.execute(statement, rows)
+
+
+def rebuild_all_holdings(batch_size: int = REBUILD_BATCH_SIZE) -> List[Dict]:
+    """
+    전체 거래로 holdings 테이블 재구축 (스트리밍 재계산 + 일괄 upsert, 커밋 포함)
+
+    거래가 없거나 보유 수량이 0 이하인 종목의 Holding은 삭제
+
+    Returns:
+        종목별 재구축 결과 딕셔너리 리스트
+    """
+    now = datetime.now(timezone.utc)
+    dividends = dividend_totals()
+    rows = []
+    results = []
+    for ticker, state in stream_ledger_states(batch_size):
+        if state.shares <= 0:
+            continue
+        avg_price, avg_exchange_rate = state.averages()
+        rows.append({
+            'ticker': ticker,
+            'current_shares': state.shares,
+            'avg_purchase_price': avg_price,
+            'total_cost_basis': state.cost_basis,
+            'total_invested_krw': state.invested_krw,
+            'total_cost_krw': state.cost_krw,
+            'avg_exchange_rate': avg_exchange_rate,
+            'current_market_price': avg_price,
+            'updated_at': now,
+            'created_at': now,
+            # 배당금 집계는 새로 생기는 종목에만 사용됨 (기존 종목은 upsert 시 유지)
+            **{column: dividends.get(ticker, {}).get(field, 0) for field, column in AGGREGATE_COLUMNS.items()},
+        })
+        results.append({
+            "ticker": ticker,
+            "total_shares": float(state.shares),
+            "avg_price": float(avg_price),
+            "total_cost_usd": float(state.cost_basis),
+            "total_invested_krw": float(state.invested_krw),
+            "avg_exchange_rate": float(avg_exchange_rate)
+        })
+
+    try:
+        tickers = [row['ticker'] for row in rows]
+        stale = db.session.query(Holding).filter(Holding.ticker.notin_(tickers))
+        removed = stale.delete(synchronize_session=False)
+        _upsert_holdings(rows)
+        publish_on_commit(db.session, 'holding', {"action": "rebuilt", "tickers": tickers})
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    # 일괄 UPDATE로 바뀐 행이 세션에 남아 있으면 이전 값이 보이므로 만료 처리
+    db.session.expire_all()
+    logger.info(f"Holdings rebuilt: {len(rows)} tickers upserted, {removed} removed")
+    return results
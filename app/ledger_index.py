@@ -0,0 +1,153 @@
+"""
+종목별 누적 원장 인덱스 (as-of 조회용)
+모든 거래를 원가 엔진으로 한 번에 계산해 종목별로 거래 직후의 누적 수량/원가/투입 원화를 날짜순 배열로 보관하고,
+"D일 기준 보유 현황"을 종목마다 이진 탐색 한 번으로 답합니다.
+
+인덱스는 transactions 테이블 버전(data_versions)이 바뀔 때만 다시 만들어집니다.
+"""
+
+import threading
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from sqlalchemy import select
+
+from .models import Transaction, db
+from .cost_basis import DEFAULT_EXCHANGE_RATE, SHARE_SCALE, USD_QUANT, KRW_QUANT, compute_positions, to_columns
+from .data_versions import PENDING_TABLES_KEY, data_version
+
+
+class TickerIndex:
+    """종목 하나의 거래 직후 누적값 배열 (날짜 오름차순, 같은 날은 거래 ID 순)"""
+
+    def __init__(self, ticker: str, dates: np.ndarray, shares: np.ndarray,
+                 cost_basis: np.ndarray, invested_krw: np.ndarray, cost_krw: np.ndarray):
+        self.ticker = ticker
+        self.dates = dates  # date.toordinal() 값
+        self.shares = shares  # 1e-8주 단위 정수
+        self.cost_basis = cost_basis
+        self.invested_krw = invested_krw
+        self.cost_krw = cost_krw
+
+    def position(self, as_of: date) -> Optional[int]:
+        """as_of 당일까지의 마지막 거래 위치 (이전 거래가 없으면 None)"""
+        i = int(np.searchsorted(self.dates, as_of.toordinal(), side='right')) - 1
+        return i if i >= 0 else None
+
+    def shares_on(self, as_of: date) -> Decimal:
+        i = self.position(as_of)
+        return Decimal(int(self.shares[i])) / SHARE_SCALE if i is not None else Decimal('0')
+
+    def state_on(self, as_of: date) -> Optional[Dict]:
+        """as_of 당일 장 마감 기준 누적 상태"""
+        i = self.position(as_of)
+        if i is None:
+            return None
+        shares = Decimal(int(self.shares[i])) / SHARE_SCALE
+        cost_basis = Decimal(repr(float(self.cost_basis[i]))).quantize(USD_QUANT)
+        cost_krw = Decimal(repr(float(self.cost_krw[i]))).quantize(KRW_QUANT)
+        return {
+            'ticker': self.ticker,
+            'shares': shares,
+            'cost_basis': cost_basis,
+            'invested_krw': Decimal(repr(float(self.invested_krw[i]))).quantize(KRW_QUANT),
+            'avg_price': cost_basis / shares if shares > 0 else None,
+            'avg_exchange_rate': cost_krw / cost_basis if cost_basis > 0 else DEFAULT_EXCHANGE_RATE,
+            'last_transaction_date': date.fromordinal(int(self.dates[i])),
+        }
+
+
+def build_ledger_index() -> Dict[str, TickerIndex]:
+    """전체 거래를 한 번 조회해 종목별 인덱스 생성"""
+    rows = db.session.execute(
+        select(Transaction.ticker, Transaction.date, Transaction.type, Transaction.shares,
+               Transaction.amount, Transaction.exchange_rate, Transaction.amount_krw)
+        .order_by(Transaction.ticker, Transaction.date, Transaction.transaction_id)
+    ).all()
+    if not rows:
+        return {}
+
+    columns = to_columns(rows)
+    positions = compute_positions(columns)
+    dates = np.array([row.date.toordinal() for row in rows], dtype=np.int64)
+
+    tickers = columns['ticker']
+    starts = np.flatnonzero(np.insert(tickers[1:] != tickers[:-1], 0, True))
+    ends = np.append(starts[1:], len(rows))
+    return {
+        tickers[start]: TickerIndex(
+            tickers[start],
+            dates[start:end],
+            positions['shares'][start:end],
+            positions['cost_basis'][start:end],
+            positions['invested_krw'][start:end],
+            positions['cost_krw'][start:end],
+        )
+        for start, end in zip(starts, ends)
+    }
+
+
+class LedgerIndexCache:
+    """transactions 버전별로 인덱스 하나만 보관 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._index: Dict[str, TickerIndex] = {}
+
+    def get(self) -> Dict[str, TickerIndex]:
+        version = data_version('transactions')
+        with self._lock:
+            if version == self._version:
+                return self._index
+            index = build_ledger_index()
+            # 현재 세션에 커밋 전 거래 변경이 있으면 (autoflush 포함) 그 변경이 반영된 인덱스이므로 캐시하지 않음
+            if 'transactions' not in db.session.info.get(PENDING_TABLES_KEY, ()):
+                self._index, self._version = index, version
+            return index
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._index = {}
+
+
+_cache = LedgerIndexCache()
+
+
+def get_ledger_index() -> Dict[str, TickerIndex]:
+    """현재 transactions 버전의 종목별 인덱스"""
+    return _cache.get()
+
+
+def holdings_as_of(as_of: date) -> List[Dict]:
+    """as_of 당일 장 마감 기준 보유 종목 (보유 수량 0 이하 종목 제외, 종목순)"""
+    index = get_ledger_index()
+    states = []
+    for ticker in sorted(index):
+        state = index[ticker].state_on(as_of)
+        if state is not None and state['shares'] > 0:
+            states.append(state)
+    return states
+
+
+def shares_held_on(ticker: str, as_of: date) -> Decimal:
+    """as_of 당일 장 마감 기준 보유 수량"""
+    ticker_index = get_ledger_index().get(ticker.upper())
+    return ticker_index.shares_on(as_of) if ticker_index else Decimal('0')
+
+
+def fill_shares_held(rows: List[Dict]) -> List[Dict]:
+    """
+    배당금 컬럼 값에서 shares_held가 비어 있으면 지급일 기준 보유 수량으로 채움
+    (dividend_per_share도 비어 있으면 amount / shares_held로 계산)
+    """
+    for row in rows:
+        if row.get('shares_held') is None:
+            row['shares_held'] = shares_held_on(row['ticker'], row['date'])
+            if not row.get('dividend_per_share') and row['shares_held'] > 0:
+                row['dividend_per_share'] = (Decimal(row['amount']) / row['shares_held']).quantize(USD_QUANT)
+    return rows
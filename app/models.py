@@ -12,6 +12,10 @@ class Transaction(db.Model):
     환율 추적과 배당금 재투자 정보를 포함하여 정확한 수익률 계산 지원
     """
     __tablename__ = 'transactions'
+    __table_args__ = (
+        # 종목별 날짜순 재계산(holdings 재구축)이 이 인덱스 순서로 스트리밍함
+        db.Index('idx_transactions_ticker_date', 'ticker', 'date'),
+    )
     
     transaction_id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False, default=date.today)
@@ -53,6 +57,7 @@ class Holding(db.Model):
     
     # 원화 투자 정보
     total_invested_krw = db.Column(db.DECIMAL(18, 2), default=0)  # 총 투입 원화
+    total_cost_krw = db.Column(db.DECIMAL(18, 2))  # 매수 시점 환율 기준 원가 합계 (가중평균 환율 계산용)
     
     # 배당금 정보 세분화
     total_dividends_received = db.Column(db.DECIMAL(18, 8), default=0)  # 총 수령 배당금
@@ -71,6 +76,10 @@ class Holding(db.Model):
 class Dividend(db.Model):
     """배당금 수령 내역을 별도로 관리"""
     __tablename__ = 'dividends'
+    __table_args__ = (
+        # 종목별 배당금 합계(GROUP BY ticker)와 기간 조회가 이 인덱스를 사용함
+        db.Index('idx_dividends_ticker_date', 'ticker', 'date'),
+    )
     
     dividend_id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False, default=date.today)
@@ -86,6 +95,136 @@ class Dividend(db.Model):
     created_at = db.Column(db.TIMESTAMP, default=lambda: datetime.now(timezone.utc))
 
 
+class PriceQuote(db.Model):
+    """종목 시세 이력 (시세 갱신 경로에서 조회한 가격을 모두 누적 기록)"""
+    __tablename__ = 'price_quotes'
+    __table_args__ = (
+        # (ticker, timestamp) 범위 조회에 사용되며 같은 시각/출처의 중복 기록을 막음
+        db.UniqueConstraint('ticker', 'timestamp', 'source', name='uq_price_quotes_ticker_timestamp_source'),
+    )
+    
+    quote_id = db.Column(db.Integer, primary_key=True)
+    ticker = db.Column(db.String(10), nullable=False)
+    timestamp = db.Column(db.TIMESTAMP, nullable=False)  # 시세 조회 시각 (UTC)
+    price = db.Column(db.DECIMAL(18, 8), nullable=False)
+    source = db.Column(db.String(50), nullable=False)  # 'toss', 'finnhub', 'yfinance', 'manual' 등
+    created_at = db.Column(db.TIMESTAMP, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<PriceQuote {self.ticker} {self.price} ({self.source}) at {self.timestamp}>"
+
+
+class TaxLot(db.Model):
+    """매수 거래 한 건 = 로트 하나, 매도 시 로트 매칭 방식(FIFO/평균/지정)에 따라 잔여 수량과 원가가 줄어듦"""
+    __tablename__ = 'tax_lots'
+    __table_args__ = (
+        db.Index('idx_tax_lots_ticker_acquired', 'ticker', 'acquired_date'),
+    )
+    
+    lot_id = db.Column(db.Integer, primary_key=True)
+    ticker = db.Column(db.String(10), nullable=False)
+    buy_transaction_id = db.Column(db.Integer, nullable=False, unique=True)  # 로트를 만든 매수 거래
+    acquired_date = db.Column(db.Date, nullable=False)
+    exchange_rate = db.Column(db.DECIMAL(10, 2))  # 매수 환율
+    
+    original_shares = db.Column(db.DECIMAL(18, 8), nullable=False)
+    remaining_shares = db.Column(db.DECIMAL(18, 8), nullable=False)
+    cost_basis_usd = db.Column(db.DECIMAL(18, 8), nullable=False)  # 매수 원가 (달러)
+    remaining_cost_usd = db.Column(db.DECIMAL(18, 8), nullable=False)
+    cost_basis_krw = db.Column(db.DECIMAL(18, 2), nullable=False)  # 매수 원가 (원화)
+    remaining_cost_krw = db.Column(db.DECIMAL(18, 2), nullable=False)
+    
+    created_at = db.Column(db.TIMESTAMP, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.TIMESTAMP, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<TaxLot {self.ticker} {self.remaining_shares}/{self.original_shares} acquired {self.acquired_date}>"
+
+
+class RealizedGain(db.Model):
+    """매도 거래가 소진한 로트별 실현 손익 (매도 시점에 확정 기록)"""
+    __tablename__ = 'realized_gains'
+    __table_args__ = (
+        db.Index('idx_realized_gains_ticker_date', 'ticker', 'sell_date'),
+        db.Index('idx_realized_gains_sell_date', 'sell_date'),
+        db.Index('idx_realized_gains_sell_txn', 'sell_transaction_id'),
+    )
+    
+    gain_id = db.Column(db.Integer, primary_key=True)
+    sell_transaction_id = db.Column(db.Integer, nullable=False)
+    lot_id = db.Column(db.Integer)
+    buy_transaction_id = db.Column(db.Integer)  # 로트 재구축 후에도 지정 매칭을 재현하기 위한 기준
+    ticker = db.Column(db.String(10), nullable=False)
+    method = db.Column(db.String(20), nullable=False)  # 'fifo', 'average', 'specific'
+    sell_date = db.Column(db.Date, nullable=False)
+    acquired_date = db.Column(db.Date)
+    shares = db.Column(db.DECIMAL(18, 8), nullable=False)
+    
+    proceeds_usd = db.Column(db.DECIMAL(18, 8), nullable=False)
+    cost_basis_usd = db.Column(db.DECIMAL(18, 8), nullable=False)
+    realized_pnl_usd = db.Column(db.DECIMAL(18, 8), nullable=False)
+    proceeds_krw = db.Column(db.DECIMAL(18, 2), nullable=False)
+    cost_basis_krw = db.Column(db.DECIMAL(18, 2), nullable=False)
+    realized_pnl_krw = db.Column(db.DECIMAL(18, 2), nullable=False)
+    
+    created_at = db.Column(db.TIMESTAMP, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<RealizedGain {self.ticker} {self.shares} on {self.sell_date} P&L:{self.realized_pnl_usd}>"
+
+
+class ImportedRecord(db.Model):
+    """증권사 거래내역 가져오기에서 이미 저장한 행의 내용 해시 (재가져오기 시 중복 방지)"""
+    __tablename__ = 'imported_records'
+    
+    record_id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False, unique=True)  # SHA-256
+    record_type = db.Column(db.String(20), nullable=False)  # 'transaction', 'dividend', 'exchange_rate'
+    source_format = db.Column(db.String(20))  # 'usd_statement', 'krw_statement'
+    imported_at = db.Column(db.TIMESTAMP, default=lambda: datetime.now(timezone.utc))
+    
+    def __repr__(self):
+        return f"<ImportedRecord {self.record_type} {self.content_hash[:12]}>"
+
+
+class DataVersion(db.Model):
+    """테이블별 데이터 버전 (변경을 커밋하는 트랜잭션 안에서 함께 증가, 프로세스 간 공유)"""
+    __tablename__ = 'data_versions'
+    
+    table_name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DataVersion {self.table_name}:{self.version}>"
+
+
+class PortfolioSnapshot(db.Model):
+    """일별 포트폴리오 스냅샷 (주가/환율 갱신 후 기록, 종목별 행 + ticker='*' 포트폴리오 합계 행)"""
+    __tablename__ = 'portfolio_snapshots'
+    __table_args__ = (
+        # 하루에 종목당 한 행 (upsert), (ticker, snapshot_date) 범위 조회 인덱스 겸용
+        db.UniqueConstraint('ticker', 'snapshot_date', name='uq_portfolio_snapshots_ticker_date'),
+    )
+    
+    snapshot_id = db.Column(db.Integer, primary_key=True)
+    snapshot_date = db.Column(db.Date, nullable=False)  # 한국 시간 기준 날짜
+    ticker = db.Column(db.String(10), nullable=False)  # '*' = 포트폴리오 합계
+    shares = db.Column(db.DECIMAL(18, 8))  # 합계 행은 NULL
+    market_price = db.Column(db.DECIMAL(18, 8))  # 합계 행은 NULL
+    exchange_rate = db.Column(db.DECIMAL(10, 4), nullable=False)  # 평가에 사용한 USD/KRW
+    cost_basis_usd = db.Column(db.DECIMAL(18, 8), nullable=False, default=0)
+    invested_krw = db.Column(db.DECIMAL(18, 2), nullable=False, default=0)
+    market_value_usd = db.Column(db.DECIMAL(18, 8), nullable=False, default=0)
+    market_value_krw = db.Column(db.DECIMAL(18, 2), nullable=False, default=0)
+    unrealized_pnl_usd = db.Column(db.DECIMAL(18, 8), nullable=False, default=0)
+    unrealized_pnl_krw = db.Column(db.DECIMAL(18, 2), nullable=False, default=0)
+    dividends_usd = db.Column(db.DECIMAL(18, 8), nullable=False, default=0)  # 누적 수령 배당금
+    captured_at = db.Column(db.TIMESTAMP, nullable=False)  # 마지막 기록 시각 (UTC)
+    
+    def __repr__(self):
+        return f"<PortfolioSnapshot {self.ticker} {self.snapshot_date} Value:${self.market_value_usd}>"
+
+
 class ExchangeRate(db.Model):
     """실시간 환율 정보 관리"""
     __tablename__ = 'exchange_rates'
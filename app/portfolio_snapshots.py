@@ -0,0 +1,216 @@
+"""
+일별 포트폴리오 스냅샷 저장/조회 모듈
+주가/환율 갱신 직후 보유 현황을 portfolio_snapshots 테이블에 기록하여
+가치 추이 차트와 일일 리포트의 전일 대비 변화를 재계산/외부 API 호출 없이 인덱스 조회로 제공합니다.
+
+- 하루에 (날짜, 종목)당 한 행, 같은 날 다시 기록하면 최신 값으로 덮어씀 (upsert)
+- 포트폴리오 전체 합계는 ticker = PORTFOLIO_TICKER 행으로 함께 기록
+"""
+
+import logging
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from pytz import timezone as pytz_timezone
+from sqlalchemy import func, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import Dividend, ExchangeRate, Holding, PortfolioSnapshot, db
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_TICKER = '*'  # 포트폴리오 전체 합계 행 (실제 종목 코드와 겹치지 않음)
+SNAPSHOT_TIMEZONE = pytz_timezone('Asia/Seoul')  # 스케줄러와 같은 기준 날짜
+DEFAULT_EXCHANGE_RATE = Decimal('1400')
+
+VALUE_COLUMNS = ['shares', 'market_price', 'exchange_rate', 'cost_basis_usd', 'invested_krw',
+                 'market_value_usd', 'market_value_krw', 'unrealized_pnl_usd', 'unrealized_pnl_krw',
+                 'dividends_usd', 'captured_at']
+
+
+def snapshot_today() -> date:
+    return datetime.now(SNAPSHOT_TIMEZONE).date()
+
+
+def build_snapshot_rows(snapshot_date: Optional[date] = None) -> List[Dict]:
+    """
+    현재 보유 현황으로 스냅샷 행 생성 (보유 종목/최신 환율/종목별 배당 합계 각각 한 번씩 조회)
+
+    Returns:
+        종목별 행 + 마지막에 포트폴리오 합계 행 (보유 종목이 없으면 빈 리스트)
+    """
+    snapshot_date = snapshot_date or snapshot_today()
+    holdings = Holding.query.filter(Holding.current_shares > 0).order_by(Holding.ticker).all()
+    if not holdings:
+        return []
+
+    latest_rate = db.session.execute(
+        select(ExchangeRate.usd_krw).order_by(ExchangeRate.timestamp.desc()).limit(1)
+    ).scalar()
+    exchange_rate = Decimal(str(latest_rate or DEFAULT_EXCHANGE_RATE))
+
+    dividends = dict(db.session.execute(
+        select(Dividend.ticker, func.sum(Dividend.amount)).group_by(Dividend.ticker)
+    ).all())
+
+    captured_at = datetime.now(timezone.utc)
+    rows = []
+    totals = {column: Decimal('0') for column in ('cost_basis_usd', 'invested_krw', 'market_value_usd',
+                                                 'market_value_krw', 'dividends_usd')}
+    for holding in holdings:
+        shares = Decimal(holding.current_shares)
+        market_price = Decimal(holding.current_market_price or 0)
+        market_value_usd = shares * market_price
+        market_value_krw = market_value_usd * exchange_rate
+        cost_basis_usd = Decimal(holding.total_cost_basis or 0)
+        invested_krw = Decimal(holding.total_invested_krw or 0)
+        row = {
+            'snapshot_date': snapshot_date,
+            'ticker': holding.ticker,
+            'shares': shares,
+            'market_price': market_price,
+            'exchange_rate': exchange_rate,
+            'cost_basis_usd': cost_basis_usd,
+            'invested_krw': invested_krw,
+            'market_value_usd': market_value_usd,
+            'market_value_krw': market_value_krw,
+            'unrealized_pnl_usd': market_value_usd - cost_basis_usd,
+            'unrealized_pnl_krw': market_value_krw - invested_krw,
+            'dividends_usd': Decimal(dividends.get(holding.ticker) or 0),
+            'captured_at': captured_at,
+        }
+        rows.append(row)
+        for column in totals:
+            totals[column] += row[column]
+
+    rows.append({
+        'snapshot_date': snapshot_date,
+        'ticker': PORTFOLIO_TICKER,
+        'shares': None,
+        'market_price': None,
+        'exchange_rate': exchange_rate,
+        **totals,
+        'unrealized_pnl_usd': totals['market_value_usd'] - totals['cost_basis_usd'],
+        'unrealized_pnl_krw': totals['market_value_krw'] - totals['invested_krw'],
+        'captured_at': captured_at,
+    })
+    return rows
+
+
+def record_snapshot(snapshot_date: Optional[date] = None) -> int:
+    """
+    오늘(또는 지정일) 스냅샷을 한 번의 upsert로 기록 (커밋은 호출자가 수행)
+
+    Returns:
+        기록한 행 수 (포트폴리오 합계 행 포함)
+    """
+    rows = build_snapshot_rows(snapshot_date)
+    if not rows:
+        return 0
+
+    if db.engine.dialect.name == 'sqlite':
+        statement = sqlite_insert(PortfolioSnapshot.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=['ticker', 'snapshot_date'],
+            set_={column: statement.excluded[column] for column in VALUE_COLUMNS},
+        )
+    else:
+        statement = mysql_insert(PortfolioSnapshot.__table__)
+        statement = statement.on_duplicate_key_update(
+            {column: statement.inserted[column] for column in VALUE_COLUMNS}
+        )
+    db.session.execute(statement, rows)
+    return len(rows)
+
+
+def save_snapshot() -> int:
+    """
+    주가/환율 갱신 경로 공용: 오늘자 스냅샷 기록 후 커밋 (앱 컨텍스트 안에서 호출)
+
+    스냅샷 실패는 롤백 후 로그만 남겨 갱신 결과에는 영향을 주지 않음
+
+    Returns:
+        기록한 행 수 (실패 시 0)
+    """
+    try:
+        count = record_snapshot()
+        db.session.commit()
+        logger.info(f"Portfolio snapshot recorded: {count} rows")
+        return count
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Error recording portfolio snapshot: {e}")
+        return 0
+
+
+def serialize_snapshot(snapshot) -> Dict:
+    def number(value):
+        return float(value) if value is not None else None
+
+    return {
+        'date': snapshot.snapshot_date.isoformat(),
+        'ticker': None if snapshot.ticker == PORTFOLIO_TICKER else snapshot.ticker,
+        'shares': number(snapshot.shares),
+        'market_price': number(snapshot.market_price),
+        'exchange_rate': number(snapshot.exchange_rate),
+        'cost_basis_usd': number(snapshot.cost_basis_usd),
+        'invested_krw': number(snapshot.invested_krw),
+        'market_value_usd': number(snapshot.market_value_usd),
+        'market_value_krw': number(snapshot.market_value_krw),
+        'unrealized_pnl_usd': number(snapshot.unrealized_pnl_usd),
+        'unrealized_pnl_krw': number(snapshot.unrealized_pnl_krw),
+        'dividends_usd': number(snapshot.dividends_usd),
+        'captured_at': snapshot.captured_at.isoformat() if snapshot.captured_at else None,
+    }
+
+
+def get_snapshots(ticker: Optional[str] = None,
+                  start: Optional[date] = None,
+                  end: Optional[date] = None) -> List[Dict]:
+    """
+    스냅샷 기간 조회 ((ticker, snapshot_date) 인덱스 범위 스캔)
+
+    Args:
+        ticker: 종목 티커 (None이면 포트폴리오 합계)
+        start: 조회 시작일 (포함)
+        end: 조회 종료일 (포함)
+
+    Returns:
+        날짜 오름차순 스냅샷 딕셔너리 리스트
+    """
+    query = PortfolioSnapshot.query.filter(PortfolioSnapshot.ticker == (ticker or PORTFOLIO_TICKER))
+    if start is not None:
+        query = query.filter(PortfolioSnapshot.snapshot_date >= start)
+    if end is not None:
+        query = query.filter(PortfolioSnapshot.snapshot_date <= end)
+    return [serialize_snapshot(snapshot) for snapshot in query.order_by(PortfolioSnapshot.snapshot_date.asc())]
+
+
+def get_day_over_day(ticker: Optional[str] = None) -> Optional[Dict]:
+    """
+    가장 최근 스냅샷과 그 이전 날짜 스냅샷 비교 (최근 두 행만 조회)
+
+    Returns:
+        {'current', 'previous', 'value_change_usd', 'value_change_pct', 'pnl_change_usd'} 또는 None
+    """
+    latest = (PortfolioSnapshot.query
+              .filter(PortfolioSnapshot.ticker == (ticker or PORTFOLIO_TICKER))
+              .order_by(PortfolioSnapshot.snapshot_date.desc())
+              .limit(2)
+              .all())
+    if len(latest) < 2:
+        return None
+
+    current, previous = latest
+    value_change = float(current.market_value_usd) - float(previous.market_value_usd)
+    previous_value = float(previous.market_value_usd)
+    return {
+        'current': serialize_snapshot(current),
+        'previous': serialize_snapshot(previous),
+        'value_change_usd': value_change,
+        'value_change_pct': (value_change / previous_value * 100) if previous_value > 0 else 0,
+        'pnl_change_usd': (float(current.unrealized_pnl_usd) + float(current.dividends_usd))
+                          - (float(previous.unrealized_pnl_usd) + float(previous.dividends_usd)),
+    }
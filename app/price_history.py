@@ -0,0 +1,97 @@
+"""
+시세 이력 저장/조회 모듈
+모든 시세 갱신 경로에서 조회한 가격을 price_quotes 테이블에 bulk insert로 누적하고,
+차트/기간 비교용 이력을 외부 API 대신 DB에서 제공합니다.
+"""
+
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+
+from .models import PriceQuote, db
+
+
+def _to_utc_timestamp(value) -> datetime:
+    if value is None:
+        value = time.time()
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value, timezone.utc)
+    elif value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    # TIMESTAMP 컬럼 정밀도(초)에 맞춰 중복 판정이 일관되도록 절삭
+    return value.astimezone(timezone.utc).replace(microsecond=0, tzinfo=None)
+
+
+def record_quotes(quotes: Iterable[Dict], default_source: str = 'api') -> int:
+    """
+    시세 목록을 price_quotes 테이블에 한 번의 INSERT로 기록 (커밋은 호출자가 수행)
+    (ticker, timestamp, source)가 같은 행은 무시되므로 캐시 적중 시세를 다시 넘겨도 안전함
+
+    Args:
+        quotes: {'ticker', 'price', 'source'?, 'fetched_at'?} 딕셔너리들
+        default_source: source가 없는 항목에 사용할 출처
+
+    Returns:
+        INSERT 대상 행 수
+    """
+    rows = []
+    for quote in quotes:
+        price = quote.get('price')
+        if price is None or float(price) <= 0:
+            continue
+        rows.append({
+            'ticker': quote['ticker'],
+            'timestamp': _to_utc_timestamp(quote.get('fetched_at')),
+            'price': Decimal(str(price)),
+            'source': quote.get('source') or default_source,
+        })
+
+    if not rows:
+        return 0
+
+    statement = (
+        insert(PriceQuote)
+        .prefix_with('IGNORE', dialect='mysql')
+        .prefix_with('OR IGNORE', dialect='sqlite')
+    )
+    db.session.execute(statement, rows)
+    return len(rows)
+
+
+def get_price_history(ticker: str,
+                      start: Optional[datetime] = None,
+                      end: Optional[datetime] = None,
+                      source: Optional[str] = None) -> List[Dict]:
+    """
+    종목 시세 이력 조회 (ticker, timestamp 인덱스 범위 스캔)
+
+    Args:
+        ticker: 종목 티커
+        start: 조회 시작 시각 (포함)
+        end: 조회 종료 시각 (포함)
+        source: 특정 출처만 조회할 경우
+
+    Returns:
+        시각 오름차순 [{'timestamp', 'price', 'source'}]
+    """
+    query = db.session.query(PriceQuote.timestamp, PriceQuote.price, PriceQuote.source).filter(
+        PriceQuote.ticker == ticker
+    )
+    if start is not None:
+        query = query.filter(PriceQuote.timestamp >= start)
+    if end is not None:
+        query = query.filter(PriceQuote.timestamp <= end)
+    if source:
+        query = query.filter(PriceQuote.source == source)
+
+    return [
+        {
+            'timestamp': row.timestamp.isoformat(),
+            'price': float(row.price),
+            'source': row.source,
+        }
+        for row in query.order_by(PriceQuote.timestamp.asc())
+    ]
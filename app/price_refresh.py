@@ -0,0 +1,121 @@
+"""
+주가 일괄 갱신 엔진
+보유 종목 시세를 프로바이더별 동시성/속도 제한 아래에서 병렬로 조회하고,
+변경된 가격을 한 번의 bulk UPDATE로 반영합니다.
+"""
+
+import logging
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+
+from .event_stream import publish_on_commit
+from .models import Holding, db
+from .price_history import record_quotes
+from .quote_router import get_quote_router, describe_failure
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+PRICE_CHANGE_THRESHOLD = 0.001  # 0.001달러 이상 차이날 때만 업데이트
+
+
+def fetch_prices_concurrently(tickers: List[str], max_workers: int = MAX_WORKERS) -> Dict[str, Dict]:
+    """
+    여러 종목의 가격을 병렬로 조회 (시세 라우터 경유)
+
+    Args:
+        tickers: 종목 티커 리스트
+        max_workers: 종목별 조회 스레드 수 (프로바이더 동시성은 라우터 게이트가 별도로 제한)
+
+    Returns:
+        티커별 조회 결과 {'price', 'source', 'latency_ms', 'error'}
+    """
+    if not tickers:
+        return {}
+    return get_quote_router().get_quotes(tickers, max_workers=max_workers)
+
+
+def refresh_holdings_prices(targets: List[Tuple[int, str, float]]) -> Tuple[List[Dict], List[str], List[Dict]]:
+    """
+    보유 종목 가격을 병렬 조회하고 변경분만 골라냄 (DB 접근 없음)
+
+    Args:
+        targets: (holding_id, ticker, 기존 가격) 튜플 리스트
+
+    Returns:
+        (updated, failed, quotes) - updated/failed는 기존 update_stock_price 결과 형식과 동일,
+        quotes는 이력 기록용으로 조회에 성공한 모든 시세
+    """
+    fetched = fetch_prices_concurrently([ticker for _, ticker, _ in targets])
+
+    updated, failed, quotes = [], [], []
+    for holding_id, ticker, old_price in targets:
+        result = fetched[ticker]
+        current_price = result['price']
+        latency_s = result['latency_ms'] / 1000
+
+        if current_price is None or current_price <= 0:
+            failed.append(f"{ticker} ({describe_failure(result['error'])}, {latency_s:.1f}s)")
+            continue
+
+        quotes.append(result)
+
+        if abs(current_price - old_price) > PRICE_CHANGE_THRESHOLD:
+            updated.append({
+                'holding_id': holding_id,
+                'ticker': ticker,
+                'old_price': old_price,
+                'new_price': current_price,
+                'change': current_price - old_price,
+                'change_pct': ((current_price - old_price) / old_price * 100) if old_price > 0 else 0,
+                'source': result['source'],
+                'latency_ms': result['latency_ms'],
+            })
+            logger.info(f"Updated {ticker}: ${old_price:.3f} -> ${current_price:.3f} ({result['latency_ms']:.0f}ms)")
+
+    return updated, failed, quotes
+
+
+def apply_price_updates(updated: List[Dict], quotes: Optional[List[Dict]] = None) -> int:
+    """
+    조회한 시세를 이력 테이블에 bulk insert하고, 변경된 가격을 한 번의 bulk UPDATE로 반영한 뒤
+    하나의 트랜잭션으로 커밋 (앱 컨텍스트 필요)
+
+    Returns:
+        반영된 종목 수
+    """
+    if quotes:
+        record_quotes(quotes)
+
+    if not updated:
+        db.session.commit()
+        return 0
+
+    # 커밋되면 스트림 구독자에게 변경된 가격만 전달
+    publish_on_commit(db.session, 'prices', {'updates': [
+        {
+            'ticker': stock['ticker'],
+            'old_price': stock['old_price'],
+            'new_price': stock['new_price'],
+            'source': stock['source'],
+        }
+        for stock in updated
+    ]})
+
+    today = datetime.now().date()
+    db.session.execute(
+        update(Holding),
+        [
+            {
+                'holding_id': stock['holding_id'],
+                'current_market_price': Decimal(str(stock['new_price'])),
+                'last_price_update_date': today,
+            }
+            for stock in updated
+        ]
+    )
+    db.session.commit()
+    return len(updated)
@@ -1,129 +1,84 @@
-import yfinance as yf
-import requests
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
 
-def get_stock_price(ticker, session=None):
-    """
-    여러 방법으로 주식 가격을 가져오는 함수
-    """
-    if session is None:
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-    
-    try:
-        # 방법 1: yfinance로 역사적 데이터 가져오기
-        ticker_obj = yf.Ticker(ticker, session=session)
-        
-        # 5일 데이터로 시도
-        hist = ticker_obj.history(period="5d")
-        
-        if not hist.empty:
-            latest_price = float(hist['Close'].iloc[-1])
-            print(f"✓ {ticker}: ${latest_price} (from history)")
-            return latest_price
-        
-        # 방법 2: ticker.info에서 가져오기
-        info = ticker_obj.info
-        if 'regularMarketPrice' in info and info['regularMarketPrice']:
-            latest_price = float(info['regularMarketPrice'])
-            print(f"✓ {ticker}: ${latest_price} (from info)")
-            return latest_price
-        
-        # 방법 3: currentPrice 필드 시도
-        if 'currentPrice' in info and info['currentPrice']:
-            latest_price = float(info['currentPrice'])
-            print(f"✓ {ticker}: ${latest_price} (from currentPrice)")
-            return latest_price
-            
-        # 방법 4: ask/bid 평균
-        if 'ask' in info and 'bid' in info and info['ask'] and info['bid']:
-            latest_price = (float(info['ask']) + float(info['bid'])) / 2
-            print(f"✓ {ticker}: ${latest_price} (from ask/bid)")
-            return latest_price
-            
-        print(f"✗ {ticker}: No price data available")
-        return None
-        
-    except Exception as e:
-        print(f"✗ {ticker}: Error - {str(e)}")
-        return None
-
-# 캐시 저장소 (메모리)
-price_cache = {}
-CACHE_DURATION = timedelta(hours=1)  # 1시간 캐시 (증시 마감 후 고려)
+from .event_stream import publish_on_commit
+from .models import db
+from .quote_cache import get_quote_cache
+from .quote_router import get_quote_router, describe_failure
+from .price_history import record_quotes
 
 def should_update_price(ticker, last_update_date):
     """
     주가를 업데이트해야 하는지 확인
-    - 캐시에 있고 1시간 이내면 업데이트 안함
+    - 공유 시세 캐시에 유효한 가격이 있으면 업데이트 안함
     - 마지막 업데이트가 오늘이 아니면 업데이트
     """
-    now = datetime.now()
-    
-    # 캐시 확인
-    if ticker in price_cache:
-        cache_time, _ = price_cache[ticker]
-        if now - cache_time < CACHE_DURATION:
-            return False
+    if get_quote_cache().get(ticker) is not None:
+        return False
     
     # 마지막 업데이트가 오늘이 아니면 업데이트 필요
-    if last_update_date != now.date():
-        return True
-    
-    return False
+    return last_update_date != datetime.now().date()
 
 def update_stock_prices(holdings):
     """
-    모든 holdings의 주가를 업데이트하는 함수 (캐시 및 제한 적용)
+    모든 holdings의 주가를 업데이트하는 함수 (시세 라우터 경유)
+    갱신이 필요한 종목을 모아 한 번에 조회하므로 Toss 일괄 조회 → yfinance 일괄 다운로드 후
+    누락된 종목만 종목별로 fallback
     """
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    })
-    
+    cache = get_quote_cache()
     updated_prices = {}
     now = datetime.now()
+    targets = []
+    
+    for holding in holdings:
+        # 캐시 확인
+        cached = cache.get(holding.ticker)
+        if cached is not None:
+            age_min = int((time.time() - cached['fetched_at']) / 60)
+            print(f"📦 {holding.ticker}: Using cached price ${cached['price']} (cached {age_min}min ago)")
+            updated_prices[holding.ticker] = cached['price']
+            continue
+        
+        # 업데이트가 필요한지 확인
+        if not should_update_price(holding.ticker, holding.last_price_update_date):
+            print(f"⏭ {holding.ticker}: Skipping (recently updated)")
+            continue
+        
+        targets.append(holding)
+    
+    if not targets:
+        return updated_prices
+    
+    # 같은 종목을 다른 요청이 조회 중이면 그 결과를 공유 (single-flight)
+    quotes = get_quote_router().get_quotes([holding.ticker for holding in targets])
+    price_changes = []
+    
+    for holding in targets:
+        quote = quotes.get(holding.ticker, {})
+        latest_price = quote.get('price')
+        
+        if latest_price is not None and latest_price > 0:
+            old_price = float(holding.current_market_price)
+            if abs(latest_price - old_price) > 0.001:
+                price_changes.append({
+                    'ticker': holding.ticker,
+                    'old_price': old_price,
+                    'new_price': latest_price,
+                    'source': quote.get('source'),
+                })
+            # 데이터베이스 업데이트
+            holding.current_market_price = latest_price
+            holding.last_price_update_date = now.date()
+            updated_prices[holding.ticker] = latest_price
+            print(f"✓ {holding.ticker}: ${latest_price} (from {quote.get('source')})")
+        else:
+            print(f"⚠ {holding.ticker}: Using existing price ${holding.current_market_price} "
+                  f"({describe_failure(quote.get('error'))})")
     
-    for i, holding in enumerate(holdings):
-        try:
-            # 캐시 확인
-            if holding.ticker in price_cache:
-                cache_time, cached_price = price_cache[holding.ticker]
-                if now - cache_time < CACHE_DURATION:
-                    print(f"📦 {holding.ticker}: Using cached price ${cached_price} (cached {int((now - cache_time).total_seconds() / 60)}min ago)")
-                    updated_prices[holding.ticker] = cached_price
-                    continue
-            
-            # 업데이트가 필요한지 확인
-            if not should_update_price(holding.ticker, holding.last_price_update_date):
-                print(f"⏭ {holding.ticker}: Skipping (recently updated)")
-                continue
-            
-            # API 호출 제한 (각 요청 사이에 1초 대기)
-            if i > 0:
-                time.sleep(1)
-            
-            latest_price = get_stock_price(holding.ticker, session)
-            
-            if latest_price is not None:
-                # 데이터베이스 업데이트
-                holding.current_market_price = latest_price
-                holding.last_price_update_date = now.date()
-                updated_prices[holding.ticker] = latest_price
-                
-                # 캐시 저장
-                price_cache[holding.ticker] = (now, latest_price)
-                
-            else:
-                print(f"⚠ {holding.ticker}: Using existing price ${holding.current_market_price}")
-                # 기존 가격을 캐시에 저장
-                price_cache[holding.ticker] = (now, float(holding.current_market_price))
-                
-        except Exception as e:
-            print(f"✗ {holding.ticker}: Unexpected error - {str(e)}")
+    # 조회한 시세는 이력 테이블에 기록 (커밋은 호출자가 가격 변경과 함께 수행)
+    record_quotes(quotes.values())
+    if price_changes:
+        publish_on_commit(db.session, 'prices', {'updates': price_changes})
     
     return updated_prices
 
@@ -131,8 +86,4 @@ def get_cached_price(ticker):
     """
     캐시된 가격을 가져오는 함수
     """
-    if ticker in price_cache:
-        cache_time, cached_price = price_cache[ticker]
-        if datetime.now() - cache_time < CACHE_DURATION:
-            return cached_price
-    return None
\ No newline at end of file
+    return get_quote_cache().get_price(ticker)
@@ -0,0 +1,292 @@
+"""
+시세 프로바이더 상태 관리
+- 서킷 브레이커: 요청 한도 초과/응답 시간 초과/서버 오류(5xx)가 연속되면 차단(open), 쿨다운 후 한 건만 시험 호출(half-open)
+- AIMD 적응형 요청 간격: 성공하면 조금씩 빨라지고, 요청 한도 초과 시 절반 속도로 감속
+- 전역 백오프: Retry-After 또는 지수 백오프로 정한 시각까지 모든 시세 경로가 해당 프로바이더 호출을 멈춤
+
+상태는 프로세스 전역으로 공유되므로 시세 라우터, 스케줄러, price_updater가 같은 판단을 사용합니다.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 프로바이더별 동시 요청 수와 요청 간격 범위 (초)
+PROVIDER_LIMITS = {
+    'toss': {'max_concurrency': 2, 'min_interval': 0.1, 'max_interval': 2.0},
+    'finnhub': {'max_concurrency': 2, 'min_interval': 1.0, 'max_interval': 10.0},  # 무료 플랜 분당 60회
+    'yahoo': {'max_concurrency': 4, 'min_interval': 0.5, 'max_interval': 10.0},
+}
+DEFAULT_LIMITS = {'max_concurrency': 2, 'min_interval': 1.0, 'max_interval': 10.0}
+
+FAILURE_THRESHOLD = 3     # 연속 한도 초과/시간 초과 횟수가 이 값에 도달하면 차단
+OPEN_COOLDOWN = 30.0      # 첫 차단 유지 시간 (초), 시험 호출 실패 시 두 배씩 증가
+MAX_OPEN_COOLDOWN = 600.0
+BACKOFF_BASE = 2.0        # 요청 한도 초과 시 전역 백오프 기본 시간 (초)
+MAX_BACKOFF = 300.0
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderUnavailable(Exception):
+    """서킷 차단 또는 전역 백오프 중이라 호출하지 않은 경우"""
+
+    def __init__(self, provider: str, retry_in: float):
+        self.provider = provider
+        self.retry_in = retry_in
+        super().__init__(f"{provider} 일시 차단 중 ({retry_in:.0f}s 후 재시도)")
+
+
+def is_throttled(error: Optional[Exception]) -> bool:
+    """요청 한도 초과(429) 오류 여부"""
+    if error is None:
+        return False
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429 or getattr(error, 'status', None) == 429:
+        return True
+    if 'RateLimit' in type(error).__name__:  # yfinance YFRateLimitError 등
+        return True
+    message = str(error)
+    return '429' in message or 'Too Many Requests' in message
+
+
+def is_timeout(error: Optional[Exception]) -> bool:
+    """응답 시간 초과 오류 여부"""
+    return isinstance(error, (requests.Timeout, TimeoutError))
+
+
+def is_server_error(error: Optional[Exception]) -> bool:
+    """프로바이더 서버 오류(5xx) 여부"""
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status', None) or getattr(response, 'status_code', None)
+    return isinstance(status, int) and 500 <= status < 600
+
+
+def retry_after_seconds(error: Optional[Exception]) -> Optional[float]:
+    """429 응답의 Retry-After 헤더 (초 단위만 지원)"""
+    retry_after = getattr(error, 'retry_after', None)  # TossAPIError 등 이미 파싱한 값
+    if retry_after is not None:
+        return float(retry_after)
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        value = headers.get('Retry-After')
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    AIMD 방식 요청 간격 리미터 (스레드 안전)
+
+    성공할 때마다 요청 속도를 조금씩 올리고(additive increase),
+    요청 한도 초과 시 속도를 절반으로 낮춤(multiplicative decrease)
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, increase_step: float = 0.05):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.increase_step = increase_step  # 성공 1회당 증가시킬 초당 요청 수
+        self.interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self):
+        """다음 요청 슬롯까지 대기"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        wait_time = slot - now
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    def on_success(self):
+        with self._lock:
+            rate = 1.0 / self.interval + self.increase_step
+            self.interval = max(self.min_interval, 1.0 / rate)
+
+    def on_throttle(self):
+        with self._lock:
+            self.interval = min(self.max_interval, self.interval * 2)
+
+
+class CircuitBreaker:
+    """연속 실패 기반 서킷 브레이커 (closed → open → half_open → closed)"""
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD,
+                 cooldown: float = OPEN_COOLDOWN, max_cooldown: float = MAX_OPEN_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_in(self) -> float:
+        """차단 해제(시험 호출 가능)까지 남은 시간 (초)"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def is_available(self) -> bool:
+        """호출 가능 여부 (상태를 바꾸지 않음, 체인 구성용)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.monotonic() >= self.opened_at + self.cooldown
+            return not self._probe_in_flight
+
+    def allow_request(self) -> bool:
+        """호출 허용 여부 (half-open에서는 시험 호출 한 건만 허용)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() < self.opened_at + self.cooldown:
+                    return False
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self._probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """
+        한도 초과/시간 초과/서버 오류 실패 기록
+
+        Returns:
+            이번 실패로 차단 상태가 되었는지 여부
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                # 시험 호출 실패: 쿨다운을 늘려 다시 차단
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            elif self.failures < self.failure_threshold:
+                return False
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+            return True
+
+    def release_probe(self):
+        """시험 호출이 판단 불가한 결과(일반 오류)로 끝난 경우 다음 시험 호출 허용"""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class ProviderHealth:
+    """프로바이더 하나의 서킷 브레이커 + 적응형 리미터 + 전역 백오프"""
+
+    def __init__(self, name: str, limits: Dict):
+        self.name = name
+        self.max_concurrency = limits['max_concurrency']
+        self.rate_limiter = AdaptiveRateLimiter(limits['min_interval'], limits['max_interval'])
+        self.breaker = CircuitBreaker()
+        self.backoff_until = 0.0
+        self._throttle_streak = 0
+        self._lock = threading.Lock()
+
+    def backoff_remaining(self) -> float:
+        return max(0.0, self.backoff_until - time.monotonic())
+
+    def is_available(self) -> bool:
+        """백오프 중이 아니고 서킷이 호출을 허용하는 상태인지 (상태를 바꾸지 않음)"""
+        return self.backoff_remaining() == 0 and self.breaker.is_available()
+
+    def retry_in(self) -> float:
+        """다시 호출할 수 있을 때까지 남은 시간 (초)"""
+        return max(self.breaker.retry_in(), self.backoff_remaining())
+
+    def allow_request(self) -> bool:
+        """호출 허용 여부 (half-open이면 시험 호출 슬롯을 예약)"""
+        return self.backoff_remaining() == 0 and self.breaker.allow_request()
+
+    def before_call(self):
+        """
+        호출 직전 확인, 차단 중이면 즉시 ProviderUnavailable 발생 (fail fast)
+        """
+        if not self.allow_request():
+            raise ProviderUnavailable(self.name, self.retry_in())
+
+    def record_success(self):
+        with self._lock:
+            self._throttle_streak = 0
+        self.breaker.record_success()
+        self.rate_limiter.on_success()
+
+    def record_failure(self, error: Exception):
+        """실패 원인에 따라 리미터 감속, 전역 백오프, 서킷 상태 갱신"""
+        if isinstance(error, ProviderUnavailable):
+            return
+
+        if is_throttled(error):
+            self.rate_limiter.on_throttle()
+            with self._lock:
+                self._throttle_streak += 1
+                delay = retry_after_seconds(error)
+                if delay is None:
+                    delay = BACKOFF_BASE * (2 ** (self._throttle_streak - 1))
+                delay = min(MAX_BACKOFF, delay)
+                self.backoff_until = max(self.backoff_until, time.monotonic() + delay)
+            logger.warning(f"{self.name} throttled, backing off {delay:.1f}s "
+                           f"(interval {self.rate_limiter.interval:.2f}s)")
+        elif not (is_timeout(error) or is_server_error(error)):
+            # 종목 없음 등 일반 오류는 프로바이더 상태와 무관
+            self.breaker.release_probe()
+            return
+
+        if self.breaker.record_failure():
+            logger.warning(f"{self.name} circuit opened for {self.breaker.cooldown:.0f}s")
+
+    def snapshot(self) -> Dict:
+        """상태 조회용 요약"""
+        return {
+            'state': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'retry_in': round(self.retry_in(), 1),
+            'interval': round(self.rate_limiter.interval, 3),
+        }
+
+
+_registry_lock = threading.Lock()
+_health: Dict[str, ProviderHealth] = {}
+
+
+def get_provider_health(provider: str) -> ProviderHealth:
+    """프로바이더별 상태 (프로세스 전역 공유)"""
+    with _registry_lock:
+        health = _health.get(provider)
+        if health is None:
+            health = ProviderHealth(provider, PROVIDER_LIMITS.get(provider, DEFAULT_LIMITS))
+            _health[provider] = health
+        return health
+
+
+def get_health_snapshot() -> Dict[str, Dict]:
+    """등록된 모든 프로바이더 상태"""
+    with _registry_lock:
+        providers = list(_health.values())
+    return {health.name: health.snapshot() for health in providers}
@@ -0,0 +1,256 @@
+"""
+프로세스 전역 시세 캐시
+- LRU 방식으로 최대 종목 수 제한
+- 미국 정규장 중에는 짧은 TTL, 장 마감 후에는 다음 개장 시각까지 유지
+- 같은 종목에 대한 동시 캐시 미스는 한 번만 조회 (single-flight)
+- 선택적으로 디스크 스냅샷을 남겨 컨테이너 재시작 후에도 재사용
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+import pytz
+
+logger = logging.getLogger(__name__)
+
+US_EASTERN = pytz.timezone('US/Eastern')
+MARKET_OPEN = (9, 30)
+MARKET_CLOSE = (16, 0)
+
+OPEN_MARKET_TTL = timedelta(minutes=5)  # 정규장 중 캐시 유지 시간
+DEFAULT_MAX_ENTRIES = 256
+SNAPSHOT_MIN_INTERVAL = 30  # 스냅샷 파일 최소 저장 간격 (초)
+
+
+def _session_bounds(day: datetime):
+    open_at = day.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    close_at = day.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    return open_at, close_at
+
+
+def is_us_market_open(now: Optional[datetime] = None) -> bool:
+    """미국 정규장 시간 여부 (공휴일은 고려하지 않음)"""
+    now = (now or datetime.now(pytz.utc)).astimezone(US_EASTERN)
+    if now.weekday() >= 5:
+        return False
+    open_at, close_at = _session_bounds(now)
+    return open_at <= now < close_at
+
+
+def next_market_open(now: Optional[datetime] = None) -> datetime:
+    """다음 미국 정규장 개장 시각 (US/Eastern, 공휴일은 고려하지 않음)"""
+    now = (now or datetime.now(pytz.utc)).astimezone(US_EASTERN)
+    day = now
+    while True:
+        open_at, _ = _session_bounds(day)
+        if day.weekday() < 5 and open_at > now:
+            return open_at
+        day = US_EASTERN.normalize(day + timedelta(days=1))
+
+
+def quote_expiry(now: Optional[datetime] = None) -> float:
+    """지금 조회한 시세의 만료 시각 (epoch 초)"""
+    now = now or datetime.now(pytz.utc)
+    if is_us_market_open(now):
+        return (now + OPEN_MARKET_TTL).timestamp()
+    return next_market_open(now).timestamp()
+
+
+class QuoteCache:
+    """시장 세션 기반 TTL을 사용하는 스레드 안전 LRU 시세 캐시"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, snapshot_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.snapshot_path = snapshot_path
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._last_snapshot = 0.0
+
+        if snapshot_path:
+            self._load_snapshot()
+
+    def get(self, ticker: str) -> Optional[Dict]:
+        """
+        유효한 캐시 항목 조회
+
+        Returns:
+            {'price', 'source', 'fetched_at', 'expires_at'} 또는 None
+        """
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is None:
+                return None
+            if entry['expires_at'] <= time.time():
+                del self._entries[ticker]
+                return None
+            self._entries.move_to_end(ticker)
+            return dict(entry)
+
+    def get_price(self, ticker: str) -> Optional[float]:
+        entry = self.get(ticker)
+        return entry['price'] if entry else None
+
+    def set(self, ticker: str, price: float, source: Optional[str] = None):
+        """시세 저장 (만료 시각은 현재 시장 세션 기준으로 계산)"""
+        with self._lock:
+            self._entries[ticker] = {
+                'price': float(price),
+                'source': source,
+                'fetched_at': time.time(),
+                'expires_at': quote_expiry(),
+            }
+            self._entries.move_to_end(ticker)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._maybe_save_snapshot()
+
+    def invalidate(self, ticker: Optional[str] = None):
+        """특정 종목 또는 전체 캐시 무효화"""
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(ticker, None)
+
+    def get_many_or_load(self, tickers: Iterable[str],
+                         loader: Callable[[List[str]], Dict[str, Dict]]) -> Dict[str, Dict]:
+        """
+        캐시 우선 조회, 미스만 loader로 한 번에 조회 (single-flight)
+
+        Args:
+            tickers: 조회할 티커들
+            loader: 미스 티커 리스트를 받아 {티커: {'price', 'source', ...}}를 반환하는 함수
+
+        Returns:
+            티커별 결과, 캐시 적중 항목에는 'cached': True 표시
+        """
+        results: Dict[str, Dict] = {}
+        owned: List[str] = []
+        waiting: Dict[str, threading.Event] = {}
+
+        for ticker in dict.fromkeys(tickers):
+            entry = self.get(ticker)
+            if entry is not None:
+                results[ticker] = self._as_quote(ticker, entry)
+                continue
+            with self._lock:
+                event = self._inflight.get(ticker)
+                if event is None:
+                    self._inflight[ticker] = threading.Event()
+                    owned.append(ticker)
+                else:
+                    waiting[ticker] = event
+
+        if owned:
+            try:
+                loaded = loader(owned)
+                for ticker, quote in loaded.items():
+                    if quote.get('price') is not None and quote['price'] > 0:
+                        self.set(ticker, quote['price'], quote.get('source'))
+                    results[ticker] = quote
+                self._maybe_save_snapshot(force=True)
+            finally:
+                with self._lock:
+                    for ticker in owned:
+                        event = self._inflight.pop(ticker, None)
+                        if event is not None:
+                            event.set()
+
+        # 다른 스레드가 조회 중인 종목은 결과를 기다렸다가 캐시에서 읽음
+        for ticker, event in waiting.items():
+            event.wait()
+            entry = self.get(ticker)
+            if entry is not None:
+                results[ticker] = self._as_quote(ticker, entry)
+            else:
+                retry = self.get_many_or_load([ticker], loader)
+                results.update(retry)
+
+        return results
+
+    def get_or_load(self, ticker: str, loader: Callable[[str], Optional[float]],
+                    source: Optional[str] = None) -> Optional[float]:
+        """단일 종목 캐시 우선 조회 (single-flight)"""
+        def load_one(missing):
+            price = loader(missing[0])
+            return {missing[0]: {'ticker': missing[0], 'price': price, 'source': source}}
+
+        return self.get_many_or_load([ticker], load_one).get(ticker, {}).get('price')
+
+    @staticmethod
+    def _as_quote(ticker: str, entry: Dict) -> Dict:
+        return {
+            'ticker': ticker,
+            'price': entry['price'],
+            'source': entry['source'],
+            'latency_ms': 0.0,
+            'error': None,
+            'cached': True,
+            'fetched_at': entry['fetched_at'],
+        }
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Quote cache snapshot load failed: {e}")
+            return
+
+        now = time.time()
+        with self._lock:
+            for ticker, entry in data.get('entries', {}).items():
+                if entry.get('expires_at', 0) > now and entry.get('price'):
+                    self._entries[ticker] = entry
+        logger.info(f"Quote cache restored {len(self._entries)} entries from {self.snapshot_path}")
+
+    def _maybe_save_snapshot(self, force: bool = False):
+        if not self.snapshot_path:
+            return
+        now = time.time()
+        if not force and now - self._last_snapshot < SNAPSHOT_MIN_INTERVAL:
+            return
+        self._last_snapshot = now
+        self.save_snapshot()
+
+    def save_snapshot(self):
+        """현재 캐시를 스냅샷 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            data = {'saved_at': time.time(), 'entries': dict(self._entries)}
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"Quote cache snapshot save failed: {e}")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_quote_cache() -> QuoteCache:
+    """프로세스 전역 시세 캐시 (QUOTE_CACHE_SNAPSHOT 환경 변수로 스냅샷 경로 지정)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            import atexit
+
+            _cache = QuoteCache(
+                max_entries=int(os.environ.get('QUOTE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+                snapshot_path=os.environ.get('QUOTE_CACHE_SNAPSHOT') or None,
+            )
+            atexit.register(_cache.save_snapshot)
+        return _cache
@@ -0,0 +1,581 @@
+"""
+시세 조회 라우터
+Toss, Finnhub, yfinance, Yahoo 직접 호출을 하나의 프로바이더 체인으로 묶고,
+우선 프로바이더가 지연 예산(p95) 안에 응답하지 않으면 다음 프로바이더를 병행 호출(hedging)하여
+먼저 도착한 유효 가격을 사용합니다.
+서킷이 열렸거나 백오프 중인 프로바이더는 체인에서 제외하여 정상 프로바이더로 바로 넘어갑니다.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .provider_health import (
+    DEFAULT_LIMITS, PROVIDER_LIMITS, ProviderHealth, ProviderUnavailable,
+    get_provider_health, is_throttled, is_timeout,
+)
+from .quote_cache import get_quote_cache
+
+logger = logging.getLogger(__name__)
+
+BROWSER_USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+DIRECT_API_TIMEOUT = 20
+BULK_DOWNLOAD_THREADS = 4  # yf.download 종목별 동시 요청 수 상한
+ROUTER_TOTAL_TIMEOUT = 15.0  # 종목 하나에 허용하는 최대 대기 시간 (초)
+
+
+class ProviderGate:
+    """
+    프로바이더 하나의 동시성 세마포어 + 상태(서킷 브레이커, 적응형 리미터, 전역 백오프) 묶음
+
+    차단 중이면 진입 즉시 ProviderUnavailable을 발생시키고, 호출 결과는 자동으로 상태에 기록
+    """
+
+    def __init__(self, health: ProviderHealth):
+        self.name = health.name
+        self.health = health
+        self.max_concurrency = health.max_concurrency
+        self._semaphore = threading.BoundedSemaphore(health.max_concurrency)
+
+    def __enter__(self):
+        self.health.before_call()
+        self._semaphore.acquire()
+        self.health.rate_limiter.acquire()
+        # 대기하는 동안 다른 호출이 한도 초과를 받았다면 요청하지 않고 바로 실패
+        remaining = self.health.backoff_remaining()
+        if remaining > 0:
+            self._semaphore.release()
+            self.health.breaker.release_probe()
+            raise ProviderUnavailable(self.name, remaining)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        if exc is None:
+            self.health.record_success()
+        else:
+            self.health.record_failure(exc)
+        return False
+
+
+_registry_lock = threading.Lock()
+_gates: Dict[str, ProviderGate] = {}
+_sessions: Dict[str, requests.Session] = {}
+
+
+def get_provider_gate(provider: str) -> ProviderGate:
+    """프로바이더별 게이트 (프로세스 전역 공유)"""
+    with _registry_lock:
+        gate = _gates.get(provider)
+        if gate is None:
+            gate = ProviderGate(get_provider_health(provider))
+            _gates[provider] = gate
+        return gate
+
+
+def get_session(provider: str) -> requests.Session:
+    """프로바이더별 keep-alive 커넥션 풀 세션 (프로세스 전역 공유)"""
+    with _registry_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            limits = PROVIDER_LIMITS.get(provider, DEFAULT_LIMITS)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(limits['max_concurrency'], 4))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            # Docker 환경에서 User-Agent 설정이 중요함
+            session.headers.update({
+                'User-Agent': BROWSER_USER_AGENT,
+                'Accept': 'application/json,text/html;q=0.9,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'DNT': '1',
+                'Connection': 'keep-alive',
+            })
+            _sessions[provider] = session
+        return session
+
+
+def describe_failure(error: Optional[Exception]) -> str:
+    """실패 원인을 사용자 표시용 문자열로 변환"""
+    if error is None:
+        return '가격 조회 실패'
+    if isinstance(error, ProviderUnavailable):
+        return '프로바이더 일시 차단'
+    if is_throttled(error):
+        return '요청 한도 초과'
+    if is_timeout(error):
+        return '응답 시간 초과'
+    return f"{str(error)[:50]}..."
+
+
+def fetch_direct_yahoo_price(ticker: str, session: Optional[requests.Session] = None) -> Optional[float]:
+    """Yahoo Finance API 직접 호출 (Docker 환경용)"""
+    session = session or get_session('yahoo')
+
+    # 여러 Yahoo Finance API 엔드포인트 시도
+    endpoints = [
+        f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}",
+        f"https://query2.finance.yahoo.com/v8/finance/chart/{ticker}",
+        f"https://query1.finance.yahoo.com/v10/finance/quoteSummary/{ticker}?modules=price,summaryDetail"
+    ]
+
+    for url in endpoints:
+        try:
+            logger.info(f"Trying direct API: {url}")
+            response = session.get(url, timeout=DIRECT_API_TIMEOUT)
+
+            if response.status_code == 200:
+                data = response.json()
+
+                # chart API 응답 처리
+                if 'chart' in data and 'result' in data['chart'] and data['chart']['result']:
+                    result = data['chart']['result'][0]
+                    if 'meta' in result:
+                        # 현재가 필드들 시도
+                        price_fields = ['regularMarketPrice', 'currentPrice', 'price', 'previousClose']
+                        for field in price_fields:
+                            if field in result['meta'] and result['meta'][field] is not None:
+                                price = float(result['meta'][field])
+                                logger.info(f"Found {field} for {ticker}: ${price:.3f}")
+                                return price
+
+                # quoteSummary API 응답 처리
+                if 'quoteSummary' in data and 'result' in data['quoteSummary'] and data['quoteSummary']['result']:
+                    result = data['quoteSummary']['result'][0]
+                    if 'price' in result and 'regularMarketPrice' in result['price']:
+                        price_info = result['price']['regularMarketPrice']
+                        if isinstance(price_info, dict) and 'raw' in price_info:
+                            price = float(price_info['raw'])
+                            logger.info(f"Found quoteSummary price for {ticker}: ${price:.3f}")
+                            return price
+                        elif isinstance(price_info, (int, float)):
+                            price = float(price_info)
+                            logger.info(f"Found direct price for {ticker}: ${price:.3f}")
+                            return price
+
+            elif response.status_code == 429:
+                raise requests.HTTPError(f"429 Too Many Requests for {url}", response=response)
+            else:
+                logger.warning(f"HTTP {response.status_code} for {url}")
+
+        except requests.HTTPError:
+            raise
+        except Exception as e:
+            logger.warning(f"Direct API error for {url}: {e}")
+            continue
+
+    logger.error(f"All direct API endpoints failed for {ticker}")
+    return None
+
+
+def fetch_yfinance_price(ticker: str, session: Optional[requests.Session] = None) -> Optional[float]:
+    """yfinance history로 최근 종가 조회 (1일 → 5일 순서)"""
+    import yfinance as yf
+
+    ticker_obj = yf.Ticker(ticker, session=session or get_session('yahoo'))
+
+    for period in ("1d", "5d"):
+        hist = ticker_obj.history(period=period, interval="1d")
+        if not hist.empty and 'Close' in hist.columns:
+            price = float(hist['Close'].iloc[-1])
+            logger.info(f"Got price for {ticker} ({period}): ${price:.3f}")
+            return price
+    return None
+
+
+def fetch_yfinance_bulk(tickers: List[str], session: Optional[requests.Session] = None) -> Dict[str, float]:
+    """
+    여러 종목의 최근 종가를 yf.download 한 번으로 조회
+
+    5일 일봉 종가 표를 받아 종목별로 forward-fill한 뒤 마지막 행을 취하므로
+    당일 데이터가 비어 있는 종목도 직전 유효 종가를 사용함
+
+    Returns:
+        {티커: 종가}, 결과에 없는 종목은 제외 (호출자가 종목별로 fallback)
+
+    Raises:
+        requests.HTTPError: 요청한 종목이 모두 누락된 경우 (빈 표 또는 종가가 전부 NaN)
+    """
+    import yfinance as yf
+    import pandas as pd
+
+    if not tickers:
+        return {}
+
+    data = yf.download(
+        tickers, period='5d', interval='1d', group_by='column', auto_adjust=False,
+        progress=False, threads=min(BULK_DOWNLOAD_THREADS, len(tickers)),
+        session=session or get_session('yahoo'), timeout=DIRECT_API_TIMEOUT,
+    )
+
+    prices: Dict[str, float] = {}
+    missing = list(tickers)
+    if not data.empty and 'Close' in data.columns.get_level_values(0):
+        closes = data['Close']
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(name=tickers[0])
+        # yf.download는 종목별 오류를 삼키고 해당 종목 열을 NaN으로 채우므로 종가가 모두 NaN인 열을 누락으로 간주
+        missing = [str(ticker) for ticker in tickers if ticker not in closes.columns or closes[ticker].isna().all()]
+        last_closes = closes.ffill().iloc[-1]
+        last_closes = last_closes[last_closes > 0]  # NaN(결과 없음)도 함께 제외됨
+        prices = {str(ticker): float(price) for ticker, price in last_closes.items()}
+
+    if missing:
+        logger.warning(f"yfinance bulk download returned no closes for: {', '.join(missing)}")
+    if not prices:
+        # 한도 초과 시에도 yf.download는 예외 없이 빈 표(또는 전부 NaN)를 돌려주므로,
+        # 요청한 종목이 모두 누락되면 한도 초과로 보고 게이트에 실패로 기록 (전역 백오프 + 서킷 카운트)
+        raise requests.HTTPError(f"429 Too Many Requests (yfinance bulk download returned no closes for {len(tickers)} tickers)")
+    logger.info(f"yfinance bulk download: {len(prices)}/{len(tickers)} tickers")
+    return prices
+
+
+class LatencyTracker:
+    """최근 응답 시간으로 p95 지연 예산을 추정"""
+
+    def __init__(self, default_budget: float, min_budget: float, max_budget: float, window: int = 50):
+        self.default_budget = default_budget
+        self.min_budget = min_budget
+        self.max_budget = max_budget
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        with self._lock:
+            self._samples.append(latency)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < 5:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def budget(self) -> float:
+        """다음 프로바이더를 병행 호출하기 전까지 기다릴 시간 (초)"""
+        p95 = self.p95()
+        if p95 is None:
+            return self.default_budget
+        return min(self.max_budget, max(self.min_budget, p95))
+
+
+class QuoteProvider:
+    """시세 프로바이더 기본 클래스"""
+
+    name = ''
+    gate_name = ''
+    default_budget = 2.0
+    min_budget = 0.3
+    max_budget = 8.0
+
+    def __init__(self):
+        self.latency = LatencyTracker(self.default_budget, self.min_budget, self.max_budget)
+
+    def supports(self, ticker: str) -> bool:
+        return True
+
+    @property
+    def health(self) -> ProviderHealth:
+        return get_provider_health(self.gate_name or self.name)
+
+    def fetch(self, ticker: str) -> Optional[float]:
+        raise NotImplementedError
+
+    def fetch_many(self, tickers: List[str]) -> Optional[Dict[str, float]]:
+        """다중 종목 일괄 조회 (지원하지 않는 프로바이더는 None)"""
+        return None
+
+
+class TossProvider(QuoteProvider):
+    """토스 증권 API (tickers.py 매핑이 있는 종목만, 다중 종목 일괄 조회 지원)"""
+
+    name = 'toss'
+    gate_name = 'toss'
+    default_budget = 1.0
+
+    def __init__(self):
+        super().__init__()
+        from .toss_api.service import TossStockService
+        self.service = TossStockService(rate_limit_delay=0.1)
+
+    def supports(self, ticker: str) -> bool:
+        from .toss_api.tickers import tickers
+        return ticker in tickers
+
+    def fetch(self, ticker: str) -> Optional[float]:
+        return self.fetch_many([ticker]).get(ticker)
+
+    def fetch_many(self, tickers: List[str]) -> Optional[Dict[str, float]]:
+        # 웹/스케줄러 스레드 모두 공유 이벤트 루프의 aiohttp 커넥션 풀로 청크를 동시에 요청
+        from .toss_api.async_client import run_sync
+        symbols = [t for t in tickers if self.supports(t)]
+        return run_sync(self.service.get_current_prices_by_ticker_async(symbols), timeout=DIRECT_API_TIMEOUT)
+
+
+class FinnhubProvider(QuoteProvider):
+    """Finnhub quote API (FINNHUB_API 키가 설정된 경우만)"""
+
+    name = 'finnhub'
+    gate_name = 'finnhub'
+    default_budget = 1.5
+
+    def __init__(self):
+        super().__init__()
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def supports(self, ticker: str) -> bool:
+        return bool(os.getenv('FINNHUB_API'))
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                import finnhub
+                self._client = finnhub.Client(api_key=os.getenv('FINNHUB_API'))
+            return self._client
+
+    def fetch(self, ticker: str) -> Optional[float]:
+        quote = self._get_client().quote(ticker)
+        current_price = quote.get('c')
+        if current_price and current_price > 0:
+            return float(current_price)
+        return None
+
+
+class YFinanceProvider(QuoteProvider):
+    """yfinance history (1일 → 5일), 다중 종목은 yf.download 한 번으로 일괄 조회"""
+
+    name = 'yfinance'
+    gate_name = 'yahoo'
+    default_budget = 3.0
+
+    def fetch(self, ticker: str) -> Optional[float]:
+        return fetch_yfinance_price(ticker)
+
+    def fetch_many(self, tickers: List[str]) -> Optional[Dict[str, float]]:
+        return fetch_yfinance_bulk(tickers)
+
+
+class DirectYahooProvider(QuoteProvider):
+    """Yahoo Finance chart/quoteSummary 직접 호출"""
+
+    name = 'yahoo_direct'
+    gate_name = 'yahoo'
+    default_budget = 3.0
+
+    def fetch(self, ticker: str) -> Optional[float]:
+        return fetch_direct_yahoo_price(ticker)
+
+
+class QuoteRouter:
+    """우선순위 프로바이더 체인 + 지연 예산 기반 hedged 요청"""
+
+    def __init__(self, providers: List[QuoteProvider], total_timeout: float = ROUTER_TOTAL_TIMEOUT,
+                 max_workers: int = 16):
+        self.providers = providers
+        self.total_timeout = total_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='quote-hedge')
+
+    def get_provider(self, name: str) -> Optional[QuoteProvider]:
+        for provider in self.providers:
+            if provider.name == name:
+                return provider
+        return None
+
+    def _call_provider(self, provider: QuoteProvider, ticker: str) -> Optional[float]:
+        started = time.monotonic()
+        try:
+            with get_provider_gate(provider.gate_name or provider.name):
+                call_started = time.monotonic()
+                price = provider.fetch(ticker)
+            # 게이트 대기 시간을 제외한 순수 응답 시간만 예산 추정에 사용
+            provider.latency.record(time.monotonic() - call_started)
+            return price
+        except Exception:
+            provider.latency.record(time.monotonic() - started)
+            raise
+
+    def get_quote(self, ticker: str, exclude: Iterable[str] = ()) -> Dict:
+        """
+        단일 종목 시세 조회
+
+        Args:
+            ticker: 종목 티커
+            exclude: 건너뛸 프로바이더 이름 (이미 일괄 조회로 가격을 받은 프로바이더 등)
+
+        Returns:
+            {'ticker', 'price', 'source', 'latency_ms', 'error', 'fetched_at'?}
+        """
+        excluded = set(exclude)
+        supported = [p for p in self.providers if p.name not in excluded and p.supports(ticker)]
+        chain = [p for p in supported if p.health.is_available()]
+        started = time.monotonic()
+        deadline = started + self.total_timeout
+
+        pending = {}
+        next_index = 0
+        last_launch = started
+        last_provider = None
+        last_error = None
+
+        if supported and not chain:
+            # 지원 프로바이더가 모두 차단 중이면 기다리지 않고 바로 실패
+            retry_in = min(p.health.retry_in() for p in supported)
+            last_error = ProviderUnavailable(', '.join(p.name for p in supported), retry_in)
+
+        def launch():
+            nonlocal next_index, last_launch, last_provider
+            last_provider = chain[next_index]
+            next_index += 1
+            last_launch = time.monotonic()
+            pending[self._executor.submit(self._call_provider, last_provider, ticker)] = last_provider
+
+        while chain:
+            if not pending:
+                if next_index >= len(chain):
+                    break
+                launch()
+
+            now = time.monotonic()
+            if now >= deadline:
+                last_error = TimeoutError(f"{ticker}: {self.total_timeout:g}s 내 응답 없음")
+                break
+
+            if next_index < len(chain):
+                # 마지막으로 호출한 프로바이더의 예산이 지나면 다음 프로바이더 병행 호출
+                hedge_at = last_launch + last_provider.latency.budget()
+                timeout = max(0.0, min(hedge_at, deadline) - now)
+            else:
+                timeout = deadline - now
+
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    price = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"{provider.name} failed for {ticker}: {e}")
+                    continue
+                if price is not None and price > 0:
+                    return {
+                        'ticker': ticker,
+                        'price': float(price),
+                        'source': provider.name,
+                        'latency_ms': round((time.monotonic() - started) * 1000, 1),
+                        'error': None,
+                        'fetched_at': time.time(),
+                    }
+
+            if not done and next_index < len(chain):
+                logger.info(f"{ticker}: hedging to {chain[next_index].name} after "
+                            f"{time.monotonic() - last_launch:.2f}s")
+                launch()
+
+        return {
+            'ticker': ticker,
+            'price': None,
+            'source': None,
+            'latency_ms': round((time.monotonic() - started) * 1000, 1),
+            'error': last_error,
+        }
+
+    def get_quotes(self, tickers: List[str], max_workers: int = 8, use_cache: bool = True) -> Dict[str, Dict]:
+        """
+        여러 종목 시세 조회
+        프로세스 전역 시세 캐시를 먼저 확인하고, 미스만 실제 프로바이더로 조회
+
+        Args:
+            tickers: 종목 티커 리스트
+            max_workers: 종목별 hedged 조회 스레드 수
+            use_cache: False면 캐시를 건너뛰고 항상 새로 조회 (조회 결과는 캐시에 저장)
+
+        Returns:
+            티커별 get_quote 결과 (캐시 적중 시 'cached': True)
+        """
+        cache = get_quote_cache()
+        if use_cache:
+            return cache.get_many_or_load(tickers, lambda missing: self._load_quotes(missing, max_workers))
+
+        results = self._load_quotes(list(dict.fromkeys(tickers)), max_workers)
+        for ticker, quote in results.items():
+            if quote.get('price'):
+                cache.set(ticker, quote['price'], quote.get('source'))
+        return results
+
+    def _load_quotes(self, tickers: List[str], max_workers: int) -> Dict[str, Dict]:
+        """
+        일괄 조회를 지원하는 프로바이더(Toss → yfinance bulk download) 순서로 먼저 한 번에 조회하고,
+        누락된 종목만 종목별 hedged 조회로 병렬 처리
+        """
+        unique_tickers = list(dict.fromkeys(tickers))
+        results: Dict[str, Dict] = {}
+        batch_tried = []
+
+        for provider in self.providers:
+            candidates = [t for t in unique_tickers if t not in results and provider.supports(t)]
+            if not candidates or not provider.health.is_available():
+                continue
+            started = time.monotonic()
+            try:
+                with get_provider_gate(provider.gate_name or provider.name):
+                    prices = provider.fetch_many(candidates)
+            except Exception as e:
+                logger.warning(f"{provider.name} batch quote failed: {e}")
+                continue
+            if not prices:
+                continue  # 일괄 조회 미지원 또는 결과 없음
+
+            # 가격을 돌려준 프로바이더만 종목별 조회에서 제외 (실패했거나 빈 결과인 프로바이더는 상태가 허용하면 종목별로 다시 시도)
+            batch_tried.append(provider.name)
+            latency_ms = round((time.monotonic() - started) * 1000, 1)
+            provider.latency.record(latency_ms / 1000)
+            for ticker, price in prices.items():
+                if price is not None and price > 0:
+                    results[ticker] = {
+                        'ticker': ticker,
+                        'price': float(price),
+                        'source': provider.name,
+                        'latency_ms': latency_ms,
+                        'error': None,
+                        'fetched_at': time.time(),
+                    }
+
+        misses = [t for t in unique_tickers if t not in results]
+        if misses:
+            workers = max(1, min(max_workers, len(misses)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='quote-router') as executor:
+                for quote in executor.map(lambda t: self.get_quote(t, exclude=batch_tried), misses):
+                    results[quote['ticker']] = quote
+        return results
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_quote_router() -> QuoteRouter:
+    """프로세스 전역 시세 라우터"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = QuoteRouter([
+                TossProvider(),
+                FinnhubProvider(),
+                YFinanceProvider(),
+                DirectYahooProvider(),
+            ])
+        return _router
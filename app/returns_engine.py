@@ -0,0 +1,324 @@
+"""
+현금흐름 시점을 반영한 수익률 엔진
+- XIRR (금액가중 수익률): 매수(-), 매도(+), 배당금(+), 현재 평가액(+) 현금흐름의 연환산 내부수익률
+- TWR (시간가중 수익률): 거래/배당일마다 구간 수익률 (기말 평가 + 배당 - 순투입) / 기초 평가를 연결한 누적 수익률
+
+모든 종목과 포트폴리오 전체(PORTFOLIO_KEY)를 한 번에 계산합니다.
+XIRR은 종목별 현금흐름 배열 전체에 대해 Newton 반복을 벡터 연산으로 동시에 수행하고,
+수렴하지 않은 종목만 이분법으로 다시 풉니다.
+
+결과는 (거래, 배당금, 보유 현황) 데이터 버전과 평가일 기준으로 캐시됩니다.
+버전이 바뀌어도 현금흐름이 그대로인 종목은 이전 해를 재사용하고, 바뀐 종목은 이전 해에서 시작(warm start)하므로
+거래 한 건 추가 후 재계산은 해당 종목(과 포트폴리오)의 짧은 Newton 반복만 수행합니다.
+"""
+
+import logging
+import threading
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sqlalchemy import select
+
+from .models import Dividend, Holding, Transaction, db
+from .data_versions import PENDING_TABLES_KEY, data_version
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_KEY = '*'  # 포트폴리오 전체
+DAYS_PER_YEAR = 365.0
+
+NEWTON_MAX_ITERATIONS = 50
+BISECTION_ITERATIONS = 200
+RATE_TOLERANCE = 1e-10
+RATE_BOUNDS = (-0.9999, 1000.0)  # 연 -99.99% ~ +100,000%
+DEFAULT_GUESS = 0.1
+
+PENDING_TRACKED_TABLES = {'transactions', 'dividends', 'holdings'}
+
+
+def load_cash_flows() -> pd.DataFrame:
+    """
+    거래/배당금 현금흐름 (종목, 날짜순)
+
+    Returns:
+        columns: ticker, date (ordinal), kind ('BUY'/'SELL'/'DIV'), shares (부호 포함), price, amount (투자자 기준 부호)
+    """
+    transactions = db.session.execute(
+        select(Transaction.ticker, Transaction.date, Transaction.type, Transaction.shares,
+               Transaction.price_per_share, Transaction.amount)
+        .order_by(Transaction.ticker, Transaction.date, Transaction.transaction_id)
+    ).all()
+    dividends = db.session.execute(
+        select(Dividend.ticker, Dividend.date, Dividend.amount)
+        .order_by(Dividend.ticker, Dividend.date, Dividend.dividend_id)
+    ).all()
+
+    records = []
+    for row in transactions:
+        kind = row.type.upper()
+        if kind not in ('BUY', 'SELL'):
+            continue
+        shares = abs(float(row.shares))
+        amount = abs(float(row.amount))
+        sign = 1 if kind == 'BUY' else -1
+        records.append((row.ticker, row.date.toordinal(), kind, sign * shares,
+                        float(row.price_per_share), -sign * amount))
+    for row in dividends:
+        records.append((row.ticker, row.date.toordinal(), 'DIV', 0.0, np.nan, float(row.amount)))
+
+    frame = pd.DataFrame.from_records(records, columns=['ticker', 'date', 'kind', 'shares', 'price', 'amount'])
+    # 같은 날은 거래 다음 배당 순서 (정렬 안정성 유지)
+    return frame.sort_values(['ticker', 'date'], kind='stable').reset_index(drop=True)
+
+
+def _npv(groups: np.ndarray, times: np.ndarray, flows: np.ndarray, rates: np.ndarray,
+         group_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """그룹별 순현재가치와 도함수"""
+    base = 1.0 + rates[groups]
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        discounted = flows * base ** (-times)
+        value = np.bincount(groups, weights=discounted, minlength=group_count)
+        derivative = np.bincount(groups, weights=-times * discounted / base, minlength=group_count)
+    return value, derivative
+
+
+def solve_xirr(groups: np.ndarray, times: np.ndarray, flows: np.ndarray, group_count: int,
+               guess: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int]:
+    """
+    여러 현금흐름 그룹의 XIRR을 동시에 계산
+
+    Args:
+        groups: 현금흐름별 그룹 번호 (0 ~ group_count-1)
+        times: 그룹 첫 현금흐름 기준 경과 연수
+        flows: 현금흐름 (유입 +, 유출 -)
+        guess: 그룹별 초기값 (이전 해 사용 시 warm start)
+
+    Returns:
+        (그룹별 연환산 수익률 (해가 없으면 NaN), Newton 반복 횟수)
+    """
+    lower, upper = RATE_BOUNDS
+    has_inflow = np.bincount(groups, weights=(flows > 0).astype(float), minlength=group_count) > 0
+    has_outflow = np.bincount(groups, weights=(flows < 0).astype(float), minlength=group_count) > 0
+    solvable = has_inflow & has_outflow
+
+    rates = np.full(group_count, DEFAULT_GUESS) if guess is None else np.where(np.isfinite(guess), guess, DEFAULT_GUESS)
+    rates = np.clip(rates, lower, upper)
+    converged = ~solvable
+
+    iterations = 0
+    for iterations in range(1, NEWTON_MAX_ITERATIONS + 1):
+        value, derivative = _npv(groups, times, flows, rates, group_count)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            step = np.where(converged | (derivative == 0), 0.0, value / derivative)
+        step = np.where(np.isfinite(step), step, 0.0)
+        updated = np.clip(rates - step, lower, upper)
+        converged |= np.abs(updated - rates) < RATE_TOLERANCE
+        rates = updated
+        if converged.all():
+            break
+
+    # 수렴하지 않았거나 해가 아닌 그룹은 이분법으로 다시 계산
+    value, _ = _npv(groups, times, flows, rates, group_count)
+    scale = np.bincount(groups, weights=np.abs(flows), minlength=group_count)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        residual = np.abs(value) / np.where(scale > 0, scale, 1.0)
+    retry = solvable & ~(np.isfinite(residual) & (residual < 1e-8) & converged)
+    if retry.any():
+        rates = np.where(retry, _bisect(groups, times, flows, group_count, retry), rates)
+
+    return np.where(solvable, rates, np.nan), iterations
+
+
+def _bisect(groups: np.ndarray, times: np.ndarray, flows: np.ndarray, group_count: int,
+            mask: np.ndarray) -> np.ndarray:
+    """구간 [하한, 상한]에서 부호가 바뀌는 그룹만 이분법으로 계산 (나머지는 NaN)"""
+    low = np.full(group_count, RATE_BOUNDS[0])
+    high = np.full(group_count, RATE_BOUNDS[1])
+    low_value, _ = _npv(groups, times, flows, low, group_count)
+    high_value, _ = _npv(groups, times, flows, high, group_count)
+    bracketed = mask & np.isfinite(low_value) & np.isfinite(high_value) & (np.sign(low_value) != np.sign(high_value))
+
+    for _ in range(BISECTION_ITERATIONS):
+        middle = (low + high) / 2
+        middle_value, _ = _npv(groups, times, flows, middle, group_count)
+        same_side = np.sign(middle_value) == np.sign(low_value)
+        low = np.where(same_side, middle, low)
+        low_value = np.where(same_side, middle_value, low_value)
+        high = np.where(same_side, high, middle)
+    return np.where(bracketed, (low + high) / 2, np.nan)
+
+
+def _terminal_values(holdings, valuation_ordinal: int) -> pd.DataFrame:
+    return pd.DataFrame.from_records(
+        [(ticker, valuation_ordinal, 'VALUE', 0.0, price, shares * price) for ticker, shares, price in holdings],
+        columns=['ticker', 'date', 'kind', 'shares', 'price', 'amount'],
+    )
+
+
+def xirr_flows(frame: pd.DataFrame, terminal: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, list]:
+    """
+    종목별 + 포트폴리오 전체 현금흐름을 한 배열로 구성
+
+    Returns:
+        (groups, times, flows, keys) — keys[group] = 종목 또는 PORTFOLIO_KEY
+    """
+    flows = pd.concat([frame, terminal], ignore_index=True)
+    keys = sorted(flows['ticker'].unique())
+    codes = pd.Categorical(flows['ticker'], categories=keys).codes.astype(np.int64)
+    portfolio_code = len(keys)
+
+    groups = np.concatenate([codes, np.full(len(flows), portfolio_code, dtype=np.int64)])
+    dates = np.concatenate([flows['date'].to_numpy(), flows['date'].to_numpy()]).astype(np.float64)
+    amounts = np.concatenate([flows['amount'].to_numpy(), flows['amount'].to_numpy()]).astype(np.float64)
+
+    first_dates = np.full(portfolio_code + 1, np.inf)
+    np.minimum.at(first_dates, groups, dates)
+    times = (dates - first_dates[groups]) / DAYS_PER_YEAR
+    return groups, times, amounts, keys + [PORTFOLIO_KEY]
+
+
+def time_weighted_returns(frame: pd.DataFrame, terminal: pd.DataFrame) -> Dict[str, float]:
+    """
+    종목별/포트폴리오 시간가중 수익률 (현금흐름이 있는 날마다 구간을 나눠 연결)
+
+    구간 수익률 = (당일 기말 평가 + 당일 배당 - 당일 순투입) / 전 구간 기말 평가
+    평가 가격은 해당 종목의 마지막 체결가(거래 단가)를 이어 쓰고, 평가일에는 현재가를 사용
+    """
+    if frame.empty:
+        return {}
+    events = pd.concat([frame, terminal], ignore_index=True)
+    is_trade = events['kind'].isin(['BUY', 'SELL'])
+    events = events.assign(
+        flow=np.where(is_trade, -events['amount'], 0.0),  # 순투입 (매수 +, 매도 -)
+        dividend=np.where(events['kind'] == 'DIV', events['amount'], 0.0),
+    )
+    daily = (events.groupby(['ticker', 'date'], sort=True)
+             .agg(shares=('shares', 'sum'), price=('price', 'last'), flow=('flow', 'sum'), dividend=('dividend', 'sum'))
+             .reset_index())
+    daily['shares'] = daily.groupby('ticker')['shares'].cumsum()
+    daily['price'] = daily.groupby('ticker')['price'].ffill()
+
+    results = {}
+
+    # 종목별
+    value = (daily['shares'] * daily['price']).fillna(0.0)
+    previous = value.groupby(daily['ticker']).shift(1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        period = (value + daily['dividend'] - daily['flow']) / previous
+    period = period.where(previous > 0, 1.0)
+    for ticker, growth in period.groupby(daily['ticker']).prod().items():
+        results[ticker] = float(growth - 1)
+
+    # 포트폴리오: 날짜 × 종목 표로 펼쳐 보유 수량/가격을 이어 쓴 뒤 합산
+    shares = daily.pivot(index='date', columns='ticker', values='shares').ffill().fillna(0.0)
+    prices = daily.pivot(index='date', columns='ticker', values='price').ffill().fillna(0.0)
+    portfolio_value = (shares * prices).sum(axis=1)
+    totals = daily.groupby('date')[['flow', 'dividend']].sum()
+    portfolio_previous = portfolio_value.shift(1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        portfolio_period = (portfolio_value + totals['dividend'] - totals['flow']) / portfolio_previous
+    portfolio_period = portfolio_period.where(portfolio_previous > 0, 1.0)
+    results[PORTFOLIO_KEY] = float(portfolio_period.prod() - 1)
+    return results
+
+
+class ReturnsCache:
+    """데이터 버전/평가일별 수익률 결과 캐시 + XIRR warm start 상태"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._result: Optional[Dict] = None
+        self._solutions: Dict[str, Tuple[tuple, float]] = {}  # key → (현금흐름 서명, 해)
+        self._flows_version = None
+        self._flows: Optional[pd.DataFrame] = None
+
+    def get(self, valuation_date: Optional[date] = None) -> Dict:
+        valuation_date = valuation_date or date.today()
+        key = (data_version('transactions', 'dividends', 'holdings'), valuation_date)
+        with self._lock:
+            if key == self._key:
+                return self._result
+            result = self._compute(valuation_date)
+            # 커밋 전 변경이 반영된 결과는 캐시하지 않음
+            if not PENDING_TRACKED_TABLES & db.session.info.get(PENDING_TABLES_KEY, set()):
+                self._result, self._key = result, key
+            return result
+
+    def _cash_flows(self) -> pd.DataFrame:
+        version = data_version('transactions', 'dividends')
+        if version == self._flows_version:
+            return self._flows
+        flows = load_cash_flows()
+        if not {'transactions', 'dividends'} & db.session.info.get(PENDING_TABLES_KEY, set()):
+            self._flows, self._flows_version = flows, version
+        return flows
+
+    def _compute(self, valuation_date: date) -> Dict:
+        frame = self._cash_flows()
+        holdings = [
+            (row.ticker, float(row.current_shares), float(row.current_market_price))
+            for row in db.session.execute(
+                select(Holding.ticker, Holding.current_shares, Holding.current_market_price)
+                .where(Holding.current_shares > 0)
+            )
+        ]
+        terminal = _terminal_values(holdings, valuation_date.toordinal())
+        if frame.empty:
+            return {'as_of': valuation_date.isoformat(), 'portfolio': {'xirr': None, 'twr': None}, 'tickers': {}}
+
+        groups, times, flows, keys = xirr_flows(frame, terminal)
+        group_count = len(keys)
+
+        # 현금흐름 서명 (건수, 합계, 시간 가중합)이 이전과 같은 그룹은 이전 해 재사용
+        signatures = list(zip(
+            np.bincount(groups, minlength=group_count).tolist(),
+            np.round(np.bincount(groups, weights=flows, minlength=group_count), 8).tolist(),
+            np.round(np.bincount(groups, weights=flows * times, minlength=group_count), 8).tolist(),
+        ))
+        previous = [self._solutions.get(key) for key in keys]
+        reuse = np.array([p is not None and p[0] == signature for p, signature in zip(previous, signatures)])
+        guess = np.array([p[1] if p is not None else np.nan for p in previous])
+
+        rates = guess.copy()
+        iterations = 0
+        if not reuse.all():
+            solve_mask = np.isin(groups, np.flatnonzero(~reuse))
+            # 다시 풀 그룹만 남기고 번호를 0부터 다시 매김
+            targets = np.flatnonzero(~reuse)
+            remap = np.full(group_count, -1, dtype=np.int64)
+            remap[targets] = np.arange(len(targets))
+            solved, iterations = solve_xirr(remap[groups[solve_mask]], times[solve_mask], flows[solve_mask],
+                                            len(targets), guess[targets])
+            rates[targets] = solved
+        self._solutions = {key: (signature, rate) for key, signature, rate in zip(keys, signatures, rates)}
+
+        twr = time_weighted_returns(frame, terminal)
+        logger.info(f"Returns engine: {int((~reuse).sum())}/{group_count} XIRR groups solved "
+                    f"in {iterations} Newton iterations")
+
+        entries = {
+            key: {'xirr': float(rate) if np.isfinite(rate) else None, 'twr': twr.get(key)}
+            for key, rate in zip(keys, rates)
+        }
+        return {
+            'as_of': valuation_date.isoformat(),
+            'portfolio': entries.pop(PORTFOLIO_KEY),
+            'tickers': entries,
+        }
+
+
+_cache = ReturnsCache()
+
+
+def get_returns(valuation_date: Optional[date] = None) -> Dict:
+    """
+    종목별/포트폴리오 XIRR·TWR (소수, 0.1 = 10%)
+
+    Returns:
+        {'as_of', 'portfolio': {'xirr', 'twr'}, 'tickers': {ticker: {'xirr', 'twr'}}}
+    """
+    return _cache.get(valuation_date)
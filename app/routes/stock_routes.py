@@ -1,142 +1,88 @@
-from flask import jsonify, request, Blueprint
+from flask import jsonify, request, Blueprint, Response
 from flask_login import login_required
-from ..models import Holding, Transaction, Dividend, db
+from ..models import Holding, Transaction, Dividend, TaxLot, db
 from ..auth_utils import jwt_required
+from ..conditional_get import versioned_etag
 from ..scheduler import update_stock_price
 from ..price_updater import update_stock_prices
 from ..exchange_rate_service import exchange_rate_service
-from ..toss_api.tickers import tickers
-from ..toss_api.service import TossStockService
+from ..quote_router import get_quote_router, describe_failure
+from ..provider_health import get_health_snapshot
+from ..price_history import record_quotes, get_price_history
+from ..portfolio_snapshots import get_snapshots, record_snapshot
+from ..background_refresh import get_price_refresh_job, get_stale_as_of
+from ..event_stream import publish_on_commit, stream_events
+from ..holdings_ledger import apply_transaction, verify_holdings, rebuild_all_holdings
+from ..batch_ingest import (transaction_values, dividend_values, validate_transactions,
+                            validate_dividends, insert_transactions, insert_dividends, TRANSACTION_TYPES)
+from ..tax_lots import (apply_transaction_lots, rebuild_all_lots, get_realized_gains,
+                        serialize_lot, LOT_METHODS)
+from ..statement_importer import import_statements, open_text
+from ..ledger_index import holdings_as_of, fill_shares_held
+from ..returns_engine import get_returns
+from ..history_pages import query_history
+from ..valuation_service import get_portfolio_valuation
+from ..dividend_ledger import add_dividends, remove_dividends, update_dividend, reconcile_dividend_aggregates
 import yfinance as yf
 from pytz import timezone as pytz_timezone
+from sqlalchemy import func, select
 from datetime import datetime
 import finnhub
+import io
 import os
 
 stock_bp = Blueprint('stock', __name__)
 
-# Toss API 서비스 인스턴스 생성
-toss_service = TossStockService(rate_limit_delay=0.1)
+def _float(value):
+    return float(value or 0)
 
-def update_holdings_for_ticker(ticker):
-    """특정 종목의 Holdings 테이블을 업데이트하는 함수"""
-    try:
-        from decimal import Decimal
-        
-        # 해당 종목의 모든 거래 내역 가져오기
-        transactions = Transaction.query.filter_by(ticker=ticker).order_by(Transaction.date.asc()).all()
-        
-        if not transactions:
-            print(f"No transactions found for {ticker}")
-            return
-        
-        # 종목별 계산
-        total_shares = Decimal('0')
-        total_cost_basis = Decimal('0')
-        total_invested_krw = Decimal('0')
-        total_cost_krw = Decimal('0')  # 가중평균 환율 계산용
-        
-        for txn in transactions:
-            shares = Decimal(str(abs(txn.shares)))  # 절댓값으로 처리
-            total_amount_usd = Decimal(str(abs(txn.amount)))  # 절댓값으로 처리
-            exchange_rate = Decimal(str(txn.exchange_rate or 1400))
-            amount_krw = Decimal(str(abs(txn.amount_krw or 0)))  # 절댓값으로 처리
-            
-            if txn.type.upper() == 'BUY':
-                total_shares += shares
-                total_cost_basis += total_amount_usd
-                total_invested_krw += amount_krw
-                total_cost_krw += total_amount_usd * exchange_rate
-            elif txn.type.upper() == 'SELL':
-                total_shares -= shares
-                # 매도 시 비례적으로 cost basis 감소
-                if total_shares >= 0:
-                    old_total_shares = total_shares + shares
-                    if old_total_shares > 0:
-                        ratio = shares / old_total_shares
-                        total_cost_basis *= (1 - ratio)
-                        total_invested_krw *= (1 - ratio)
-                        total_cost_krw *= (1 - ratio)
-        
-        # 기존 holding 찾기 또는 새로 생성
-        holding = Holding.query.filter_by(ticker=ticker).first()
-        if not holding:
-            holding = Holding()
-            holding.ticker = ticker
-        
-        # 보유 수량이 0보다 클 때만 업데이트
-        if total_shares > 0:
-            avg_price = total_cost_basis / total_shares
-            avg_exchange_rate = total_cost_krw / total_cost_basis if total_cost_basis > 0 else Decimal('1400')
-            
-            holding.current_shares = float(total_shares)
-            holding.avg_purchase_price = float(avg_price)
-            holding.total_cost_basis = float(total_cost_basis)
-            holding.total_invested_krw = float(total_invested_krw)
-            holding.avg_exchange_rate = float(avg_exchange_rate)
-            
-            # 현재 시장가가 없으면 평균 매수가로 설정
-            if not holding.current_market_price:
-                holding.current_market_price = float(avg_price)
-            
-            if holding.holding_id is None:  # 새로운 holding
-                db.session.add(holding)
-            
-            print(f"Updated holding for {ticker}: {total_shares} shares @ ${avg_price:.4f}")
-        else:
-            # 보유 수량이 0이면 holding 삭제
-            if holding.holding_id is not None:
-                db.session.delete(holding)
-                print(f"Deleted holding for {ticker} (no shares remaining)")
-        
-        db.session.commit()
-        
-    except Exception as e:
-        print(f"Error updating holdings for {ticker}: {e}")
-        db.session.rollback()
+def _isoformat(value):
+    return value.isoformat() if value else None
 
-def get_toss_stock_price(ticker: str) -> float:
-    """Toss API를 통해 주가 가져오기"""
-    try:
-        # 티커에 해당하는 토스 코드 찾기
-        toss_code = tickers.get(ticker)
-        if not toss_code:
-            print(f"  ❌ {ticker}: Toss API에서 지원하지 않는 종목")
-            return None
-        
-        print(f"  📊 {ticker} (토스코드: {toss_code}): Toss API에서 가격 조회...")
-        
-        # Toss API에서 현재가 가져오기
-        current_price = toss_service.get_current_price(toss_code)
-        
-        if current_price is not None:
-            print(f"  ✅ {ticker}: Toss API에서 ${current_price} 가격 조회 성공")
-            return current_price
-        else:
-            print(f"  ❌ {ticker}: Toss API에서 유효한 가격 정보 없음")
-            return None
-            
-    except Exception as e:
-        print(f"  ❌ {ticker}: Toss API 조회 실패 - {str(e)}")
-        return None
+# 응답 필드 → (모델 속성, 변환 함수) (fields= 필드 선택 시 해당 컬럼만 조회)
+TRANSACTION_FIELDS = {
+    "id": ('transaction_id', int),
+    "ticker": ('ticker', str),
+    "transaction_type": ('type', str),
+    "shares": ('shares', float),
+    "price_per_share": ('price_per_share', float),
+    "total_amount_usd": ('amount', float),
+    "exchange_rate": ('exchange_rate', _float),
+    "krw_amount": ('amount_krw', _float),
+    "dividend_reinvestment": ('dividend_used', _float),
+    "transaction_date": ('date', _isoformat),
+    "created_at": ('created_at', _isoformat),
+}
 
-def get_finnhub_stock_price(ticker: str) -> float:
-    """Finnhub API를 통해 주가 가져오기 (fallback)"""
-    try:
-        finnhub_client = finnhub.Client(api_key=os.getenv('FINNHUB_API'))
-        quote = finnhub_client.quote(ticker)
-        current_price = quote.get('c')
-        
-        if current_price and current_price > 0:
-            print(f"  ✅ {ticker}: Finnhub API에서 ${current_price} 가격 조회 성공")
-            return current_price
-        else:
-            print(f"  ❌ {ticker}: Finnhub API에서 유효하지 않은 가격: {current_price}")
-            return None
-            
-    except Exception as e:
-        print(f"  ❌ {ticker}: Finnhub API 조회 실패 - {str(e)}")
-        return None
+DIVIDEND_FIELDS = {
+    "id": ('dividend_id', int),
+    "ticker": ('ticker', str),
+    "amount_usd": ('amount', float),
+    "dividend_per_share": ('dividend_per_share', _float),
+    "shares": ('shares_held', _float),
+    "amount_krw": ('amount', lambda amount: float(amount) * 1400),  # 평균 환율 적용
+    "payment_date": ('date', _isoformat),
+    "created_at": ('created_at', _isoformat),
+}
+
+def _serialize(row, field_map, fields=None):
+    return {name: convert(getattr(row, attr))
+            for name, (attr, convert) in field_map.items()
+            if fields is None or name in fields}
+
+def serialize_transaction(txn, fields=None):
+    """거래 내역 API 응답 형식 (fields: 응답에 포함할 필드, 없으면 전체)"""
+    return _serialize(txn, TRANSACTION_FIELDS, fields)
+
+def serialize_dividend(div, fields=None):
+    """배당금 내역 API 응답 형식 (fields: 응답에 포함할 필드, 없으면 전체)"""
+    return _serialize(div, DIVIDEND_FIELDS, fields)
+
+def summarize_dividends(query):
+    """배당금 첫 페이지 요약: 필터 조건 합계 + 종목 필터 선택지 (ticker 필터와 무관한 전체 배당 종목)"""
+    total = query.with_entities(func.sum(Dividend.amount)).order_by(None).scalar()
+    tickers = db.session.execute(select(Dividend.ticker).distinct().order_by(Dividend.ticker)).scalars().all()
+    return {"total_amount_usd": _float(total), "tickers": tickers}
 
 @stock_bp.route('/update_prices')
 def update_all_prices():
@@ -255,122 +201,91 @@ def test_yfinance_direct(ticker):
 
 @stock_bp.route('/holdings', methods=['GET'])
 @jwt_required
+@versioned_etag('holdings', 'transactions')
 def get_holdings():
-    """현재 보유 종목 목록 조회 - 프론트엔드 API 호환 + finnhub 실시간 주가 업데이트"""
+    """현재 보유 종목 목록 조회 - 프론트엔드 API 호환 + finnhub 실시간 주가 업데이트 (?as_of=YYYY-MM-DD: 과거 시점 보유 현황)"""
     print("🚀 get_holdings function called")
+    if request.args.get('as_of'):
+        return get_holdings_as_of(request.args['as_of'])
     try:
-        print("📋 Querying holdings from database...")
-        holdings = Holding.query.filter(Holding.current_shares > 0).all()
-        print(f"📊 Found {len(holdings)} holdings")
-        
         # 주가 업데이트 비활성화 (성능 최적화)
         # 사용자가 ?update_prices=true 파라미터를 명시적으로 요청할 때만 업데이트
         price_updates = []
         
-        from flask import request
         force_update = request.args.get('update_prices', 'false').lower() == 'true'
         
+        # ?mode=swr: 저장된 평가를 즉시 반환하고 주가 갱신은 백그라운드 작업으로 시작(또는 합류)
+        refresh_status = None
+        if force_update and request.args.get('mode') == 'swr':
+            refresh_status = get_price_refresh_job().start()
+            force_update = False
+            print(f"🔁 백그라운드 주가 갱신 {'합류' if refresh_status['joined'] else '시작'}: {refresh_status['job_id']}")
+        
         if force_update:
+            holdings = Holding.query.filter(Holding.current_shares > 0).all()
             print(f"🔄 사용자 요청으로 {len(holdings)} 종목 주가 업데이트 중...")
             
+            # Toss 일괄 조회 후 누락 종목만 프로바이더 체인(Finnhub → yfinance → Yahoo)으로 hedged 조회
+            quotes = get_quote_router().get_quotes([holding.ticker for holding in holdings])
+            
             for holding in holdings:
-                try:
-                    print(f"  📊 Fetching price for {holding.ticker}...")
-                    
-                    # 1. Toss API 시도
-                    current_price = get_toss_stock_price(holding.ticker)
-                    source = 'toss'
-                    
-                    # 2. Toss API 실패시 Finnhub fallback
-                    if current_price is None:
-                        print(f"  🔄 {holding.ticker}: Toss API 실패, Finnhub fallback 시도...")
-                        current_price = get_finnhub_stock_price(holding.ticker)
-                        source = 'finnhub'
+                quote = quotes.get(holding.ticker, {})
+                current_price = quote.get('price')
+                source = quote.get('source')
+                
+                if current_price and current_price > 0:
+                    # 기존 가격과 비교하여 변화가 있을 때만 업데이트
+                    old_price = float(holding.current_market_price)
+                    price_diff = abs(current_price - old_price)
                     
-                    print(f"  📈 {holding.ticker}: API price = ${current_price}, DB price = ${holding.current_market_price}")
+                    if price_diff > 0.001:  # 0.001달러 이상 차이날 때만 업데이트
+                        holding.current_market_price = current_price
+                        holding.last_price_update_date = datetime.now().date()
+                        print(f"  ✅ {holding.ticker}: Updated ${old_price:.3f} → ${current_price:.3f} (source: {source})")
                     
-                    if current_price and current_price > 0:
-                        # 기존 가격과 비교하여 변화가 있을 때만 업데이트
-                        old_price = float(holding.current_market_price)
-                        price_diff = abs(current_price - old_price)
-                        
-                        print(f"  🔍 {holding.ticker}: Price difference = ${price_diff:.6f}")
-                        
-                        if price_diff > 0.001:  # 0.001달러 이상 차이날 때만 업데이트
-                            holding.current_market_price = current_price
-                            holding.last_price_update_date = datetime.now().date()
-                            price_updates.append({
-                                'ticker': holding.ticker,
-                                'old_price': old_price,
-                                'new_price': current_price,
-                                'source': source,
-                                'difference': price_diff
-                            })
-                            print(f"  ✅ {holding.ticker}: Updated ${old_price:.3f} → ${current_price:.3f} (source: {source})")
-                        else:
-                            price_updates.append({
-                                'ticker': holding.ticker,
-                                'old_price': old_price,
-                                'new_price': current_price,
-                                'source': source,
-                                'difference': price_diff
-                            })
-                            print(f"  ➡️ {holding.ticker}: No significant change (diff: ${price_diff:.6f}, source: {source})")
-                    else:
-                        print(f"  ❌ {holding.ticker}: Invalid price from all APIs: {current_price}")
-                        
-                except Exception as e:
-                    print(f"  ❌ Failed to update price for {holding.ticker}: {e}")
+                    price_updates.append({
+                        'ticker': holding.ticker,
+                        'old_price': old_price,
+                        'new_price': current_price,
+                        'source': source,
+                        'difference': price_diff
+                    })
+                else:
                     # API 실패시 기존 가격 유지
-                    continue
-        else:
+                    print(f"  ❌ {holding.ticker}: Invalid price from all APIs ({describe_failure(quote.get('error'))})")
+            # 조회한 시세를 이력 테이블에 기록 (가격 변경과 같은 트랜잭션으로 커밋)
+            record_quotes(quotes.values())
+            changed = [update for update in price_updates if update['difference'] > 0.001]
+            if changed:
+                publish_on_commit(db.session, 'prices', {"updates": [
+                    {key: update[key] for key in ('ticker', 'old_price', 'new_price', 'source')}
+                    for update in changed
+                ]})
+        elif refresh_status is None:
             print(f"⏭️ 주가 업데이트 생략 (업데이트 원하면 ?update_prices=true 파라미터 추가)")
         
         print(f"📝 Total price updates: {len(price_updates)}")
         
-        # 변경사항 커밋
-        db.session.commit()
+        # 변경사항 커밋 (가격이 바뀌면 holdings 버전이 올라가 평가를 다시 계산)
+        if force_update:
+            record_snapshot()  # 오늘자 스냅샷도 같은 트랜잭션으로 기록
+            db.session.commit()
         
-        holdings_data = []
-        for holding in holdings:
-            # 현재 가치 계산
-            current_value_usd = float(holding.current_shares) * float(holding.current_market_price)
-            current_value_krw = current_value_usd * float(holding.avg_exchange_rate or 1400)  # 기본 환율
-            
-            # 손익 계산
-            total_invested_usd = float(holding.total_cost_basis)
-            total_invested_krw = float(holding.total_invested_krw or 0)
-            
-            unrealized_pnl_usd = current_value_usd - total_invested_usd
-            unrealized_pnl_krw = current_value_krw - total_invested_krw
-            
-            # 수익률 계산
-            return_rate_usd = (unrealized_pnl_usd / total_invested_usd * 100) if total_invested_usd > 0 else 0
-            return_rate_krw = (unrealized_pnl_krw / total_invested_krw * 100) if total_invested_krw > 0 else 0
-            
-            holdings_data.append({
-                "id": holding.holding_id,
-                "ticker": holding.ticker,
-                "total_shares": float(holding.current_shares),
-                "total_invested_usd": total_invested_usd,
-                "total_invested_krw": total_invested_krw,
-                "average_price": float(holding.avg_purchase_price or 0),
-                "current_price": float(holding.current_market_price),
-                "current_value_usd": current_value_usd,
-                "current_value_krw": current_value_krw,
-                "unrealized_pnl_usd": unrealized_pnl_usd,
-                "unrealized_pnl_krw": unrealized_pnl_krw,
-                "return_rate_usd": return_rate_usd,
-                "return_rate_krw": return_rate_krw,
-                "created_at": holding.created_at.isoformat() if holding.created_at else None,
-                "updated_at": holding.updated_at.isoformat() if holding.updated_at else None
-            })
+        # 공용 평가 서비스 (데이터 버전별 캐시, 변경이 없으면 DB 조회 없음)
+        valuation = get_portfolio_valuation()
+        holdings_data = [item.to_api_dict() for item in valuation.holdings]
+        print(f"📊 Found {len(holdings_data)} holdings")
         
-        return jsonify({
+        response = {
             "holdings": holdings_data,
             "price_updates": price_updates,
             "last_updated": datetime.now().isoformat()
-        })
+        }
+        if refresh_status is not None:
+            response["stale_as_of"] = get_stale_as_of(valuation.holdings)
+            response["refresh"] = refresh_status
+        
+        return jsonify(response)
         
     except Exception as e:
         print(f"❌ Error in get_holdings: {e}")
@@ -378,145 +293,115 @@ def get_holdings():
         print(f"🔍 Traceback: {traceback.format_exc()}")
         return jsonify({"error": str(e)}), 500
 
+def get_holdings_as_of(value):
+    """거래 누적 인덱스에서 해당 일자 장 마감 기준 보유 현황 조회 (종목별 이진 탐색)"""
+    try:
+        as_of = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({"error": "as_of 형식은 YYYY-MM-DD여야 합니다."}), 400
+    
+    try:
+        holdings_data = [{
+            "ticker": state['ticker'],
+            "total_shares": float(state['shares']),
+            "total_invested_usd": float(state['cost_basis']),
+            "total_invested_krw": float(state['invested_krw']),
+            "average_price": float(state['avg_price']),
+            "avg_exchange_rate": float(state['avg_exchange_rate']),
+            "last_transaction_date": state['last_transaction_date'].isoformat()
+        } for state in holdings_as_of(as_of)]
+        
+        return jsonify({
+            "as_of": as_of.isoformat(),
+            "holdings": holdings_data
+        })
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @stock_bp.route('/holdings/<ticker>', methods=['GET'])
 @jwt_required
 def get_holding(ticker):
     """특정 종목의 보유 현황 조회"""
     try:
-        ticker = ticker.upper()
-        holding = Holding.query.filter_by(ticker=ticker).first()
+        holding = get_portfolio_valuation().holding(ticker.upper())
         
         if not holding:
             return jsonify({"error": "종목을 찾을 수 없습니다"}), 404
         
-        # 현재 가치 및 손익 계산
-        current_value_usd = float(holding.current_shares) * float(holding.current_market_price)
-        current_value_krw = current_value_usd * float(holding.avg_exchange_rate or 1400)
-        
-        total_invested_usd = float(holding.total_cost_basis)
-        total_invested_krw = float(holding.total_invested_krw or 0)
-        
-        unrealized_pnl_usd = current_value_usd - total_invested_usd
-        unrealized_pnl_krw = current_value_krw - total_invested_krw
-        
-        return_rate_usd = (unrealized_pnl_usd / total_invested_usd * 100) if total_invested_usd > 0 else 0
-        return_rate_krw = (unrealized_pnl_krw / total_invested_krw * 100) if total_invested_krw > 0 else 0
-        
-        holding_data = {
-            "id": holding.holding_id,
-            "ticker": holding.ticker,
-            "total_shares": float(holding.current_shares),
-            "total_invested_usd": total_invested_usd,
-            "total_invested_krw": total_invested_krw,
-            "average_price": float(holding.avg_purchase_price or 0),
-            "current_price": float(holding.current_market_price),
-            "current_value_usd": current_value_usd,
-            "current_value_krw": current_value_krw,
-            "unrealized_pnl_usd": unrealized_pnl_usd,
-            "unrealized_pnl_krw": unrealized_pnl_krw,
-            "return_rate_usd": return_rate_usd,
-            "return_rate_krw": return_rate_krw,
-            "created_at": holding.created_at.isoformat() if holding.created_at else None,
-            "updated_at": holding.updated_at.isoformat() if holding.updated_at else None
-        }
+        holding_data = holding.to_api_dict()
         
         return jsonify(holding_data)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@stock_bp.route('/holdings/verify', methods=['GET', 'POST'])
+@jwt_required
+def verify_holdings_ledger():
+    """
+    전체 거래 재계산으로 Holdings 누적값 검증
+    GET: 차이(drift)만 보고, POST: 차이가 있는 종목을 재계산 값으로 재구축
+    """
+    try:
+        ticker = request.args.get('ticker')
+        result = verify_holdings(ticker, fix=request.method == 'POST')
+        return jsonify({
+            "success": True,
+            "checked": result['checked'],
+            "drift_count": len(result['drift']),
+            "drift": result['drift'],
+            "fixed": result['fixed']
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
 @stock_bp.route('/portfolio', methods=['GET'])
 @jwt_required
+@versioned_etag('holdings', 'dividends', 'transactions')
 def get_portfolio():
     print("get portfolio")
     """포트폴리오 전체 요약 정보 조회 - yfinance로 실시간 주가 업데이트"""
     try:
-        holdings = Holding.query.filter(Holding.current_shares > 0).all()
-        
         # 주가 업데이트 조건부 실행 (성능 최적화)
         from flask import request
         force_update = request.args.get('update_prices', 'false').lower() == 'true'
         
-        if force_update:
+        # ?mode=swr: 저장된 평가를 즉시 반환하고 주가 갱신은 백그라운드 작업으로 시작(또는 합류)
+        refresh_status = None
+        if force_update and request.args.get('mode') == 'swr':
+            refresh_status = get_price_refresh_job().start()
+            updated_prices = []
+        elif force_update:
             print("🔄 사용자 요청으로 포트폴리오 주가 업데이트 중...")
-            updated_prices = update_stock_prices(holdings)
+            updated_prices = update_stock_prices(Holding.query.filter(Holding.current_shares > 0).all())
         else:
             print("⏭️ 포트폴리오 주가 업데이트 생략 (업데이트 원하면 ?update_prices=true 파라미터 추가)")
             updated_prices = []
         
-        # 변경사항 커밋
-        db.session.commit()
-        
-        total_invested_usd = 0
-        total_invested_krw = 0
-        total_current_value_usd = 0
-        total_current_value_krw = 0
+        # 변경사항 커밋 (오늘자 스냅샷도 같은 트랜잭션으로 기록)
+        if force_update and refresh_status is None:
+            record_snapshot()
+            db.session.commit()
         
-        for holding in holdings:
-            # 개별 종목 계산
-            current_value_usd = float(holding.current_shares) * float(holding.current_market_price)
-            current_value_krw = current_value_usd * float(holding.avg_exchange_rate or 1400)
-            
-            total_invested_usd += float(holding.total_cost_basis)
-            total_invested_krw += float(holding.total_invested_krw or 0)
-            total_current_value_usd += current_value_usd
-            total_current_value_krw += current_value_krw
-        
-        # 손익 계산
-        total_unrealized_pnl_usd = total_current_value_usd - total_invested_usd
-        total_unrealized_pnl_krw = total_current_value_krw - total_invested_krw
-        
-        # 수익률 계산
-        total_return_rate_usd = (total_unrealized_pnl_usd / total_invested_usd * 100) if total_invested_usd > 0 else 0
-        total_return_rate_krw = (total_unrealized_pnl_krw / total_invested_krw * 100) if total_invested_krw > 0 else 0
-        
-        # 총 배당금 계산 (현재 보유 종목의 배당금만 포함)
-        total_dividends_usd = 0
-        total_dividends_krw = 0
-        
-        # 각 보유 종목별 배당금 계산
-        for holding in holdings:
-            # 해당 종목의 배당금만 조회
-            ticker_dividends = Dividend.query.filter_by(ticker=holding.ticker).all()
-            
-            for dividend in ticker_dividends:
-                # 현금으로 수령한 배당금만 계산 (인출한 배당금)
-                withdrawn_amount = float(dividend.withdrawn_amount or 0)
-                if withdrawn_amount > 0:
-                    total_dividends_usd += withdrawn_amount
-                    # 배당금 수령 시점의 환율 적용 (기본값 1400 사용)
-                    total_dividends_krw += withdrawn_amount * 1400
+        # 공용 평가 서비스 (데이터 버전별 캐시, 변경이 없으면 DB 조회 없음)
+        valuation = get_portfolio_valuation()
         
-        # 배당금 포함 총 손익 계산
-        # USD: 미실현 손익 + 현금 수령 배당금
-        total_pnl_with_dividends_usd = total_unrealized_pnl_usd + total_dividends_usd
-        
-        # KRW: 미실현 손익 + 현금 수령 배당금 (원화 환산)
-        total_pnl_with_dividends_krw = total_unrealized_pnl_krw + total_dividends_krw
-        
-        # 배당금 포함 총 수익률 계산
-        total_return_with_dividends_usd = (total_pnl_with_dividends_usd / total_invested_usd * 100) if total_invested_usd > 0 else 0
-        total_return_with_dividends_krw = (total_pnl_with_dividends_krw / total_invested_krw * 100) if total_invested_krw > 0 else 0
+        # 현금흐름 시점을 반영한 수익률 (데이터 버전별 캐시)
+        returns = get_returns()['portfolio']
         
         portfolio_summary = {
-            "total_invested_usd": total_invested_usd,
-            "total_invested_krw": total_invested_krw,
-            "total_current_value_usd": total_current_value_usd,
-            "total_current_value_krw": total_current_value_krw,
-            "total_unrealized_pnl_usd": total_unrealized_pnl_usd,
-            "total_unrealized_pnl_krw": total_unrealized_pnl_krw,
-            "total_return_rate_usd": total_return_rate_usd,
-            "total_return_rate_krw": total_return_rate_krw,
-            "total_dividends_usd": total_dividends_usd,
-            "total_dividends_krw": total_dividends_krw,
-            # 배당금 포함 총 손익 추가
-            "total_pnl_with_dividends_usd": total_pnl_with_dividends_usd,
-            "total_pnl_with_dividends_krw": total_pnl_with_dividends_krw,
-            "total_return_with_dividends_usd": total_return_with_dividends_usd,
-            "total_return_with_dividends_krw": total_return_with_dividends_krw,
+            **valuation.to_portfolio_summary(),
+            # 금액가중(XIRR, 연환산) / 시간가중(TWR, 누적) 수익률 (%)
+            "xirr_usd": returns['xirr'] * 100 if returns['xirr'] is not None else None,
+            "twr_usd": returns['twr'] * 100 if returns['twr'] is not None else None,
             "price_updates": updated_prices,  # 업데이트된 주가 정보
             "last_updated": datetime.now().isoformat()  # 마지막 업데이트 시간
         }
+        if refresh_status is not None:
+            portfolio_summary["stale_as_of"] = get_stale_as_of(valuation.holdings)
+            portfolio_summary["refresh"] = refresh_status
         
         return jsonify(portfolio_summary)
         
@@ -525,32 +410,20 @@ def get_portfolio():
 
 @stock_bp.route('/transactions', methods=['GET', 'POST'])
 @jwt_required
+@versioned_etag('transactions')
 def handle_transactions():
     """거래 내역 조회 및 생성"""
     print(f"Received {request.method} request to /transactions")
     
     if request.method == 'GET':
+        # ?ticker=&type=&from=&to=&fields=  (limit/cursor 지정 시 키셋 페이지네이션)
         try:
-            transactions = Transaction.query.order_by(Transaction.date.desc()).all()
-            
-            transactions_data = []
-            for txn in transactions:
-                transactions_data.append({
-                    "id": txn.transaction_id,
-                    "ticker": txn.ticker,
-                    "transaction_type": txn.type,
-                    "shares": float(txn.shares),
-                    "price_per_share": float(txn.price_per_share),
-                    "total_amount_usd": float(txn.amount),
-                    "exchange_rate": float(txn.exchange_rate or 0),
-                    "krw_amount": float(txn.amount_krw or 0),
-                    "dividend_reinvestment": float(txn.dividend_used or 0),
-                    "transaction_date": txn.date.isoformat(),
-                    "created_at": txn.created_at.isoformat() if txn.created_at else None
-                })
-            
-            return jsonify(transactions_data)
+            return jsonify(query_history(Transaction, Transaction.transaction_id, TRANSACTION_FIELDS,
+                                         serialize_transaction, request.args,
+                                         type_column=Transaction.type, allowed_types=TRANSACTION_TYPES))
             
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             print(f"GET /transactions error: {str(e)}")
             return jsonify({"error": str(e)}), 500
@@ -565,69 +438,109 @@ def handle_transactions():
             print("No JSON data received")
             return jsonify({"error": "JSON 데이터가 필요합니다."}), 400
         
-        # 필수 필드 검증
-        required_fields = ['transaction_type', 'ticker', 'shares', 'price_per_share', 'total_amount_usd']
-        for field in required_fields:
-            if field not in data:
-                print(f"Missing required field: {field}")
-                return jsonify({"error": f"필수 필드가 누락되었습니다: {field}"}), 400
+        if data.get('lot_method') and data['lot_method'] not in LOT_METHODS:
+            return jsonify({"error": f"lot_method는 {', '.join(LOT_METHODS)} 중 하나여야 합니다."}), 400
         
         print("Creating new transaction...")
-        # 새 거래 생성
-        new_transaction = Transaction()
-        new_transaction.date = datetime.strptime(data.get('transaction_date', datetime.now().date().isoformat()), '%Y-%m-%d').date()
-        new_transaction.type = data['transaction_type']
-        new_transaction.ticker = data['ticker'].upper()
-        new_transaction.shares = data['shares']
-        new_transaction.price_per_share = data['price_per_share']
-        new_transaction.amount = data['total_amount_usd']
-        new_transaction.exchange_rate = data.get('exchange_rate')
-        new_transaction.amount_krw = data.get('krw_amount')
-        new_transaction.dividend_used = data['total_amount_usd'] if data.get('dividend_reinvestment') else 0
-        new_transaction.cash_invested_krw = data.get('krw_amount', 0) if not data.get('dividend_reinvestment') else 0
+        # 새 거래 생성 (필수 필드/형식 검증 포함, 실패 시 ValueError)
+        new_transaction = Transaction(**transaction_values(data))
         
         print("Adding to database...")
         db.session.add(new_transaction)
-        db.session.commit()
-        print(f"Transaction created with ID: {new_transaction.transaction_id}")
+        db.session.flush()
+        # 커밋되면 스트림 구독자에게 새 거래 전달
+        publish_on_commit(db.session, 'transaction', {
+            "action": "created",
+            "transaction": serialize_transaction(new_transaction)
+        })
         
-        # Holdings 테이블 업데이트
+        # 새 거래만으로 Holdings 누적값 갱신 (거래 저장과 같은 트랜잭션으로 커밋)
         print("Updating holdings table...")
-        update_holdings_for_ticker(new_transaction.ticker)
+        apply_transaction(new_transaction)
+        # 매수는 로트 생성, 매도는 로트 소진 + 실현 손익 기록
+        gains = apply_transaction_lots(new_transaction, data.get('lot_method'), data.get('lot_selections'))
+        db.session.commit()
+        print(f"Transaction created with ID: {new_transaction.transaction_id}")
         
-        return jsonify({
+        response = {
             "id": new_transaction.transaction_id,
             "message": "거래가 성공적으로 생성되었습니다."
-        }), 201
+        }
+        if gains:
+            response["realized_pnl_usd"] = float(sum(gain.realized_pnl_usd for gain in gains))
+            response["realized_pnl_krw"] = float(sum(gain.realized_pnl_krw for gain in gains))
+        return jsonify(response), 201
         
+    except ValueError as e:
+        print(f"POST /transactions validation error: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"POST /transactions error: {str(e)}")
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+@stock_bp.route('/tax-lots', methods=['GET'])
+@jwt_required
+def get_tax_lots():
+    """로트 목록 조회 (?ticker=, ?open_only=true면 잔여 수량이 있는 로트만)"""
+    try:
+        query = TaxLot.query
+        ticker = request.args.get('ticker')
+        if ticker:
+            query = query.filter(TaxLot.ticker == ticker.upper())
+        if request.args.get('open_only', 'false').lower() == 'true':
+            query = query.filter(TaxLot.remaining_shares > 0)
+        lots = query.order_by(TaxLot.ticker.asc(), TaxLot.acquired_date.asc(), TaxLot.lot_id.asc()).all()
+        return jsonify([serialize_lot(lot) for lot in lots])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@stock_bp.route('/tax-lots/rebuild', methods=['POST'])
+@jwt_required
+def rebuild_tax_lots():
+    """전체 거래로 로트와 실현 손익 재구축 (로트 도입 이전 거래 백필)"""
+    try:
+        result = rebuild_all_lots()
+        return jsonify({"success": True, **result})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@stock_bp.route('/realized-gains', methods=['GET'])
+@jwt_required
+def get_realized_gains_route():
+    """
+    실현 손익 조회
+    Query params: ticker, start, end (YYYY-MM-DD, 매도일 기준)
+    """
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        result = get_realized_gains(
+            request.args.get('ticker'),
+            datetime.strptime(start, '%Y-%m-%d').date() if start else None,
+            datetime.strptime(end, '%Y-%m-%d').date() if end else None,
+        )
+        return jsonify(result)
+    except ValueError:
+        return jsonify({"error": "날짜 형식은 YYYY-MM-DD 여야 합니다."}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @stock_bp.route('/dividends', methods=['GET', 'POST'])
 @jwt_required
+@versioned_etag('dividends')
 def handle_dividends():
     """배당금 내역 조회 및 생성"""
     if request.method == 'GET':
+        # ?ticker=&from=&to=&fields=  (limit/cursor 지정 시 키셋 페이지네이션)
         try:
-            dividends = Dividend.query.order_by(Dividend.date.desc()).all()
-            
-            dividends_data = []
-            for div in dividends:
-                dividends_data.append({
-                    "id": div.dividend_id,
-                    "ticker": div.ticker,
-                    "amount_usd": float(div.amount),
-                    "dividend_per_share": float(div.dividend_per_share or 0),
-                    "shares": float(div.shares_held or 0),
-                    "amount_krw": float(div.amount) * 1400,  # 평균 환율 적용
-                    "payment_date": div.date.isoformat(),
-                    "created_at": div.created_at.isoformat() if div.created_at else None
-                })
-            
-            return jsonify(dividends_data)
+            return jsonify(query_history(Dividend, Dividend.dividend_id, DIVIDEND_FIELDS,
+                                         serialize_dividend, request.args, summarize=summarize_dividends))
             
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
     
@@ -637,21 +550,17 @@ def handle_dividends():
         if not data:
             return jsonify({"error": "JSON 데이터가 필요합니다."}), 400
         
-        # 필수 필드 검증
-        required_fields = ['ticker', 'amount_usd']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"필수 필드가 누락되었습니다: {field}"}), 400
-        
-        # 새 배당금 기록 생성
-        new_dividend = Dividend()
-        new_dividend.date = datetime.strptime(data.get('payment_date', datetime.now().date().isoformat()), '%Y-%m-%d').date()
-        new_dividend.ticker = data['ticker'].upper()
-        new_dividend.amount = data['amount_usd']
-        new_dividend.dividend_per_share = data.get('dividend_per_share', 0)
-        new_dividend.shares_held = data.get('shares', 0)
+        # 새 배당금 기록 생성 (필수 필드/형식 검증 포함, 실패 시 ValueError)
+        # shares 미입력 시 지급일 기준 보유 수량을 거래 누적 인덱스에서 채움
+        new_dividend = Dividend(**fill_shares_held([dividend_values(data)])[0])
         
         db.session.add(new_dividend)
+        db.session.flush()
+        add_dividends([new_dividend])
+        publish_on_commit(db.session, 'dividend', {
+            "action": "created",
+            "dividend": serialize_dividend(new_dividend)
+        })
         db.session.commit()
         
         return jsonify({
@@ -659,10 +568,163 @@ def handle_dividends():
             "message": "배당금이 성공적으로 기록되었습니다."
         }), 201
         
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+@stock_bp.route('/dividends/<int:dividend_id>', methods=['PUT', 'DELETE'])
+@jwt_required
+def handle_dividend(dividend_id):
+    """배당금 수정(PUT, 보낸 필드만 변경) 및 삭제(DELETE), 종목별 배당금 집계도 함께 갱신"""
+    try:
+        dividend = Dividend.query.get(dividend_id)
+        if not dividend:
+            return jsonify({"error": "배당금 내역을 찾을 수 없습니다."}), 404
+        
+        if request.method == 'DELETE':
+            remove_dividends([dividend])
+            db.session.delete(dividend)
+            publish_on_commit(db.session, 'dividend', {"action": "deleted", "id": dividend_id})
+            db.session.commit()
+            return jsonify({"id": dividend_id, "message": "배당금 내역이 삭제되었습니다."})
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "JSON 데이터가 필요합니다."}), 400
+        
+        # 보내지 않은 필드는 현재 컬럼 값 그대로 (응답 직렬화 값은 float 변환/NULL → 0이 섞이므로 사용하지 않음)
+        current = {
+            "ticker": dividend.ticker,
+            "payment_date": dividend.date.isoformat(),
+            "amount_usd": dividend.amount,
+            "dividend_per_share": dividend.dividend_per_share,
+        }
+        values = dividend_values({**current, **data})
+        # 보유 수량은 종목/지급일이 그대로일 때만 유지, 바뀌면 새 지급일 기준으로 다시 채움 (POST와 동일)
+        if 'shares' not in data and (values['ticker'], values['date']) == (dividend.ticker, dividend.date):
+            values['shares_held'] = dividend.shares_held
+        update_dividend(dividend, fill_shares_held([values])[0])
+        publish_on_commit(db.session, 'dividend', {"action": "updated", "id": dividend_id})
+        db.session.commit()
+        
+        return jsonify({
+            "dividend": serialize_dividend(dividend),
+            "message": "배당금 내역이 수정되었습니다."
+        })
+        
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@stock_bp.route('/dividends/reconcile', methods=['GET', 'POST'])
+@jwt_required
+def reconcile_dividends():
+    """
+    종목별 배당금 집계 검증 (GROUP BY 한 번으로 재계산)
+    GET: 차이(drift)만 보고, POST: 차이가 있는 종목의 집계를 재계산 값으로 수정
+    """
+    try:
+        result = reconcile_dividend_aggregates(fix=request.method == 'POST')
+        return jsonify({
+            "success": True,
+            "checked": result['checked'],
+            "drift_count": len(result['drift']),
+            "drift": result['drift'],
+            "fixed": result['fixed']
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@stock_bp.route('/transactions/batch', methods=['POST'])
+@jwt_required
+def create_transactions_batch():
+    """
+    거래 일괄 생성
+    배열(또는 {"transactions": [...]}) 전체를 검증한 뒤 한 번의 INSERT로 저장하고,
+    영향받은 종목의 보유 현황/로트를 종목당 한 번씩 재계산해 한 트랜잭션으로 커밋
+    """
+    try:
+        data = request.get_json()
+        items = data.get('transactions') if isinstance(data, dict) else data
+        rows, errors = validate_transactions(items)
+        if errors:
+            return jsonify({"error": "입력 데이터 검증에 실패했습니다.", "errors": errors}), 400
+        
+        tickers = insert_transactions(rows)
+        db.session.commit()
+        
+        return jsonify({
+            "created": len(rows),
+            "tickers": tickers,
+            "message": f"거래 {len(rows)}건이 성공적으로 생성되었습니다."
+        }), 201
+        
+    except Exception as e:
+        print(f"POST /transactions/batch error: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@stock_bp.route('/dividends/batch', methods=['POST'])
+@jwt_required
+def create_dividends_batch():
+    """배당금 일괄 생성 (배열 또는 {"dividends": [...]}, 전체 검증 후 한 번의 INSERT로 저장)"""
+    try:
+        data = request.get_json()
+        items = data.get('dividends') if isinstance(data, dict) else data
+        rows, errors = validate_dividends(items)
+        if errors:
+            return jsonify({"error": "입력 데이터 검증에 실패했습니다.", "errors": errors}), 400
+        
+        tickers = insert_dividends(rows)
+        db.session.commit()
+        
+        return jsonify({
+            "created": len(rows),
+            "tickers": tickers,
+            "message": f"배당금 {len(rows)}건이 성공적으로 기록되었습니다."
+        }), 201
+        
+    except Exception as e:
+        print(f"POST /dividends/batch error: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+@stock_bp.route('/import/statement', methods=['POST'])
+@jwt_required
+def import_statement():
+    """
+    증권사 거래내역 CSV 가져오기 (multipart 'file' 여러 개 또는 요청 본문 그대로)
+    쿼리 파라미터: dry_run=true, encoding=cp949 (기본: 자동 판별)
+    """
+    try:
+        dry_run = request.args.get('dry_run', 'false').lower() in ('1', 'true', 'yes')
+        encoding = request.args.get('encoding')
+        
+        files = request.files.getlist('file')
+        if files:
+            binaries = [file.stream for file in files]
+        elif request.content_length:
+            binaries = [io.BytesIO(request.get_data())]
+        else:
+            return jsonify({"error": "가져올 CSV 파일이 필요합니다."}), 400
+        
+        summary = import_statements([open_text(binary, encoding) for binary in binaries], dry_run=dry_run)
+        return jsonify(summary), 200 if dry_run else 201
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"POST /import/statement error: {str(e)}")
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
 @stock_bp.route('/update-price', methods=['POST'])
 @jwt_required
 def update_price():
@@ -687,8 +749,13 @@ def update_price():
             return jsonify({"error": "종목을 찾을 수 없습니다"}), 404
         
         # 주가 업데이트
+        old_price = float(holding.current_market_price)
         holding.current_market_price = price
         holding.last_price_update_date = datetime.now().date()
+        record_quotes([{'ticker': ticker, 'price': price}], default_source='manual')
+        publish_on_commit(db.session, 'prices', {"updates": [
+            {"ticker": ticker, "old_price": old_price, "new_price": float(price), "source": "manual"}
+        ]})
         
         db.session.commit()
         
@@ -703,112 +770,139 @@ def update_price():
         return jsonify({"error": str(e)}), 500
 
 
-@stock_bp.route('/populate-holdings', methods=['GET', 'POST'])
-# @login_required  # 임시로 주석 처리
-def populate_holdings():
-    """transactions 데이터를 기반으로 holdings 테이블을 다시 계산하고 채움"""
-    print("🚀 populate_holdings 함수 시작")
+@stock_bp.route('/stream', methods=['GET'])
+def stream():
+    """
+    실시간 변경 이벤트 스트림 (SSE)
+    EventSource는 헤더를 지정할 수 없으므로 Authorization 헤더 대신 ?token= 으로도 인증
+    이벤트: prices, transaction, dividend, fx, resync(전체 재조회 필요)
+    """
+    from ..auth_utils import JWTService, get_token_from_header
+    from ..models import User
+    
+    token = get_token_from_header() or request.args.get('token')
+    if not token:
+        return jsonify({'error': 'Access token is required'}), 401
+    try:
+        payload = JWTService.verify_access_token(token)
+    except Exception:
+        return jsonify({'error': 'Invalid access token'}), 401
+    user = db.session.get(User, payload['user_id'])
+    if not user or not user.is_active:
+        return jsonify({'error': 'Invalid user'}), 401
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    # 요청 컨텍스트 없이 스트리밍하므로 응답 반환과 함께 DB 세션이 정리되어 커넥션을 붙잡지 않음
+    return Response(
+        stream_events(last_event_id),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',  # nginx 프록시 버퍼링 비활성화
+        }
+    )
+
+
+@stock_bp.route('/price-refresh/status', methods=['GET'])
+@jwt_required
+def get_price_refresh_status():
+    """백그라운드 주가 갱신 작업 상태 + 시세 프로바이더별 상태(서킷 브레이커, 한도) 조회"""
+    return jsonify({**get_price_refresh_job().status(), 'providers': get_health_snapshot()})
+
+
+@stock_bp.route('/prices/<ticker>', methods=['GET'])
+@jwt_required
+def get_prices(ticker):
+    """저장된 종목 시세 이력 조회 (?from=YYYY-MM-DD&to=YYYY-MM-DD&source=)"""
     try:
-        from decimal import Decimal
+        ticker = ticker.upper()
         
-        print("🔄 Holdings 테이블 재계산 시작...")
+        def parse_bound(name, end_of_day=False):
+            value = request.args.get(name)
+            if not value:
+                return None
+            parsed = datetime.fromisoformat(value)
+            # 날짜만 지정한 경우 종료일은 해당 일자 전체를 포함
+            if end_of_day and len(value) == 10:
+                parsed = parsed.replace(hour=23, minute=59, second=59)
+            return parsed
         
-        # 전체 거래 수 확인
-        total_count = Transaction.query.count()
-        print(f"📈 데이터베이스에 총 {total_count}건의 거래 내역 존재")
+        try:
+            start = parse_bound('from')
+            end = parse_bound('to', end_of_day=True)
+        except ValueError:
+            return jsonify({"error": "날짜 형식은 YYYY-MM-DD 또는 ISO 8601이어야 합니다."}), 400
         
-        # 기존 holdings 데이터 삭제
-        Holding.query.delete()
+        history = get_price_history(ticker, start=start, end=end, source=request.args.get('source'))
         
-        # 모든 거래 내역 가져오기 (날짜순 정렬)
-        transactions = Transaction.query.order_by(Transaction.date.asc()).all()
-        print(f"📊 총 {len(transactions)}건의 거래 내역 발견")
+        return jsonify({
+            "ticker": ticker,
+            "count": len(history),
+            "prices": history
+        })
         
-        # 각 거래 내역을 상세히 출력
-        for i, txn in enumerate(transactions, 1):
-            print(f"  {i}. ID:{txn.transaction_id} | {txn.date} | {txn.type} | {txn.ticker} | {txn.shares}주 | ${txn.price_per_share} | ${txn.amount}")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@stock_bp.route('/returns', methods=['GET'])
+@jwt_required
+def get_returns_route():
+    """종목별/포트폴리오 XIRR(금액가중, 연환산)·TWR(시간가중, 누적) 수익률 조회 (%)"""
+    try:
+        returns = get_returns()
         
-        # 종목별로 거래 내역 그룹화 및 계산
-        holdings_data = {}
+        def to_percent(entry):
+            return {key: value * 100 if value is not None else None for key, value in entry.items()}
         
-        for txn in transactions:
-            ticker = txn.ticker
-            
-            if ticker not in holdings_data:
-                holdings_data[ticker] = {
-                    'total_shares': Decimal('0'),
-                    'total_cost_basis': Decimal('0'),  # 총 투자 금액 (USD)
-                    'total_invested_krw': Decimal('0'),  # 총 투자 금액 (KRW)
-                    'total_cost_krw': Decimal('0'),  # 환율 계산용
-                }
-            
-            data = holdings_data[ticker]
-            shares = Decimal(str(abs(txn.shares)))  # 절댓값으로 처리
-            total_amount_usd = Decimal(str(abs(txn.amount)))  # 절댓값으로 처리
-            exchange_rate = Decimal(str(txn.exchange_rate or 1400))
-            amount_krw = Decimal(str(abs(txn.amount_krw or 0)))  # 절댓값으로 처리
-            
-            print(f"  🔍 {ticker}: Processing {txn.type} - shares={txn.shares}, abs_shares={shares}")
-            
-            if txn.type.upper() == 'BUY':
-                data['total_shares'] += shares
-                data['total_cost_basis'] += total_amount_usd
-                data['total_invested_krw'] += amount_krw
-                data['total_cost_krw'] += total_amount_usd * exchange_rate
-                
-                print(f"  📈 {ticker}: {shares}주 매수 @ ${txn.price_per_share}")
-            elif txn.type.upper() == 'SELL':
-                data['total_shares'] -= shares
-                # 매도 시 비례적으로 cost basis 감소
-                if data['total_shares'] >= 0:
-                    old_total_shares = data['total_shares'] + shares
-                    if old_total_shares > 0:
-                        ratio = shares / old_total_shares
-                        data['total_cost_basis'] *= (1 - ratio)
-                        data['total_invested_krw'] *= (1 - ratio)
-                        data['total_cost_krw'] *= (1 - ratio)
-                
-                print(f"  📉 {ticker}: {shares}주 매도 @ ${txn.price_per_share}")
-            else:
-                print(f"  ⚠️  {ticker}: 알 수 없는 거래 타입: {txn.type}")
-        
-        # Holdings 테이블에 데이터 삽입
-        print("💾 Holdings 테이블에 데이터 저장...")
-        
-        results = []
-        for ticker, data in holdings_data.items():
-            if data['total_shares'] > 0:  # 보유 수량이 있는 경우만
-                avg_price = data['total_cost_basis'] / data['total_shares']
-                avg_exchange_rate = data['total_cost_krw'] / data['total_cost_basis'] if data['total_cost_basis'] > 0 else Decimal('1400')
-                
-                holding = Holding()
-                holding.ticker = ticker
-                holding.current_shares = float(data['total_shares'])
-                holding.avg_purchase_price = float(avg_price)
-                holding.total_cost_basis = float(data['total_cost_basis'])
-                holding.total_invested_krw = float(data['total_invested_krw'])
-                holding.avg_exchange_rate = float(avg_exchange_rate)
-                
-                # 현재 시장가는 임시로 평균 매수가로 설정 (나중에 API로 업데이트)
-                holding.current_market_price = float(avg_price)
-                
-                db.session.add(holding)
-                
-                result_item = {
-                    "ticker": ticker,
-                    "total_shares": float(data['total_shares']),
-                    "avg_price": float(avg_price),
-                    "total_cost_usd": float(data['total_cost_basis']),
-                    "total_invested_krw": float(data['total_invested_krw']),
-                    "avg_exchange_rate": float(avg_exchange_rate)
-                }
-                results.append(result_item)
-                
-                print(f"  ✅ {ticker}: {data['total_shares']}주, 평균가: ${avg_price:.4f}, 평균환율: {avg_exchange_rate:.2f}")
+        return jsonify({
+            "as_of": returns['as_of'],
+            "portfolio": to_percent(returns['portfolio']),
+            "tickers": {ticker: to_percent(entry) for ticker, entry in returns['tickers'].items()}
+        })
         
-        # 변경사항 커밋
-        db.session.commit()
-        print("✨ Holdings 테이블 업데이트 완료!")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@stock_bp.route('/portfolio/snapshots', methods=['GET'])
+@jwt_required
+def get_portfolio_snapshots():
+    """일별 포트폴리오 스냅샷 조회 (?from=YYYY-MM-DD&to=YYYY-MM-DD&ticker=, ticker 생략 시 포트폴리오 합계)"""
+    try:
+        ticker = request.args.get('ticker')
+        ticker = ticker.upper() if ticker else None
+        
+        try:
+            start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+            end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+        except ValueError:
+            return jsonify({"error": "날짜 형식은 YYYY-MM-DD여야 합니다."}), 400
+        
+        snapshots = get_snapshots(ticker, start=start, end=end)
+        
+        return jsonify({
+            "ticker": ticker,
+            "count": len(snapshots),
+            "snapshots": snapshots
+        })
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@stock_bp.route('/populate-holdings', methods=['GET', 'POST'])
+# @login_required  # 임시로 주석 처리
+def populate_holdings():
+    """transactions 데이터를 기반으로 holdings 테이블을 다시 계산하고 채움"""
+    try:
+        print("🔄 Holdings 테이블 재계산 시작...")
+        results = rebuild_all_holdings()
+        print(f"✨ Holdings 테이블 업데이트 완료! ({len(results)}개 종목)")
         
         return jsonify({
             "success": True,
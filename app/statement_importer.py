@@ -0,0 +1,332 @@
+"""
+증권사 거래내역(CSV) 가져오기
+외화 거래내역(dollorList.csv)과 원화 거래내역(wonList.csv)을 한 행씩 읽어
+transactions / dividends / exchange_rates 행으로 변환하고, 청크 단위 일괄 INSERT로 저장합니다.
+
+- 행마다 ORM 객체를 만들지 않고 컬럼 값 딕셔너리만 모아 청크당 한 번씩 INSERT
+- 변환된 내용의 SHA-256 해시를 imported_records에 기록하여 같은 파일을 다시 가져와도 중복 저장하지 않음
+- 거래가 추가된 종목은 가져오기 끝에 종목당 한 번씩 보유 현황/로트 재계산
+
+거래구분 매핑:
+    외화: 구매 → BUY, 판매 → SELL, 외화증권배당금입금 → 배당금, 환전외화입금 → 환율
+    원화: 환전원화출금 → 환율 (외화 쪽 환전외화입금과 같은 환율이면 한 번만 저장)
+    그 외(이체입금, 이자입금, 환전 취소 등)는 건너뜀
+
+CLI:
+    python -m app.statement_importer dollorList.csv wonList.csv [--dry-run] [--encoding cp949]
+"""
+
+import csv
+import hashlib
+import io
+import logging
+from collections import Counter
+from datetime import date, datetime, time
+from decimal import Decimal, InvalidOperation
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+
+from .models import Dividend, ExchangeRate, ImportedRecord, Transaction, db
+from .event_stream import publish_on_commit
+from .batch_ingest import recompute_tickers
+from .dividend_ledger import add_dividends
+
+logger = logging.getLogger(__name__)
+
+USD_STATEMENT = 'usd_statement'  # 외화 거래내역 (dollorList.csv)
+KRW_STATEMENT = 'krw_statement'  # 원화 거래내역 (wonList.csv)
+
+IMPORT_SOURCE = 'CSV-IMPORT'
+EXCHANGE_RATE_TIME = time(9, 0)  # 환전 시각이 없으므로 rebuild_data.sql과 같이 09:00으로 기록
+CHUNK_SIZE = 500
+
+RECORD_MODELS = {
+    'transaction': Transaction,
+    'dividend': Dividend,
+    'exchange_rate': ExchangeRate,
+}
+
+
+def detect_format(header: List[str]) -> str:
+    """헤더로 거래내역 종류 판별"""
+    columns = set(header or [])
+    if '거래대금($)' in columns:
+        return USD_STATEMENT
+    if '거래대금' in columns and '거래구분' in columns:
+        return KRW_STATEMENT
+    raise ValueError(f"지원하지 않는 거래내역 형식입니다: {header}")
+
+
+def _number(value: Optional[str]) -> Decimal:
+    text = (value or '').replace(',', '').strip()
+    if not text:
+        return Decimal('0')
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"숫자가 아닌 값입니다: {value!r}")
+
+
+def _date(value: str) -> date:
+    text = value.strip().replace('-', '.').replace('/', '.')
+    return datetime.strptime(text, '%Y.%m.%d').date()
+
+
+def _exchange_rate(trade_date: date, rate: Decimal) -> Tuple[str, Dict]:
+    return 'exchange_rate', {
+        'timestamp': datetime.combine(trade_date, EXCHANGE_RATE_TIME),
+        'usd_krw': rate,
+        'source': IMPORT_SOURCE,
+    }
+
+
+def parse_usd_row(row: Dict[str, str]) -> Optional[Tuple[str, Dict]]:
+    """외화 거래내역 한 행 → (record_type, 컬럼 값) 또는 None (건너뛸 행)"""
+    kind = row['거래구분'].strip()
+    trade_date = _date(row['거래일자'])
+    ticker = (row.get('종목명(종목코드)') or '').strip().upper()
+    rate = _number(row['환율'])
+    shares = _number(row['거래수량'])
+    amount_usd = _number(row['거래대금($)'])
+    amount_krw = _number(row['거래대금(원)'])
+
+    if kind in ('구매', '판매'):
+        return 'transaction', {
+            'date': trade_date,
+            'type': 'BUY' if kind == '구매' else 'SELL',
+            'ticker': ticker,
+            'shares': shares,
+            'price_per_share': _number(row['단가($)']),
+            'amount': amount_usd,
+            'exchange_rate': rate,
+            'amount_krw': amount_krw,
+            'dividend_used': 0,
+            'cash_invested_krw': amount_krw if kind == '구매' else 0,
+        }
+    if kind == '외화증권배당금입금':
+        return 'dividend', {
+            'date': trade_date,
+            'ticker': ticker,
+            'shares_held': shares,
+            'dividend_per_share': (amount_usd / shares).quantize(Decimal('0.00000001')) if shares else 0,
+            'amount': amount_usd,
+            'reinvested_amount': 0,
+            'withdrawn_amount': amount_usd,
+        }
+    if kind == '환전외화입금':
+        return _exchange_rate(trade_date, rate)
+    return None
+
+
+def parse_krw_row(row: Dict[str, str]) -> Optional[Tuple[str, Dict]]:
+    """원화 거래내역 한 행 → (record_type, 컬럼 값) 또는 None (건너뛸 행)"""
+    if row['거래구분'].strip() == '환전원화출금':
+        return _exchange_rate(_date(row['거래일자']), _number(row['환율']))
+    return None
+
+
+PARSERS = {
+    USD_STATEMENT: parse_usd_row,
+    KRW_STATEMENT: parse_krw_row,
+}
+
+
+def _canonical(values: Dict) -> str:
+    parts = []
+    for key in sorted(values):
+        value = values[key]
+        if isinstance(value, Decimal):
+            value = value.normalize()
+        elif isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        parts.append(f"{key}={value}")
+    return '|'.join(parts)
+
+
+def content_hash(record_type: str, values: Dict, occurrence: int = 0) -> str:
+    """
+    변환된 행 내용의 해시
+    같은 날 같은 내용의 거래가 여러 번 있을 수 있으므로 파일 내 등장 순번(occurrence)을 포함
+    """
+    payload = f"{record_type}|{_canonical(values)}|{occurrence}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def iter_statement_records(stream: IO[str], stats: Counter) -> Iterator[Tuple[str, Dict, str]]:
+    """
+    거래내역 스트림을 한 행씩 읽어 (record_type, 컬럼 값, 해시) 생성
+
+    Args:
+        stream: 텍스트 스트림 (newline='' 권장)
+        stats: 행 수/건너뛴 거래구분을 집계할 Counter (판별된 형식은 stats['format'])
+    """
+    reader = csv.reader(stream)
+    header = [column.strip() for column in next(reader, [])]
+    statement_format = detect_format(header)
+    stats['format'] = statement_format
+    parse = PARSERS[statement_format]
+    occurrences: Counter = Counter()
+
+    for line_number, values in enumerate(reader, start=2):
+        if not values or not any(value.strip() for value in values):
+            continue
+        stats['rows'] += 1
+        row = dict(zip(header, values))
+        try:
+            record = parse(row)
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"{line_number}행을 해석할 수 없습니다: {e}")
+        if record is None:
+            stats['skipped:' + row.get('거래구분', '').strip()] += 1
+            continue
+
+        record_type, record_values = record
+        if record_type == 'exchange_rate':
+            # 외화/원화 거래내역 양쪽에 같은 환전이 나오므로 (시각, 환율)만으로 식별
+            occurrence = 0
+        else:
+            key = content_hash(record_type, record_values)
+            occurrence = occurrences[key]
+            occurrences[key] += 1
+        yield record_type, record_values, content_hash(record_type, record_values, occurrence)
+
+
+def _flush_chunk(chunk: List[Tuple[str, Dict, str]], source_format: str, result: Dict):
+    """청크 하나를 중복 제거 후 종류별로 한 번씩 INSERT"""
+    hashes = [record_hash for _, _, record_hash in chunk]
+    existing = set(db.session.execute(
+        select(ImportedRecord.content_hash).where(ImportedRecord.content_hash.in_(hashes))
+    ).scalars())
+
+    rows_by_type: Dict[str, List[Dict]] = {}
+    imported = []
+    for record_type, values, record_hash in chunk:
+        if record_hash in existing:
+            result['duplicates'] += 1
+            continue
+        existing.add(record_hash)
+        rows_by_type.setdefault(record_type, []).append(values)
+        imported.append({'content_hash': record_hash, 'record_type': record_type, 'source_format': source_format})
+
+    for record_type, rows in rows_by_type.items():
+        db.session.execute(insert(RECORD_MODELS[record_type]), rows)
+        result['inserted'][record_type] += len(rows)
+        if record_type == 'transaction':
+            result['tickers'].update(row['ticker'] for row in rows)
+        elif record_type == 'dividend':
+            add_dividends(rows)
+            result['dividend_tickers'].update(row['ticker'] for row in rows)
+    if imported:
+        db.session.execute(insert(ImportedRecord), imported)
+
+
+def import_statements(streams: List[IO[str]], chunk_size: int = CHUNK_SIZE, dry_run: bool = False) -> Dict:
+    """
+    거래내역 스트림들을 가져와 한 트랜잭션으로 커밋 (dry_run이면 롤백)
+
+    Returns:
+        {'rows', 'inserted': {record_type: 건수}, 'duplicates', 'skipped': {거래구분: 건수}, 'tickers', 'dry_run'}
+    """
+    stats: Counter = Counter()
+    result = {
+        'inserted': Counter(),
+        'duplicates': 0,
+        'tickers': set(),
+        'dividend_tickers': set(),
+    }
+
+    try:
+        for stream in streams:
+            chunk = []
+            for record in iter_statement_records(stream, stats):
+                chunk.append(record)
+                if len(chunk) >= chunk_size:
+                    _flush_chunk(chunk, stats['format'], result)
+                    chunk = []
+            if chunk:
+                _flush_chunk(chunk, stats['format'], result)
+
+        tickers = sorted(result['tickers'])
+        recompute_tickers(tickers)
+
+        if tickers:
+            publish_on_commit(db.session, 'transaction', {
+                "action": "batch_created",
+                "count": result['inserted']['transaction'],
+                "tickers": tickers
+            })
+        if result['dividend_tickers']:
+            publish_on_commit(db.session, 'dividend', {
+                "action": "batch_created",
+                "count": result['inserted']['dividend'],
+                "tickers": sorted(result['dividend_tickers'])
+            })
+
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    summary = {
+        'rows': stats['rows'],
+        'inserted': {record_type: result['inserted'][record_type] for record_type in RECORD_MODELS},
+        'duplicates': result['duplicates'],
+        'skipped': {key.split(':', 1)[1]: count for key, count in stats.items() if key.startswith('skipped:')},
+        'tickers': tickers,
+        'dry_run': dry_run,
+    }
+    logger.info(f"Statement import{' (dry run)' if dry_run else ''}: {summary['rows']} rows, "
+                f"inserted {summary['inserted']}, {summary['duplicates']} duplicates")
+    return summary
+
+
+def detect_encoding(binary: IO[bytes]) -> str:
+    """앞부분을 읽어 UTF-8(BOM 포함) / CP949(EUC-KR) 판별 후 스트림 위치 복구"""
+    head = binary.read(4096)
+    binary.seek(0)
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3:  # 4KB 경계에서 잘린 문자가 아니면 UTF-8이 아님
+            return 'cp949'
+    return 'utf-8-sig'
+
+
+def open_text(binary: IO[bytes], encoding: Optional[str] = None) -> IO[str]:
+    """바이너리 스트림을 CSV용 텍스트 스트림으로 감싸기 (파일 전체를 메모리에 올리지 않음)"""
+    return io.TextIOWrapper(binary, encoding=encoding or detect_encoding(binary), newline='')
+
+
+def main():
+    import argparse
+    from app import app
+
+    parser = argparse.ArgumentParser(description="증권사 거래내역 CSV 가져오기")
+    parser.add_argument('files', nargs='+', help="dollorList.csv / wonList.csv 형식 파일")
+    parser.add_argument('--dry-run', action='store_true', help="저장하지 않고 결과만 확인")
+    parser.add_argument('--encoding', help="파일 인코딩 (기본: 자동 판별)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    with app.app_context():
+        streams = [open_text(open(path, 'rb'), args.encoding) for path in args.files]
+        try:
+            summary = import_statements(streams, args.chunk_size, args.dry_run)
+        finally:
+            for stream in streams:
+                stream.close()
+
+    print(f"📊 {summary['rows']}행 처리{' (dry run)' if summary['dry_run'] else ''}")
+    for record_type, count in summary['inserted'].items():
+        print(f"  ✅ {record_type}: {count}건 저장")
+    print(f"  ♻️  중복 {summary['duplicates']}건 건너뜀")
+    for kind, count in summary['skipped'].items():
+        print(f"  ⏭️  {kind}: {count}건 건너뜀")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+로트 단위 포지션 엔진
+매수 거래마다 로트를 만들고, 매도 거래가 입력되면 매칭 방식에 따라 로트를 소진(부분 소진 시 잔여 수량/원가 분할)하며
+로트별 실현 손익(USD/KRW)을 realized_gains에 확정 기록합니다.
+실현 손익 조회는 전체 거래 재계산 없이 (ticker, sell_date) 인덱스 조회로 처리됩니다.
+
+매칭 방식:
+    fifo     : 먼저 매수한 로트부터 소진
+    average  : 보유 중인 모든 로트에서 잔여 수량 비율대로 소진 (평균 원가와 같은 실현 원가)
+    specific : 요청에 지정한 로트(lot_id 또는 buy_transaction_id)와 수량만 소진
+"""
+
+import logging
+import os
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from .models import RealizedGain, TaxLot, Transaction, db
+from .cost_basis import DEFAULT_EXCHANGE_RATE
+from .holdings_ledger import is_backdated
+
+logger = logging.getLogger(__name__)
+
+LOT_METHODS = ('fifo', 'average', 'specific')
+
+
+def _default_lot_method() -> str:
+    """TAX_LOT_METHOD 환경 변수 (지정 로트 없이 쓸 수 있는 fifo/average만 허용, 그 외에는 fifo)"""
+    method = os.getenv('TAX_LOT_METHOD', 'fifo').strip().lower()
+    if method not in LOT_METHODS or method == 'specific':
+        logger.error(f"Tax lots: invalid TAX_LOT_METHOD {method!r} (use fifo or average), falling back to fifo")
+        return 'fifo'
+    return method
+
+
+DEFAULT_LOT_METHOD = _default_lot_method()
+
+SHARES_QUANT = Decimal('0.00000001')
+USD_QUANT = Decimal('0.00000001')
+KRW_QUANT = Decimal('0.01')
+
+
+def _decimal(value) -> Decimal:
+    return Decimal(str(value or 0))
+
+
+def _krw_amount(txn) -> Decimal:
+    """거래의 원화 금액 (입력값이 없으면 거래 환율로 환산)"""
+    if txn.amount_krw:
+        return abs(_decimal(txn.amount_krw))
+    rate = _decimal(txn.exchange_rate or DEFAULT_EXCHANGE_RATE)
+    return abs(_decimal(txn.amount)) * rate
+
+
+def open_lot(txn: Transaction) -> TaxLot:
+    """매수 거래로 로트 생성 (커밋하지 않음)"""
+    shares = abs(_decimal(txn.shares))
+    cost_usd = abs(_decimal(txn.amount)).quantize(USD_QUANT)
+    cost_krw = _krw_amount(txn).quantize(KRW_QUANT)
+
+    lot = TaxLot(
+        ticker=txn.ticker,
+        buy_transaction_id=txn.transaction_id,
+        acquired_date=txn.date,
+        exchange_rate=txn.exchange_rate,
+        original_shares=shares,
+        remaining_shares=shares,
+        cost_basis_usd=cost_usd,
+        remaining_cost_usd=cost_usd,
+        cost_basis_krw=cost_krw,
+        remaining_cost_krw=cost_krw,
+    )
+    db.session.add(lot)
+    return lot
+
+
+def _open_lots(ticker: str) -> List[TaxLot]:
+    """잔여 수량이 있는 로트 (매수일, 로트 ID 순)"""
+    return (TaxLot.query
+            .filter(TaxLot.ticker == ticker, TaxLot.remaining_shares > 0)
+            .order_by(TaxLot.acquired_date.asc(), TaxLot.lot_id.asc())
+            .with_for_update()
+            .all())
+
+
+def _select_fifo(lots: List[TaxLot], shares: Decimal) -> List[Tuple[TaxLot, Decimal]]:
+    picks = []
+    remaining = shares
+    for lot in lots:
+        if remaining <= 0:
+            break
+        take = min(_decimal(lot.remaining_shares), remaining)
+        picks.append((lot, take))
+        remaining -= take
+    return picks
+
+
+def _select_average(lots: List[TaxLot], shares: Decimal) -> List[Tuple[TaxLot, Decimal]]:
+    total_open = sum((_decimal(lot.remaining_shares) for lot in lots), Decimal('0'))
+    if total_open <= 0:
+        return []
+    if shares >= total_open:
+        return [(lot, _decimal(lot.remaining_shares)) for lot in lots]
+
+    ratio = shares / total_open
+    picks = []
+    allocated = Decimal('0')
+    for i, lot in enumerate(lots):
+        lot_shares = _decimal(lot.remaining_shares)
+        if i == len(lots) - 1:
+            take = min(lot_shares, shares - allocated)  # 반올림 잔차는 마지막 로트가 흡수
+        else:
+            take = (lot_shares * ratio).quantize(SHARES_QUANT)
+        if take > 0:
+            picks.append((lot, take))
+            allocated += take
+    return picks
+
+
+def _select_specific(lots: List[TaxLot], selections: List[Dict]) -> List[Tuple[TaxLot, Decimal]]:
+    by_lot_id = {lot.lot_id: lot for lot in lots}
+    by_buy_txn = {lot.buy_transaction_id: lot for lot in lots}
+
+    picks = []
+    for selection in selections:
+        if selection.get('lot_id') is not None:
+            lot = by_lot_id.get(int(selection['lot_id']))
+        else:
+            lot = by_buy_txn.get(int(selection.get('buy_transaction_id') or 0))
+        if lot is None:
+            raise ValueError(f"잔여 수량이 있는 로트를 찾을 수 없습니다: {selection}")
+
+        take = abs(_decimal(selection.get('shares')))
+        if take <= 0 or take > _decimal(lot.remaining_shares):
+            raise ValueError(f"로트 {lot.lot_id}의 잔여 수량({lot.remaining_shares})을 초과하거나 0 이하입니다: {take}")
+        picks.append((lot, take))
+    return picks
+
+
+def close_lots(txn: Transaction, method: str = DEFAULT_LOT_METHOD,
+               selections: Optional[List[Dict]] = None) -> List[RealizedGain]:
+    """
+    매도 거래로 로트를 소진하고 로트별 실현 손익 기록 (커밋하지 않음)
+
+    Args:
+        txn: 매도 거래 (transaction_id가 있어야 하므로 flush 이후 호출)
+        method: 'fifo', 'average', 'specific'
+        selections: specific 방식의 [{'lot_id' 또는 'buy_transaction_id', 'shares'}, ...]
+
+    Raises:
+        ValueError: 알 수 없는 방식이거나 지정 로트/수량이 잘못된 경우
+    """
+    if method not in LOT_METHODS:
+        raise ValueError(f"지원하지 않는 로트 매칭 방식입니다: {method}")
+
+    shares = abs(_decimal(txn.shares))
+    lots = _open_lots(txn.ticker)
+
+    if method == 'specific':
+        if not selections:
+            raise ValueError("specific 방식은 lot_selections가 필요합니다.")
+        picks = _select_specific(lots, selections)
+        if sum(take for _, take in picks) != shares:
+            raise ValueError(f"지정한 로트 수량 합계가 매도 수량({shares})과 다릅니다.")
+    elif method == 'average':
+        picks = _select_average(lots, shares)
+    else:
+        picks = _select_fifo(lots, shares)
+
+    matched = sum((take for _, take in picks), Decimal('0'))
+    if matched < shares:
+        # 로트 기록 이전 거래로 산 수량 등: 원가를 알 수 없는 부분은 실현 손익에서 제외
+        logger.warning(f"{txn.ticker} 매도 {shares}주 중 {shares - matched}주는 매칭할 로트가 없습니다 "
+                       f"(transaction {txn.transaction_id})")
+
+    proceeds_usd = abs(_decimal(txn.amount))
+    proceeds_krw = _krw_amount(txn)
+
+    gains = []
+    allocated_usd = Decimal('0')
+    allocated_krw = Decimal('0')
+    for i, (lot, take) in enumerate(picks):
+        lot_shares = _decimal(lot.remaining_shares)
+        if take == lot_shares:
+            cost_usd = _decimal(lot.remaining_cost_usd)
+            cost_krw = _decimal(lot.remaining_cost_krw)
+        else:
+            cost_usd = (_decimal(lot.remaining_cost_usd) * take / lot_shares).quantize(USD_QUANT)
+            cost_krw = (_decimal(lot.remaining_cost_krw) * take / lot_shares).quantize(KRW_QUANT)
+
+        # 매도 대금은 수량 비율로 배분, 전량 매칭이면 마지막 로트가 반올림 잔차 흡수
+        if i == len(picks) - 1 and matched == shares:
+            sale_usd = proceeds_usd.quantize(USD_QUANT) - allocated_usd
+            sale_krw = proceeds_krw.quantize(KRW_QUANT) - allocated_krw
+        else:
+            sale_usd = (proceeds_usd * take / shares).quantize(USD_QUANT)
+            sale_krw = (proceeds_krw * take / shares).quantize(KRW_QUANT)
+        allocated_usd += sale_usd
+        allocated_krw += sale_krw
+
+        lot.remaining_shares = lot_shares - take
+        lot.remaining_cost_usd = _decimal(lot.remaining_cost_usd) - cost_usd
+        lot.remaining_cost_krw = _decimal(lot.remaining_cost_krw) - cost_krw
+
+        gain = RealizedGain(
+            sell_transaction_id=txn.transaction_id,
+            lot_id=lot.lot_id,
+            buy_transaction_id=lot.buy_transaction_id,
+            ticker=txn.ticker,
+            method=method,
+            sell_date=txn.date,
+            acquired_date=lot.acquired_date,
+            shares=take,
+            proceeds_usd=sale_usd,
+            cost_basis_usd=cost_usd,
+            realized_pnl_usd=sale_usd - cost_usd,
+            proceeds_krw=sale_krw,
+            cost_basis_krw=cost_krw,
+            realized_pnl_krw=sale_krw - cost_krw,
+        )
+        db.session.add(gain)
+        gains.append(gain)
+
+    return gains
+
+
+def apply_transaction_lots(txn: Transaction, method: Optional[str] = None,
+                           selections: Optional[List[Dict]] = None) -> List[RealizedGain]:
+    """
+    새 거래를 로트에 반영 (거래 INSERT와 같은 DB 트랜잭션 안에서 호출, 커밋하지 않음)
+    이전 날짜로 입력된 거래면 매칭 순서가 바뀌므로 해당 종목 로트를 재구축
+
+    Returns:
+        이번 매도로 기록된 실현 손익 목록 (매수면 빈 리스트)
+    """
+    method = method or DEFAULT_LOT_METHOD
+    if is_backdated(txn):
+        logger.info(f"Tax lots: rebuilding {txn.ticker} for backdated transaction {txn.transaction_id}")
+        if selections:
+            selections = _by_buy_transaction(selections)
+        overrides = {txn.transaction_id: (method, selections)} if txn.type.upper() == 'SELL' else {}
+        rebuild_ticker_lots(txn.ticker, overrides)
+        return RealizedGain.query.filter_by(sell_transaction_id=txn.transaction_id).all()
+
+    if txn.type.upper() == 'BUY':
+        open_lot(txn)
+        return []
+    if txn.type.upper() == 'SELL':
+        return close_lots(txn, method, selections)
+    return []
+
+
+def _by_buy_transaction(selections: List[Dict]) -> List[Dict]:
+    """지정 로트를 buy_transaction_id 기준으로 변환 (재구축하면 lot_id가 바뀌므로)"""
+    converted = []
+    for selection in selections:
+        if selection.get('lot_id') is not None:
+            lot = db.session.get(TaxLot, int(selection['lot_id']))
+            if lot is None:
+                raise ValueError(f"로트를 찾을 수 없습니다: {selection}")
+            selection = {'buy_transaction_id': lot.buy_transaction_id, 'shares': selection.get('shares')}
+        converted.append(selection)
+    return converted
+
+
+def _recorded_matches(ticker: str) -> Dict[int, Tuple[str, Optional[List[Dict]]]]:
+    """기존 매도별 매칭 방식과 지정 로트 (재구축 시 같은 매칭 재현)"""
+    matches: Dict[int, Tuple[str, Optional[List[Dict]]]] = {}
+    selections = defaultdict(list)
+    for gain in RealizedGain.query.filter_by(ticker=ticker).all():
+        matches[gain.sell_transaction_id] = (gain.method, None)
+        if gain.method == 'specific':
+            selections[gain.sell_transaction_id].append(
+                {'buy_transaction_id': gain.buy_transaction_id, 'shares': gain.shares}
+            )
+    for sell_id, lot_selections in selections.items():
+        matches[sell_id] = ('specific', lot_selections)
+    return matches
+
+
+def rebuild_ticker_lots(ticker: str, overrides: Optional[Dict] = None):
+    """
+    종목 하나의 로트와 실현 손익을 전체 거래로 재구축 (커밋하지 않음)
+    기존 매도의 매칭 방식/지정 로트는 유지
+
+    Args:
+        overrides: {sell_transaction_id: (method, selections)} 새로 입력된 매도의 매칭 방식
+    """
+    matches = _recorded_matches(ticker)
+    matches.update(overrides or {})
+
+    RealizedGain.query.filter_by(ticker=ticker).delete(synchronize_session=False)
+    TaxLot.query.filter_by(ticker=ticker).delete(synchronize_session=False)
+    db.session.flush()
+
+    transactions = (Transaction.query.filter_by(ticker=ticker)
+                    .order_by(Transaction.date.asc(), Transaction.transaction_id.asc())
+                    .all())
+    for txn in transactions:
+        if txn.type.upper() == 'BUY':
+            open_lot(txn)  # 매도 처리 시 로트 조회의 autoflush로 모아서 INSERT
+        elif txn.type.upper() == 'SELL':
+            method, selections = matches.get(txn.transaction_id, (DEFAULT_LOT_METHOD, None))
+            try:
+                close_lots(txn, method, selections)
+            except ValueError as e:
+                # 재구축 후 지정 로트가 더 이상 유효하지 않으면 기본 방식으로 대체
+                logger.warning(f"Tax lots: {txn.ticker} sell {txn.transaction_id} falls back to "
+                               f"{DEFAULT_LOT_METHOD}: {e}")
+                close_lots(txn, DEFAULT_LOT_METHOD)
+    db.session.flush()
+
+
+def rebuild_all_lots() -> Dict:
+    """전체 종목 로트/실현 손익 재구축 (커밋 포함, 로트 도입 이전 거래 백필용)"""
+    tickers = [row[0] for row in db.session.query(Transaction.ticker).distinct().order_by(Transaction.ticker).all()]
+    try:
+        for ticker in tickers:
+            rebuild_ticker_lots(ticker)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return {
+        'tickers': len(tickers),
+        'lots': TaxLot.query.count(),
+        'realized_gains': RealizedGain.query.count(),
+    }
+
+
+def serialize_lot(lot: TaxLot) -> Dict:
+    return {
+        "lot_id": lot.lot_id,
+        "ticker": lot.ticker,
+        "buy_transaction_id": lot.buy_transaction_id,
+        "acquired_date": lot.acquired_date.isoformat(),
+        "exchange_rate": float(lot.exchange_rate or 0),
+        "original_shares": float(lot.original_shares),
+        "remaining_shares": float(lot.remaining_shares),
+        "cost_basis_usd": float(lot.cost_basis_usd),
+        "remaining_cost_usd": float(lot.remaining_cost_usd),
+        "cost_basis_krw": float(lot.cost_basis_krw),
+        "remaining_cost_krw": float(lot.remaining_cost_krw),
+    }
+
+
+def serialize_gain(gain: RealizedGain) -> Dict:
+    return {
+        "id": gain.gain_id,
+        "ticker": gain.ticker,
+        "sell_transaction_id": gain.sell_transaction_id,
+        "lot_id": gain.lot_id,
+        "buy_transaction_id": gain.buy_transaction_id,
+        "method": gain.method,
+        "sell_date": gain.sell_date.isoformat(),
+        "acquired_date": gain.acquired_date.isoformat() if gain.acquired_date else None,
+        "shares": float(gain.shares),
+        "proceeds_usd": float(gain.proceeds_usd),
+        "cost_basis_usd": float(gain.cost_basis_usd),
+        "realized_pnl_usd": float(gain.realized_pnl_usd),
+        "proceeds_krw": float(gain.proceeds_krw),
+        "cost_basis_krw": float(gain.cost_basis_krw),
+        "realized_pnl_krw": float(gain.realized_pnl_krw),
+    }
+
+
+def get_realized_gains(ticker: Optional[str] = None,
+                       start: Optional[date] = None,
+                       end: Optional[date] = None) -> Dict:
+    """
+    실현 손익 조회 ((ticker, sell_date) 인덱스 조회 + SQL 합계)
+
+    Returns:
+        {'gains': [...], 'summary': {...}, 'by_ticker': {ticker: {...}}}
+    """
+    filters = []
+    if ticker:
+        filters.append(RealizedGain.ticker == ticker.upper())
+    if start:
+        filters.append(RealizedGain.sell_date >= start)
+    if end:
+        filters.append(RealizedGain.sell_date <= end)
+
+    gains = (RealizedGain.query.filter(*filters)
+             .order_by(RealizedGain.sell_date.desc(), RealizedGain.gain_id.desc())
+             .all())
+
+    totals = (db.session.query(
+                RealizedGain.ticker,
+                func.sum(RealizedGain.shares),
+                func.sum(RealizedGain.proceeds_usd),
+                func.sum(RealizedGain.cost_basis_usd),
+                func.sum(RealizedGain.realized_pnl_usd),
+                func.sum(RealizedGain.realized_pnl_krw))
+              .filter(*filters)
+              .group_by(RealizedGain.ticker)
+              .all())
+
+    by_ticker = {}
+    summary = {"shares": 0.0, "proceeds_usd": 0.0, "cost_basis_usd": 0.0,
+               "realized_pnl_usd": 0.0, "realized_pnl_krw": 0.0}
+    for symbol, shares, proceeds, cost, pnl_usd, pnl_krw in totals:
+        row = {
+            "shares": float(shares or 0),
+            "proceeds_usd": float(proceeds or 0),
+            "cost_basis_usd": float(cost or 0),
+            "realized_pnl_usd": float(pnl_usd or 0),
+            "realized_pnl_krw": float(pnl_krw or 0),
+        }
+        by_ticker[symbol] = row
+        for key, value in row.items():
+            summary[key] += value
+
+    return {
+        'gains': [serialize_gain(gain) for gain in gains],
+        'summary': summary,
+        'by_ticker': by_ticker,
+    }
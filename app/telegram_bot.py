@@ -12,7 +12,12 @@ from .models import Transaction, Holding, Dividend, db
 # Flask 앱 임포트
 from flask import current_app
 # 스케줄러 임포트
-from .scheduler import update_stock_price, get_scheduler_status, calculate_portfolio_pnl, send_daily_portfolio_report
+from .scheduler import (update_stock_price, get_scheduler_status, calculate_portfolio_pnl, send_daily_portfolio_report,
+                        format_portfolio_report)
+from .provider_health import ProviderUnavailable, get_provider_health
+from .toss_api.async_client import TossAPIError
+from .toss_api.service import TossStockService
+from .toss_api.tickers import tickers as toss_tickers
 
 # python-telegram-bot 라이브러리 임포트
 from telegram import Update
@@ -129,83 +134,8 @@ async def portfolio_report_command(update: Update, context: ContextTypes.DEFAULT
                 await update.message.reply_text(f'❌ 오류: {pnl_data["message"]}')
                 return
             
-            # 리포트 메시지 생성 (send_daily_portfolio_report와 유사하지만 간소화)
-            return_rate = pnl_data['total_return_rate']
-            
-            # 경고 이모지 설정
-            if return_rate <= -5.0:
-                warning_emoji = "🚨"
-            elif return_rate <= -3.0:
-                warning_emoji = "⚠️"
-            elif return_rate >= 5.0:
-                warning_emoji = "🎉"
-            elif return_rate >= 3.0:
-                warning_emoji = "📈"
-            else:
-                warning_emoji = "📊"
-            
-            # 경고 레벨 설정 (스케줄러와 동일)
-            warning_level = ""
-            
-            if return_rate <= -5.0:
-                warning_level = "🚨 심각한 손실 경고!"
-            elif return_rate <= -3.0:
-                warning_level = "⚠️ 손실 주의 경고!"
-            
-            # 현재 시간 표시 (스케줄러와 동일)
-            from datetime import datetime
-            current_time_str = datetime.now().strftime('%Y-%m-%d %H:%M')
-            
-            message_parts = [f"{warning_emoji} <b>포트폴리오 현황 리포트</b> ({current_time_str})"]
-            message_parts.append("")
-            
-            # 경고 메시지 추가 (스케줄러와 동일)
-            if warning_level:
-                message_parts.append(f"{warning_level}")
-                message_parts.append("")
-            
-            # 전체 포트폴리오 요약
-            message_parts.append(f"💰 <b>총 포트폴리오 가치</b>")
-            message_parts.append(f"  • 투자금: ${pnl_data['total_invested_usd']:,.2f}")
-            message_parts.append(f"  • 현재가치: ${pnl_data['total_current_value_usd']:,.2f}")
-            message_parts.append(f"  • 받은 배당금: ${pnl_data['total_dividends_usd']:,.2f}")
-            message_parts.append("")
-            
-            # 총 손익 및 수익률
-            pnl_symbol = "+" if pnl_data['total_pnl_usd'] >= 0 else ""
-            rate_symbol = "+" if return_rate >= 0 else ""
-            
-            message_parts.append(f"📊 <b>총 손익 (미실현 + 배당)</b>")
-            message_parts.append(f"  • 미실현 손익: {pnl_symbol}${pnl_data['total_unrealized_pnl_usd']:,.2f}")
-            message_parts.append(f"  • 총 손익: {pnl_symbol}${pnl_data['total_pnl_usd']:,.2f}")
-            message_parts.append(f"  • 총 수익률: {rate_symbol}{return_rate:.2f}%")
-            message_parts.append("")
-            
-            # 종목별 상세 (모든 종목 표시)
-            sorted_holdings = sorted(pnl_data['holdings_data'], key=lambda x: x['total_pnl_usd'], reverse=True)
-            
-            message_parts.append(f"📈 <b>종목별 현황 (전체 {len(sorted_holdings)}개)</b>")
-            for holding in sorted_holdings:
-                pnl_emoji = "📈" if holding['total_pnl_usd'] >= 0 else "📉"
-                pnl_sign = "+" if holding['total_pnl_usd'] >= 0 else ""
-                rate_sign = "+" if holding['return_rate'] >= 0 else ""
-                
-                message_parts.append(
-                    f"{pnl_emoji} <code>{holding['ticker']}</code>: "
-                    f"{pnl_sign}${holding['total_pnl_usd']:,.2f} ({rate_sign}{holding['return_rate']:.1f}%)"
-                )
-                
-                if holding['dividends_usd'] > 0:
-                    message_parts.append(f"     배당: ${holding['dividends_usd']:,.2f} ({holding['dividend_count']}회)")
-            
-            message_parts.append("")
-            
-            # 원화 환산
-            total_pnl_krw = pnl_data['total_pnl_usd'] * pnl_data['current_rate']
-            message_parts.append(f"💱 <b>원화 환산</b> (₩{pnl_data['current_rate']:,.0f})")
-            message_parts.append(f"  • 총 손익: {pnl_symbol}₩{total_pnl_krw:,.0f}")
-            
-            response = '\n'.join(message_parts)
+            # 일일 리포트와 같은 평가 결과/메시지 형식 사용
+            response = format_portfolio_report(pnl_data, "포트폴리오 현황 리포트")
             await update.message.reply_text(response, parse_mode='HTML')
             
     except Exception as e:
@@ -227,6 +157,40 @@ async def test_daily_report_command(update: Update, context: ContextTypes.DEFAUL
     except Exception as e:
         await update.message.reply_text(f'❌ 일일 리포트 테스트 중 오류 발생: {e}')
 
+# 비동기 클라이언트는 프로세스 전역 공유이므로 봇 이벤트 루프에서도 같은 rate limiter를 사용
+toss_service = TossStockService()
+
+@restricted
+async def price_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """/price 명령어 처리 - 토스 API 현재가 조회 (봇 이벤트 루프에서 바로 await)"""
+    if not context.args:
+        await update.message.reply_text('사용법: /price <티커>\n예시: /price NVDY')
+        return
+
+    ticker = context.args[0].strip().upper()
+    if ticker not in toss_tickers:
+        await update.message.reply_text(f'❌ {ticker}: 토스 종목 코드가 등록되지 않은 티커입니다.')
+        return
+
+    # 시세 라우터와 같은 토스 프로바이더 상태(서킷 브레이커/백오프)를 사용
+    health = get_provider_health('toss')
+    try:
+        health.before_call()
+        price = await toss_service.get_current_price_async(toss_tickers[ticker])
+    except ProviderUnavailable as e:
+        await update.message.reply_text(f'⏳ {e}')
+        return
+    except TossAPIError as e:
+        health.record_failure(e)
+        await update.message.reply_text(f'❌ {ticker} 현재가 조회 실패: {e}')
+        return
+    health.record_success()
+
+    if price is None:
+        await update.message.reply_text(f'❌ {ticker} 현재가 정보가 없습니다.')
+        return
+    await update.message.reply_text(f'💵 {ticker} 현재가: ${price:.3f}')
+
 @restricted
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """사용자가 /start 명령어를 보냈을 때 실행됩니다."""
@@ -234,7 +198,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         '🤖 커버드 콜 포트폴리오 관리 봇입니다!\n\n'
         '📊 포트폴리오 리포트:\n'
         '/portfolio_report - 현재 포트폴리오 리포트 (미실현 + 배당금)\n'
-        '/test_report - 일일 리포트 테스트 전송\n\n'
+        '/test_report - 일일 리포트 테스트 전송\n'
+        '/price <티커> - 현재가 조회\n\n'
         
         '💳 신용카드 지출 통계:\n'
         '/week - 이번 주 카드 지출 통계\n'
@@ -1804,6 +1769,7 @@ def run_telegram_bot_in_thread():
     # 포트폴리오 리포트 관련 명령어
     application.add_handler(CommandHandler("portfolio_report", portfolio_report_command))
     application.add_handler(CommandHandler("test_report", test_daily_report_command))
+    application.add_handler(CommandHandler("price", price_command))
     
     # 카드 통계 관련 명령어
     application.add_handler(CommandHandler("week", week_stats))
@@ -4,6 +4,8 @@ Toss Invest API Client
 """
 
 from .client import TossAPIClient
+from .async_client import AsyncTossAPIClient, TossAPIError, TossAPITimeout, get_async_client
 from .parser import TossDataParser
 
-__all__ = ['TossAPIClient', 'TossDataParser']
\ No newline at end of file
+__all__ = ['TossAPIClient', 'AsyncTossAPIClient', 'TossAPIError', 'TossAPITimeout',
+           'get_async_client', 'TossDataParser']
\ No newline at end of file
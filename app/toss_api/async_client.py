@@ -0,0 +1,324 @@
+"""
+Async Toss API Client
+aiohttp 기반 토스 증권 API 비동기 클라이언트
+- 이벤트 루프별 keep-alive 커넥션 풀 공유
+- asyncio 네이티브 rate limiter (스레드/루프 간 호출 간격 공유)
+- 지터를 섞은 지수 백오프 재시도
+- 최종 실패는 None 대신 TossAPIError로 올려 호출 측(프로바이더 게이트)이 한도 초과/시간 초과를 기록
+
+클라이언트와 rate limiter는 get_async_client()로 프로세스 전역 하나를 공유합니다.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+import aiohttp
+
+from .client import TossAPIClient
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TossAPIError(Exception):
+    """
+    재시도 후에도 실패한 토스 API 요청
+
+    Attributes:
+        status: HTTP 상태 코드 (연결 오류/시간 초과면 None)
+        retry_after: 429/503 응답의 Retry-After (초, 없으면 None)
+    """
+
+    def __init__(self, label: str, message: str, status: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        self.status = status
+        self.retry_after = retry_after
+        detail = f"HTTP {status} {message}".strip() if status else message
+        super().__init__(f"Toss API {label} 실패: {detail}")
+
+
+class TossAPITimeout(TossAPIError, TimeoutError):
+    """응답 시간 초과 (TimeoutError이므로 서킷 브레이커가 시간 초과로 집계)"""
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Retry-After 헤더 (초 단위만 지원)"""
+    try:
+        value = headers.get('Retry-After')
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncRateLimiter:
+    """
+    최소 호출 간격 보장 rate limiter
+
+    호출마다 다음 슬롯을 예약하고 그 시각까지 asyncio.sleep으로 기다리므로 이벤트 루프를 막지 않음.
+    슬롯 예약만 threading.Lock으로 보호하여 여러 이벤트 루프(텔레그램 봇, 웹 워커)가 같은 간격을 공유
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """지수 백오프 + full jitter 대기 시간 (동시 재시도가 한 시점에 몰리지 않도록)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AsyncTossAPIClient:
+    """토스 증권 API 비동기 클라이언트"""
+
+    BASE_URL = TossAPIClient.BASE_URL
+    STOCK_INFO_ENDPOINT = TossAPIClient.STOCK_INFO_ENDPOINT
+    STOCK_PRICES_ENDPOINT = TossAPIClient.STOCK_PRICES_ENDPOINT
+    MAX_CODES_PER_REQUEST = TossAPIClient.MAX_CODES_PER_REQUEST
+
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+        'Accept': 'application/json',
+        'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
+        'Referer': 'https://tossinvest.com/'
+    }
+
+    def __init__(self,
+                 rate_limit_delay: float = 0.1,
+                 max_connections: int = 10,
+                 keepalive_timeout: float = 30.0):
+        """
+        Args:
+            rate_limit_delay: API 호출 간 최소 간격 (초)
+            max_connections: 이벤트 루프별 커넥션 풀 최대 연결 수
+            keepalive_timeout: 유휴 keep-alive 연결 유지 시간 (초)
+        """
+        self.rate_limiter = AsyncRateLimiter(rate_limit_delay)
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        # aiohttp 세션은 생성된 이벤트 루프에서만 사용할 수 있으므로 루프별로 하나씩 유지
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._sessions_lock = threading.Lock()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        with self._sessions_lock:
+            # asyncio.run() 등으로 종료된 루프의 세션은 더 이상 쓸 수 없으므로 정리
+            for closed_loop in [l for l in self._sessions if l.is_closed()]:
+                del self._sessions[closed_loop]
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.max_connections,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=300,
+                )
+                session = aiohttp.ClientSession(connector=connector, headers=self.HEADERS)
+                self._sessions[loop] = session
+            return session
+
+    async def _get_json(self,
+                        endpoint: str,
+                        stock_codes: List[str],
+                        timeout: float,
+                        retries: int,
+                        label: str) -> Optional[Dict[str, Any]]:
+        """
+        GET 요청 (재시도 가능한 오류는 지수 백오프로 재시도)
+
+        Raises:
+            TossAPIError: 최종 실패 (상태 코드, Retry-After 포함)
+            TossAPITimeout: 마지막 시도까지 응답 시간 초과
+        """
+        if not stock_codes:
+            return None
+
+        url = urljoin(self.BASE_URL, endpoint)
+        params = {'codes': ','.join(stock_codes)}
+        session = self._get_session()
+
+        for attempt in range(retries):
+            await self.rate_limiter.acquire()
+            try:
+                async with session.get(url, params=params,
+                                       timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status >= 400:
+                        raise TossAPIError(label, response.reason or '', response.status,
+                                           parse_retry_after(response.headers))
+                    return await response.json(content_type=None)
+
+            except TossAPIError as e:
+                error = e
+            except asyncio.TimeoutError:
+                error = TossAPITimeout(label, f"{timeout}s 응답 시간 초과")
+            except aiohttp.ClientError as e:
+                error = TossAPIError(label, str(e) or type(e).__name__)
+
+            retryable = error.status is None or error.status in RETRYABLE_STATUSES
+            # Retry-After를 받은 경우 여기서 기다리지 않고 올려서 프로바이더 전역 백오프가 그 시간을 지키도록 함
+            if not retryable or error.retry_after is not None or attempt == retries - 1:
+                print(f"{error} (최종)")
+                raise error
+            print(f"{error} (재시도 {attempt + 1}/{retries})")
+            await asyncio.sleep(backoff_delay(attempt))
+
+        return None
+
+    async def get_stock_info(self,
+                             stock_codes: List[str],
+                             timeout: float = 10,
+                             retries: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        주식 정보 조회
+
+        Args:
+            stock_codes: 종목 코드 리스트 (예: ['A322000', 'A005930'])
+            timeout: 요청 타임아웃 (초)
+            retries: 재시도 횟수
+
+        Returns:
+            API 응답 JSON (종목 코드가 없으면 None)
+
+        Raises:
+            TossAPIError: 재시도 후에도 실패한 경우
+        """
+        return await self._get_json(self.STOCK_INFO_ENDPOINT, stock_codes, timeout, retries, '요청')
+
+    async def get_stock_prices(self,
+                               stock_codes: List[str],
+                               timeout: float = 10,
+                               retries: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        주식 가격 조회
+
+        Args:
+            stock_codes: 종목 코드 리스트 (최대 MAX_CODES_PER_REQUEST개)
+            timeout: 요청 타임아웃 (초)
+            retries: 재시도 횟수
+
+        Returns:
+            API 응답 JSON (종목 코드가 없으면 None)
+
+        Raises:
+            TossAPIError: 재시도 후에도 실패한 경우
+        """
+        return await self._get_json(self.STOCK_PRICES_ENDPOINT, stock_codes, timeout, retries, '가격 요청')
+
+    async def get_single_stock_price(self,
+                                     stock_code: str,
+                                     timeout: float = 10,
+                                     retries: int = 3) -> Optional[Dict[str, Any]]:
+        """
+        단일 종목 가격 조회
+
+        Returns:
+            단일 종목 가격 정보 딕셔너리 또는 None (응답에 가격이 없는 경우)
+
+        Raises:
+            TossAPIError: 재시도 후에도 실패한 경우
+        """
+        result = await self.get_stock_prices([stock_code], timeout, retries)
+
+        if result and result.get('result') and result['result'].get('prices'):
+            return result['result']['prices'][0]
+        return None
+
+    async def get_many_stock_prices(self,
+                                    stock_codes: List[str],
+                                    timeout: float = 10,
+                                    retries: int = 3) -> List[Dict[str, Any]]:
+        """
+        다중 종목 가격 조회
+        MAX_CODES_PER_REQUEST 단위 청크를 동시에 요청 (호출 간격은 rate limiter가 보장)
+
+        Returns:
+            가격 정보 딕셔너리 리스트
+
+        Raises:
+            TossAPIError: 청크 하나라도 최종 실패한 경우 (한도 초과가 있으면 그 오류를 우선)
+        """
+        codes = list(dict.fromkeys(stock_codes))
+        chunk_size = self.MAX_CODES_PER_REQUEST
+        # 모든 청크가 끝날 때까지 기다린 뒤 오류를 올림 (진행 중인 요청을 버려두지 않도록)
+        responses = await asyncio.gather(*(
+            self.get_stock_prices(codes[start:start + chunk_size], timeout, retries)
+            for start in range(0, len(codes), chunk_size)
+        ), return_exceptions=True)
+
+        errors = [response for response in responses if isinstance(response, BaseException)]
+        if errors:
+            raise next((e for e in errors if getattr(e, 'status', None) == 429), errors[0])
+
+        prices = []
+        for response in responses:
+            if response and response.get('result') and response['result'].get('prices'):
+                prices.extend(response['result']['prices'])
+        return prices
+
+    async def close(self):
+        """현재 이벤트 루프의 세션 정리"""
+        loop = asyncio.get_running_loop()
+        with self._sessions_lock:
+            session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_async_client() -> AsyncTossAPIClient:
+    """
+    프로세스 전역 공유 클라이언트
+
+    웹 워커, 스케줄러, 텔레그램 봇이 같은 rate limiter로 호출 간격을 지키고
+    이벤트 루프별 커넥션 풀을 재사용하도록 하나만 생성
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AsyncTossAPIClient()
+        return _client
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='toss-api-loop', daemon=True).start()
+        return _loop
+
+
+def run_sync(coro, timeout: Optional[float] = None):
+    """
+    동기 코드(Flask 워커 스레드, 스케줄러)에서 코루틴 실행
+
+    모든 호출이 하나의 백그라운드 이벤트 루프를 공유하므로 웹 계층 전체가 같은 커넥션 풀을 재사용함
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _get_background_loop())
+    return future.result(timeout)
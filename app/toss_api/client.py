@@ -15,6 +15,7 @@ class TossAPIClient:
     BASE_URL = "https://wts-info-api.tossinvest.com/api/v2/"
     STOCK_INFO_ENDPOINT = "stock-infos"
     STOCK_PRICES_ENDPOINT = "stock-prices"
+    MAX_CODES_PER_REQUEST = 20  # 다중 종목 요청 1회당 최대 종목 수
     
     def __init__(self, rate_limit_delay: float = 0.1):
         """
@@ -166,12 +167,9 @@ class TossAPIClient:
             단일 종목 가격 정보 딕셔너리 또는 None
         """
         result = self.get_stock_prices([stock_code], timeout, retries)
-        print(f"      🌐 Toss API raw result for {stock_code}: {result}")
         
         if result and result.get('result') and result['result'].get('prices') and len(result['result']['prices']) > 0:
-            price_data = result['result']['prices'][0]
-            print(f"      📦 Extracted price data: {price_data}")
-            return price_data
+            return result['result']['prices'][0]
         return None
     
     def __del__(self):
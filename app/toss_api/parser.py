@@ -139,6 +139,31 @@ class TossDataParser:
             'raw': stock_data  # 원본 데이터 보존
         }
     
+    @staticmethod
+    def extract_current_price(price_data: Dict[str, Any]) -> Optional[float]:
+        """
+        가격 응답에서 현재가 추출
+        시간외 거래가가 있고 0이 아니면 사용, 그렇지 않으면 정규 거래가 사용
+        
+        Args:
+            price_data: 토스 가격 API 응답의 단일 종목 데이터
+            
+        Returns:
+            현재가 또는 None (유효한 가격이 없을 때)
+        """
+        after_market_close = (price_data.get('metaData') or {}).get('afterMarketClose')
+        close_price = price_data.get('close')
+        
+        # afterMarketClose가 0이 아닌 유효한 값인 경우에만 사용
+        if after_market_close is not None and float(after_market_close) > 0:
+            current_price = after_market_close
+        else:
+            current_price = close_price
+        
+        if current_price is not None and float(current_price) > 0:
+            return float(current_price)
+        return None
+    
     @staticmethod
     def is_tradeable(stock_data: Dict[str, Any]) -> bool:
         """
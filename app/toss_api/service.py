@@ -5,7 +5,9 @@ Toss API Service
 
 from typing import Dict, Any, Optional, List
 from .client import TossAPIClient
+from .async_client import get_async_client
 from .parser import TossDataParser
+from .tickers import tickers
 
 
 class TossStockService:
@@ -14,9 +16,11 @@ class TossStockService:
     def __init__(self, rate_limit_delay: float = 0.1):
         """
         Args:
-            rate_limit_delay: API 호출 간 지연 시간 (초)
+            rate_limit_delay: 동기 클라이언트의 API 호출 간 지연 시간 (초)
         """
         self.client = TossAPIClient(rate_limit_delay)
+        # 비동기 클라이언트는 프로세스 전역 공유 (인스턴스마다 만들면 rate limiter가 나뉨)
+        self.async_client = get_async_client()
         self.parser = TossDataParser()
     
     def get_stock_basic_info(self, stock_code: str) -> Optional[Dict[str, Any]]:
@@ -131,58 +135,109 @@ class TossStockService:
             현재 주가 (USD) 또는 None
         """
         price_data = self.client.get_single_stock_price(stock_code)
-        print(f"    🔍 Toss API response for {stock_code}: {price_data}")
-        
         if price_data:
-            # 시간외 거래가가 있고 0이 아니면 사용, 그렇지 않으면 정규 거래가 사용
-            after_market_close = price_data.get('metaData', {}).get('afterMarketClose')
-            close_price = price_data.get('close')
+            return self.parser.extract_current_price(price_data)
+        return None
+    
+    def get_multiple_current_prices(self, stock_codes: List[str]) -> Dict[str, float]:
+        """
+        다중 종목 현재가 조회
+        MAX_CODES_PER_REQUEST 단위로 나누어 요청하므로 N개 종목에 ceil(N/chunk)회 호출
+        
+        Args:
+            stock_codes: 종목 코드 리스트
+            
+        Returns:
+            종목별 현재가 딕셔너리 {종목코드: 현재가}
+        """
+        result = {}
+        
+        codes = list(dict.fromkeys(stock_codes))
+        chunk_size = self.client.MAX_CODES_PER_REQUEST
+        
+        for start in range(0, len(codes), chunk_size):
+            api_response = self.client.get_stock_prices(codes[start:start + chunk_size])
+            
+            if api_response and api_response.get('result') and api_response['result'].get('prices'):
+                for price_data in api_response['result']['prices']:
+                    code = price_data.get('code')
+                    if code:
+                        current_price = self.parser.extract_current_price(price_data)
+                        if current_price is not None:
+                            result[code] = current_price
+        
+        return result
+    
+    def get_current_prices_by_ticker(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        티커 기준 다중 종목 현재가 조회 (tickers.py 매핑 사용)
+        
+        Args:
+            symbols: 티커 리스트 (예: ['NVDY', 'TSLY'])
             
-            # afterMarketClose가 0이 아닌 유효한 값인 경우에만 사용
-            if after_market_close is not None and float(after_market_close) > 0:
-                current_price = after_market_close
-            else:
-                current_price = close_price
+        Returns:
+            티커별 현재가 딕셔너리 {티커: 현재가}, 매핑이 없거나 조회 실패한 티커는 제외
+        """
+        code_to_symbol = {tickers[symbol]: symbol for symbol in symbols if symbol in tickers}
+        prices = self.get_multiple_current_prices(list(code_to_symbol))
+        return {code_to_symbol[code]: price for code, price in prices.items() if code in code_to_symbol}
+    
+    async def get_current_price_async(self, stock_code: str) -> Optional[float]:
+        """
+        현재 주가 비동기 조회 (텔레그램 봇 이벤트 루프 등에서 await)
+        
+        Args:
+            stock_code: 종목 코드
             
-            print(f"    💰 Extracted price: {current_price} (afterMarket: {after_market_close}, close: {close_price})")
+        Returns:
+            현재 주가 (USD) 또는 None (응답에 가격이 없는 경우)
             
-            if current_price is not None and float(current_price) > 0:
-                return float(current_price)
+        Raises:
+            TossAPIError: API 요청이 최종 실패한 경우 (동기 get_current_price는 None 반환)
+        """
+        price_data = await self.async_client.get_single_stock_price(stock_code)
+        if price_data:
+            return self.parser.extract_current_price(price_data)
         return None
     
-    def get_multiple_current_prices(self, stock_codes: List[str]) -> Dict[str, float]:
+    async def get_multiple_current_prices_async(self, stock_codes: List[str]) -> Dict[str, float]:
         """
-        다중 종목 현재가 조회
+        다중 종목 현재가 비동기 조회
+        MAX_CODES_PER_REQUEST 단위 청크를 공유 커넥션 풀로 동시에 요청
         
         Args:
             stock_codes: 종목 코드 리스트
             
         Returns:
             종목별 현재가 딕셔너리 {종목코드: 현재가}
+            
+        Raises:
+            TossAPIError: 청크 요청이 최종 실패한 경우
         """
         result = {}
         
-        if not stock_codes:
-            return result
+        for price_data in await self.async_client.get_many_stock_prices(stock_codes):
+            code = price_data.get('code')
+            if code:
+                current_price = self.parser.extract_current_price(price_data)
+                if current_price is not None:
+                    result[code] = current_price
         
-        # API 응답 받기
-        api_response = self.client.get_stock_prices(stock_codes)
+        return result
+    
+    async def get_current_prices_by_ticker_async(self, symbols: List[str]) -> Dict[str, float]:
+        """
+        티커 기준 다중 종목 현재가 비동기 조회 (tickers.py 매핑 사용)
         
-        if api_response and api_response.get('result') and api_response['result'].get('prices'):
-            for price_data in api_response['result']['prices']:
-                code = price_data.get('code')
-                if code:
-                    # 시간외 거래가가 있고 0이 아니면 사용, 그렇지 않으면 정규 거래가 사용
-                    after_market_close = price_data.get('metaData', {}).get('afterMarketClose')
-                    close_price = price_data.get('close')
-                    
-                    # afterMarketClose가 0이 아닌 유효한 값인 경우에만 사용
-                    if after_market_close is not None and float(after_market_close) > 0:
-                        current_price = after_market_close
-                    else:
-                        current_price = close_price
-                    
-                    if current_price is not None and float(current_price) > 0:
-                        result[code] = float(current_price)
-        
-        return result
\ No newline at end of file
+        Args:
+            symbols: 티커 리스트 (예: ['NVDY', 'TSLY'])
+            
+        Returns:
+            티커별 현재가 딕셔너리 {티커: 현재가}, 매핑이 없거나 응답에 가격이 없는 티커는 제외
+            
+        Raises:
+            TossAPIError: API 요청이 최종 실패한 경우 (프로바이더 게이트가 실패로 기록)
+        """
+        code_to_symbol = {tickers[symbol]: symbol for symbol in symbols if symbol in tickers}
+        prices = await self.get_multiple_current_prices_async(list(code_to_symbol))
+        return {code_to_symbol[code]: price for code, price in prices.items() if code in code_to_symbol}
@@ -0,0 +1,250 @@
+"""
+포트폴리오 평가 서비스
+/holdings, /holdings/<ticker>, /portfolio, 스케줄러 손익 계산(일일 리포트, 텔레그램 /portfolio_report)이
+같은 평가 결과를 사용하도록 보유 종목 평가를 한 곳에서 계산합니다.
+
+결과는 변경 불가능한 객체(frozen dataclass)이며, holdings(거래 반영/주가 갱신)·dividends·exchange_rates
+데이터 버전이 바뀔 때만 다시 계산되므로 변경 사이의 반복 조회는 DB를 조회하지 않습니다.
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from .models import Dividend, ExchangeRate, Holding, db
+from .data_versions import PENDING_TABLES_KEY, data_version
+
+DEFAULT_EXCHANGE_RATE = 1400.0
+VERSION_TABLES = ('holdings', 'dividends', 'exchange_rates')
+
+
+def _rate(numerator: float, denominator: float) -> float:
+    return (numerator / denominator * 100) if denominator > 0 else 0
+
+
+@dataclass(frozen=True)
+class HoldingValuation:
+    """보유 종목 하나의 평가 결과"""
+    holding_id: int
+    ticker: str
+    shares: float
+    average_price: float
+    current_price: float
+    avg_exchange_rate: float
+    invested_usd: float
+    invested_krw: float
+    current_value_usd: float
+    current_value_krw: float  # 평균 매수 환율 기준
+    unrealized_pnl_usd: float
+    unrealized_pnl_krw: float
+    return_rate_usd: float
+    return_rate_krw: float
+    dividends_received_usd: float
+    dividends_withdrawn_usd: float
+    dividend_count: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    @property
+    def total_pnl_usd(self) -> float:
+        """미실현 손익 + 수령 배당금"""
+        return self.unrealized_pnl_usd + self.dividends_received_usd
+
+    def to_api_dict(self) -> Dict:
+        """/holdings 응답 형식"""
+        return {
+            "id": self.holding_id,
+            "ticker": self.ticker,
+            "total_shares": self.shares,
+            "total_invested_usd": self.invested_usd,
+            "total_invested_krw": self.invested_krw,
+            "average_price": self.average_price,
+            "current_price": self.current_price,
+            "current_value_usd": self.current_value_usd,
+            "current_value_krw": self.current_value_krw,
+            "unrealized_pnl_usd": self.unrealized_pnl_usd,
+            "unrealized_pnl_krw": self.unrealized_pnl_krw,
+            "return_rate_usd": self.return_rate_usd,
+            "return_rate_krw": self.return_rate_krw,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def to_report_dict(self) -> Dict:
+        """손익 리포트(calculate_portfolio_pnl) 종목 형식"""
+        return {
+            'ticker': self.ticker,
+            'shares': self.shares,
+            'avg_price': self.average_price,
+            'current_price': self.current_price,
+            'invested_usd': self.invested_usd,
+            'current_value_usd': self.current_value_usd,
+            'unrealized_pnl_usd': self.unrealized_pnl_usd,
+            'dividends_usd': self.dividends_received_usd,
+            'total_pnl_usd': self.total_pnl_usd,
+            'return_rate': _rate(self.total_pnl_usd, self.invested_usd),
+            'dividend_count': self.dividend_count
+        }
+
+
+@dataclass(frozen=True)
+class PortfolioValuation:
+    """포트폴리오 전체 평가 결과 (보유 수량 > 0 종목, 종목순)"""
+    version: str
+    holdings: Tuple[HoldingValuation, ...]
+    exchange_rate: float  # 최신 USD/KRW
+    total_invested_usd: float
+    total_invested_krw: float
+    total_current_value_usd: float
+    total_current_value_krw: float
+    withdrawn_dividends_usd: float  # 보유 종목의 현금 수령(인출) 배당금
+    all_dividends_usd: float  # 매도 완료 종목 포함 전체 수령 배당금
+
+    @property
+    def total_unrealized_pnl_usd(self) -> float:
+        return self.total_current_value_usd - self.total_invested_usd
+
+    @property
+    def total_unrealized_pnl_krw(self) -> float:
+        return self.total_current_value_krw - self.total_invested_krw
+
+    def holding(self, ticker: str) -> Optional[HoldingValuation]:
+        for item in self.holdings:
+            if item.ticker == ticker:
+                return item
+        return None
+
+    def to_portfolio_summary(self) -> Dict:
+        """/portfolio 응답의 평가 필드"""
+        # 배당금 수령 시점의 환율 대신 기본값 1400 사용
+        withdrawn_dividends_krw = self.withdrawn_dividends_usd * DEFAULT_EXCHANGE_RATE
+        pnl_with_dividends_usd = self.total_unrealized_pnl_usd + self.withdrawn_dividends_usd
+        pnl_with_dividends_krw = self.total_unrealized_pnl_krw + withdrawn_dividends_krw
+        return {
+            "total_invested_usd": self.total_invested_usd,
+            "total_invested_krw": self.total_invested_krw,
+            "total_current_value_usd": self.total_current_value_usd,
+            "total_current_value_krw": self.total_current_value_krw,
+            "total_unrealized_pnl_usd": self.total_unrealized_pnl_usd,
+            "total_unrealized_pnl_krw": self.total_unrealized_pnl_krw,
+            "total_return_rate_usd": _rate(self.total_unrealized_pnl_usd, self.total_invested_usd),
+            "total_return_rate_krw": _rate(self.total_unrealized_pnl_krw, self.total_invested_krw),
+            "total_dividends_usd": self.withdrawn_dividends_usd,
+            "total_dividends_krw": withdrawn_dividends_krw,
+            # 배당금 포함 총 손익
+            "total_pnl_with_dividends_usd": pnl_with_dividends_usd,
+            "total_pnl_with_dividends_krw": pnl_with_dividends_krw,
+            "total_return_with_dividends_usd": _rate(pnl_with_dividends_usd, self.total_invested_usd),
+            "total_return_with_dividends_krw": _rate(pnl_with_dividends_krw, self.total_invested_krw),
+        }
+
+    def to_pnl_report(self) -> Dict:
+        """손익 리포트 형식 (미실현 + 매도 완료 종목 포함 전체 배당금)"""
+        total_pnl_usd = self.total_unrealized_pnl_usd + self.all_dividends_usd
+        return {
+            'success': True,
+            'total_invested_usd': self.total_invested_usd,
+            'total_current_value_usd': self.total_current_value_usd,
+            'total_unrealized_pnl_usd': self.total_unrealized_pnl_usd,
+            'total_dividends_usd': self.all_dividends_usd,
+            'total_pnl_usd': total_pnl_usd,
+            'total_return_rate': _rate(total_pnl_usd, self.total_invested_usd),
+            'current_rate': self.exchange_rate,
+            'holdings_data': [item.to_report_dict() for item in self.holdings]
+        }
+
+
+def dividends_by_ticker() -> Dict[str, Tuple[int, float]]:
+    """
+    종목별 배당금 (횟수, 합계 USD), 매도 완료 종목 포함
+
+    배당금 행을 객체로 불러와 종목마다 거르지 않고 GROUP BY 한 번으로 집계 ((ticker, date) 인덱스 사용)
+    """
+    rows = db.session.execute(
+        select(Dividend.ticker, func.count(Dividend.dividend_id), func.sum(Dividend.amount)).group_by(Dividend.ticker)
+    ).all()
+    return {ticker: (count, float(total or 0)) for ticker, count, total in rows}
+
+
+def compute_portfolio_valuation(version: str = '') -> PortfolioValuation:
+    """보유 종목/최신 환율/종목별 배당금 횟수·합계를 각각 한 번씩 조회해 평가"""
+    holdings = Holding.query.filter(Holding.current_shares > 0).order_by(Holding.ticker).all()
+    latest_rate = db.session.execute(
+        select(ExchangeRate.usd_krw).order_by(ExchangeRate.timestamp.desc()).limit(1)
+    ).scalar()
+    dividends = dividends_by_ticker()
+
+    items = []
+    for holding in holdings:
+        shares = float(holding.current_shares)
+        current_price = float(holding.current_market_price)
+        avg_exchange_rate = float(holding.avg_exchange_rate or DEFAULT_EXCHANGE_RATE)
+        invested_usd = float(holding.total_cost_basis)
+        invested_krw = float(holding.total_invested_krw or 0)
+        current_value_usd = shares * current_price
+        current_value_krw = current_value_usd * avg_exchange_rate
+        unrealized_pnl_usd = current_value_usd - invested_usd
+        unrealized_pnl_krw = current_value_krw - invested_krw
+        items.append(HoldingValuation(
+            holding_id=holding.holding_id,
+            ticker=holding.ticker,
+            shares=shares,
+            average_price=float(holding.avg_purchase_price or 0),
+            current_price=current_price,
+            avg_exchange_rate=avg_exchange_rate,
+            invested_usd=invested_usd,
+            invested_krw=invested_krw,
+            current_value_usd=current_value_usd,
+            current_value_krw=current_value_krw,
+            unrealized_pnl_usd=unrealized_pnl_usd,
+            unrealized_pnl_krw=unrealized_pnl_krw,
+            return_rate_usd=_rate(unrealized_pnl_usd, invested_usd),
+            return_rate_krw=_rate(unrealized_pnl_krw, invested_krw),
+            dividends_received_usd=float(holding.total_dividends_received or 0),
+            dividends_withdrawn_usd=float(holding.dividends_withdrawn or 0),
+            dividend_count=dividends.get(holding.ticker, (0, 0.0))[0],
+            created_at=holding.created_at,
+            updated_at=holding.updated_at,
+        ))
+
+    return PortfolioValuation(
+        version=version,
+        holdings=tuple(items),
+        exchange_rate=float(latest_rate) if latest_rate else DEFAULT_EXCHANGE_RATE,
+        total_invested_usd=sum(item.invested_usd for item in items),
+        total_invested_krw=sum(item.invested_krw for item in items),
+        total_current_value_usd=sum(item.current_value_usd for item in items),
+        total_current_value_krw=sum(item.current_value_krw for item in items),
+        withdrawn_dividends_usd=sum(item.dividends_withdrawn_usd for item in items),
+        all_dividends_usd=sum(total for _, total in dividends.values()),
+    )
+
+
+class ValuationCache:
+    """데이터 버전별 평가 결과 하나만 보관 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valuation: Optional[PortfolioValuation] = None
+
+    def get(self) -> PortfolioValuation:
+        version = data_version(*VERSION_TABLES)
+        with self._lock:
+            if self._valuation is not None and self._valuation.version == version:
+                return self._valuation
+            valuation = compute_portfolio_valuation(version)
+            # 커밋 전 변경이 반영된 결과는 캐시하지 않음
+            if not set(VERSION_TABLES) & db.session.info.get(PENDING_TABLES_KEY, set()):
+                self._valuation = valuation
+            return valuation
+
+
+_cache = ValuationCache()
+
+
+def get_portfolio_valuation() -> PortfolioValuation:
+    """현재 데이터 버전의 포트폴리오 평가 (변경이 없으면 캐시된 결과)"""
+    return _cache.get()
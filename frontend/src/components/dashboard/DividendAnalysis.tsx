@@ -12,7 +12,7 @@ import {
 } from '@chakra-ui/react';
 import { useDashboardStore } from '@/store/dashboardStore';
 import { useExchangeRateStore } from '@/store/exchangeRateStore';
-import { useMemo } from 'react';
+import { useEffect, useMemo } from 'react';
 
 interface DividendStats {
   ticker: string;
@@ -39,9 +39,14 @@ interface MonthlyDividendTrend {
 }
 
 const DividendAnalysis = () => {
-  const { holdings, dividends, holdingsLoading, dividendsLoading } = useDashboardStore();
+  const { holdings, dividends, holdingsLoading, dividendsLoading, fetchDividends } = useDashboardStore();
   const { currentRate } = useExchangeRateStore();
 
+  // 전체 배당금 목록은 분석 탭을 열 때 조회 (이후 새 배당금은 스트림 이벤트로 반영)
+  useEffect(() => {
+    fetchDividends();
+  }, [fetchDividends]);
+
   // 배당금 통계 계산
   const dividendStats = useMemo(() => {
     const stats: DividendStats[] = [];
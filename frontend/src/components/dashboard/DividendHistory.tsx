@@ -11,57 +11,71 @@ import {
   Stack,
 } from '@chakra-ui/react';
 import { getTickerColor } from '@/utils/tickerColors';
-import { useDashboardStore, type DividendData } from '@/store/dashboardStore';
+import { type DividendData } from '@/store/dashboardStore';
+import { useDividendPages } from '@/hooks/useApi';
+
+// 화면에 표시하는 필드만 조회
+const DIVIDEND_FIELDS = [
+  'id',
+  'ticker',
+  'amount_usd',
+  'dividend_per_share',
+  'shares',
+  'payment_date',
+];
 
 const DividendHistory = () => {
   const [selectedSymbol, setSelectedSymbol] = useState('전체');
   const [currentPage, setCurrentPage] = useState(1);
   const itemsPerPage = 20;
+  // 목록은 선택한 종목의 현재 페이지와 표시 필드만 서버에서 조회
+  // 종목 목록/건수/총 배당금은 첫 페이지의 서버 요약 사용 (새 배당금은 스트림 이벤트가 재검증)
   const {
-    dividends,
-    dividendsLoading: isLoading,
-    dividendsError: error,
-  } = useDashboardStore();
+    pages,
+    summary,
+    hasMore,
+    isLoading,
+    error: pagesError,
+    size,
+    setSize,
+  } = useDividendPages<DividendData>(
+    {
+      ticker: selectedSymbol === '전체' ? undefined : selectedSymbol,
+      fields: DIVIDEND_FIELDS,
+    },
+    itemsPerPage
+  );
+  const error = pagesError ? '배당금 데이터를 불러오는데 실패했습니다.' : null;
 
   // Helper function to get dividend per share value
   const getDividendPerShare = (item: DividendData): number | null => {
-    const value = item.dividendPerShare;
+    const value = item.dividendPerShare ?? item.dividend_per_share;
     return typeof value === 'number' && value > 0 ? value : null;
   };
 
-  // 고유한 종목 목록 추출
-  const symbols = [
-    '전체',
-    ...Array.from(new Set(dividends.map((item: DividendData) => item.ticker))),
-  ];
+  // 배당금이 있는 종목 목록 (종목 필터와 무관)
+  const symbols = ['전체', ...(summary?.tickers ?? [])];
 
-  // 선택된 종목에 따라 필터링
-  const filteredHistory =
-    selectedSymbol === '전체'
-      ? dividends
-      : dividends.filter(
-          (item: DividendData) => item.ticker === selectedSymbol
-        );
-
-  // 날짜 순서대로 정렬 (최신순)
-  const sortedHistory = filteredHistory.sort(
-    (a: DividendData, b: DividendData) =>
-      new Date(b.payment_date).getTime() - new Date(a.payment_date).getTime()
-  );
-
-  // 페이지네이션 계산
-  const totalPages = Math.ceil(sortedHistory.length / itemsPerPage);
-  const startIndex = (currentPage - 1) * itemsPerPage;
-  const endIndex = startIndex + itemsPerPage;
-  const currentItems = sortedHistory.slice(startIndex, endIndex);
+  // 서버에서 (날짜, ID) 최신순으로 정렬된 페이지
+  const currentItems = pages?.[currentPage - 1]?.items ?? [];
+  const loadedCount = (pages ?? [])
+    .slice(0, currentPage)
+    .reduce((count, page) => count + page.items.length, 0);
+  const startIndex = loadedCount - currentItems.length;
+  const isLastPage = pages
+    ? currentPage >= pages.length && !hasMore
+    : true;
 
   // 종목 필터 변경 시 페이지 초기화
   React.useEffect(() => {
     setCurrentPage(1);
   }, [selectedSymbol]);
 
-  // 페이지 변경 함수
+  // 페이지 변경 함수 (다음 페이지는 마지막 행의 커서로 조회)
   const handlePageChange = (page: number) => {
+    if (page > size) {
+      setSize(page);
+    }
     setCurrentPage(page);
   };
 
@@ -108,7 +122,7 @@ const DividendHistory = () => {
           종목별 필터
         </Text>
         <SegmentGroup.Root
-          defaultValue='전체'
+          value={selectedSymbol}
           onValueChange={details => setSelectedSymbol(details.value || '전체')}
         >
           <SegmentGroup.Indicator />
@@ -131,18 +145,11 @@ const DividendHistory = () => {
               배당금
             </Text>
             <Text fontSize='xs' color='green.600'>
-              {sortedHistory.length}건의 배당금 내역
+              {summary?.count ?? 0}건의 배당금 내역
             </Text>
           </VStack>
           <Text fontSize='2xl' fontWeight='bold' color='green.700'>
-            $
-            {sortedHistory
-              .reduce(
-                (sum: number, item: DividendData) =>
-                  sum + (item.amount_usd || 0),
-                0
-              )
-              .toFixed(2)}
+            ${(summary?.total_amount_usd ?? 0).toFixed(2)}
           </Text>
         </HStack>
       </Box>
@@ -215,7 +222,7 @@ const DividendHistory = () => {
       </VStack>
 
       {/* 페이지네이션 */}
-      {totalPages > 1 && (
+      {(currentPage > 1 || !isLastPage) && (
         <Stack
           direction={{ base: 'column', sm: 'row' }}
           justify='center'
@@ -232,32 +239,15 @@ const DividendHistory = () => {
             이전
           </Button>
 
-          <Stack
-            direction='row'
-            gap={1}
-            align='center'
-            flexWrap='wrap'
-            justify='center'
-          >
-            {Array.from({ length: totalPages }, (_, i) => i + 1).map(page => (
-              <Button
-                key={page}
-                size={{ base: 'sm', md: 'md' }}
-                variant={currentPage === page ? 'solid' : 'ghost'}
-                colorScheme={currentPage === page ? 'blue' : 'gray'}
-                onClick={() => handlePageChange(page)}
-                minW={{ base: '8', md: '10' }}
-              >
-                {page}
-              </Button>
-            ))}
-          </Stack>
+          <Text fontSize='sm' color='gray.600'>
+            {currentPage}페이지
+          </Text>
 
           <Button
             size={{ base: 'sm', md: 'md' }}
             variant='outline'
             onClick={() => handlePageChange(currentPage + 1)}
-            disabled={currentPage === totalPages}
+            disabled={isLastPage}
           >
             다음
           </Button>
@@ -265,7 +255,7 @@ const DividendHistory = () => {
       )}
 
       {/* 배당금 내역이 없을 때 */}
-      {sortedHistory.length === 0 && (
+      {pages && currentPage === 1 && currentItems.length === 0 && (
         <Box
           p={8}
           textAlign='center'
@@ -281,11 +271,11 @@ const DividendHistory = () => {
       )}
 
       {/* 페이지 정보 표시 */}
-      {sortedHistory.length > 0 && (
+      {currentItems.length > 0 && (
         <Box textAlign='center' mt={2}>
           <Text fontSize='sm' color='gray.500'>
-            총 {sortedHistory.length}건 중 {startIndex + 1}-
-            {Math.min(endIndex, sortedHistory.length)}건 표시
+            총 {summary?.count ?? loadedCount}건 중 {startIndex + 1}-{loadedCount}건
+            표시
           </Text>
         </Box>
       )}
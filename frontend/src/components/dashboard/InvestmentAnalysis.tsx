@@ -1,4 +1,4 @@
-import React, { useMemo, useState } from 'react';
+import React, { useEffect, useMemo, useState } from 'react';
 import {
   Box,
   Text,
@@ -40,8 +40,14 @@ const InvestmentAnalysis = () => {
     transactions,
     holdingsLoading: isLoading,
     holdingsError: error,
+    fetchTransactions,
   } = useDashboardStore();
 
+  // 전체 거래 목록은 분석 탭을 열 때 조회 (이후 새 거래는 스트림 이벤트로 반영)
+  useEffect(() => {
+    fetchTransactions();
+  }, [fetchTransactions]);
+
   // 페이지네이션 상태
   const [rankingDisplayCount, setRankingDisplayCount] = useState(5);
   const [holdingDisplayCount, setHoldingDisplayCount] = useState(5);
@@ -12,7 +12,8 @@ import {
   Code,
   Textarea,
 } from '@chakra-ui/react';
-import { apiClient } from '@/lib/api';
+import { mutate } from 'swr';
+import { apiClient, API_ENDPOINTS } from '@/lib/api';
 
 interface BotStatus {
   status: 'ok' | 'warning' | 'error';
@@ -76,10 +77,28 @@ const SystemStatus = () => {
     setUpdatingPrices(true);
     setPriceUpdateResult(null);
     try {
-      const response = await apiClient.get('/holdings?update_prices=true');
-      const updates = response.data.price_updates || [];
+      // 저장된 평가를 즉시 받고, 주가 갱신은 서버 백그라운드 작업으로 진행
+      const response = await apiClient.get(
+        `${API_ENDPOINTS.holdings}?update_prices=true&mode=swr`
+      );
+      const jobId = response.data.refresh?.job_id;
+
+      // 백그라운드 갱신이 끝날 때까지 상태 확인
+      let status = response.data.refresh;
+      while (status?.state === 'running' && status.job_id === jobId) {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        status = (await apiClient.get(API_ENDPOINTS.priceRefreshStatus)).data;
+      }
+
+      // 갱신된 평가로 대시보드 데이터 다시 불러오기
+      await Promise.all([
+        mutate(API_ENDPOINTS.holdings),
+        mutate(API_ENDPOINTS.portfolio),
+      ]);
       setPriceUpdateResult(
-        `✅ 주가 업데이트 완료: ${updates.length}개 종목 업데이트됨`
+        status?.success === false
+          ? `❌ ${status.message || '주가 업데이트 실패'}`
+          : `✅ 주가 업데이트 완료: ${status?.updated_count ?? 0}개 종목 업데이트됨`
       );
     } catch (error: any) {
       setPriceUpdateResult(
@@ -12,35 +12,55 @@ import {
   Button,
 } from '@chakra-ui/react';
 import { getTickerColor } from '@/utils/tickerColors';
-import {
-  useDashboardStore,
-  type TransactionData,
-} from '@/store/dashboardStore';
+import { type TransactionData } from '@/store/dashboardStore';
+import { useTransactionPages } from '@/hooks/useApi';
+
+// 화면에 표시하는 필드만 조회
+const TRADE_FIELDS = [
+  'id',
+  'ticker',
+  'shares',
+  'price_per_share',
+  'total_amount_usd',
+  'exchange_rate',
+  'krw_amount',
+  'dividend_reinvestment',
+  'transaction_date',
+];
 
 const TradeHistory = () => {
   const [currentPage, setCurrentPage] = useState(1);
   const itemsPerPage = 20;
+  // 현재까지 넘긴 페이지만 서버에서 조회 (새 거래는 스트림 이벤트가 페이지를 재검증)
   const {
-    transactions,
-    transactionsLoading: isLoading,
-    transactionsError: error,
-  } = useDashboardStore();
-
-  // 날짜 순서대로 정렬 (최신순) - API에서 이미 정렬되어 오지만 안전하게 재정렬
-  const sortedItems = transactions.sort(
-    (a: TransactionData, b: TransactionData) =>
-      new Date(b.transaction_date).getTime() -
-      new Date(a.transaction_date).getTime()
+    pages,
+    summary,
+    hasMore,
+    isLoading,
+    error: pagesError,
+    size,
+    setSize,
+  } = useTransactionPages<TransactionData>(
+    { fields: TRADE_FIELDS },
+    itemsPerPage
   );
+  const error = pagesError ? '거래 데이터를 불러오는데 실패했습니다.' : null;
 
-  // 페이지네이션 계산
-  const totalPages = Math.ceil(sortedItems.length / itemsPerPage);
-  const startIndex = (currentPage - 1) * itemsPerPage;
-  const endIndex = startIndex + itemsPerPage;
-  const currentItems = sortedItems.slice(startIndex, endIndex);
+  // 서버에서 (날짜, ID) 최신순으로 정렬된 페이지
+  const currentItems = pages?.[currentPage - 1]?.items ?? [];
+  const loadedCount = (pages ?? [])
+    .slice(0, currentPage)
+    .reduce((count, page) => count + page.items.length, 0);
+  const startIndex = loadedCount - currentItems.length;
+  const isLastPage = pages
+    ? currentPage >= pages.length && !hasMore
+    : true;
 
-  // 페이지 변경 함수
+  // 페이지 변경 함수 (다음 페이지는 마지막 행의 커서로 조회)
   const handlePageChange = (page: number) => {
+    if (page > size) {
+      setSize(page);
+    }
     setCurrentPage(page);
   };
 
@@ -383,7 +403,7 @@ const TradeHistory = () => {
       </Accordion.Root>
 
       {/* 페이지네이션 */}
-      {totalPages > 1 && (
+      {(currentPage > 1 || !isLastPage) && (
         <Stack
           direction={{ base: 'column', sm: 'row' }}
           justify='center'
@@ -400,32 +420,15 @@ const TradeHistory = () => {
             이전
           </Button>
 
-          <Stack
-            direction='row'
-            gap={1}
-            align='center'
-            flexWrap='wrap'
-            justify='center'
-          >
-            {Array.from({ length: totalPages }, (_, i) => i + 1).map(page => (
-              <Button
-                key={page}
-                size={{ base: 'sm', md: 'md' }}
-                variant={currentPage === page ? 'solid' : 'ghost'}
-                colorScheme={currentPage === page ? 'blue' : 'gray'}
-                onClick={() => handlePageChange(page)}
-                minW={{ base: '8', md: '10' }}
-              >
-                {page}
-              </Button>
-            ))}
-          </Stack>
+          <Text fontSize='sm' color='gray.600'>
+            {currentPage}페이지
+          </Text>
 
           <Button
             size={{ base: 'sm', md: 'md' }}
             variant='outline'
             onClick={() => handlePageChange(currentPage + 1)}
-            disabled={currentPage === totalPages}
+            disabled={isLastPage}
           >
             다음
           </Button>
@@ -433,7 +436,7 @@ const TradeHistory = () => {
       )}
 
       {/* 거래 내역이 없을 때 */}
-      {sortedItems.length === 0 && (
+      {pages && currentPage === 1 && currentItems.length === 0 && (
         <Box
           p={8}
           textAlign='center'
@@ -449,11 +452,11 @@ const TradeHistory = () => {
       )}
 
       {/* 페이지 정보 표시 */}
-      {sortedItems.length > 0 && (
+      {currentItems.length > 0 && (
         <Box textAlign='center' mt={2}>
           <Text fontSize='sm' color='gray.500'>
-            총 {sortedItems.length}건 중 {startIndex + 1}-
-            {Math.min(endIndex, sortedItems.length)}건 표시
+            총 {summary?.count ?? loadedCount}건 중 {startIndex + 1}-{loadedCount}건
+            표시
           </Text>
         </Box>
       )}
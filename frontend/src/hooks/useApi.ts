@@ -1,5 +1,13 @@
+import { useEffect } from 'react';
 import useSWR from 'swr';
+import useSWRInfinite from 'swr/infinite';
 import { apiClient, API_ENDPOINTS } from '../lib/api';
+import { subscribeHistoryRefresh } from '../lib/historyRefresh';
+import { isLiveStreamConnected } from './useEventStream';
+
+// 실시간 스트림이 연결되어 있으면 폴링하지 않고, 끊겼을 때만 주기적으로 새로고침
+const pollUnlessStreaming = (interval: number) => () =>
+  isLiveStreamConnected() ? 0 : interval;
 
 // 데이터 타입 정의
 export interface Holding {
@@ -61,11 +69,81 @@ export interface PortfolioSummary {
   total_return_with_dividends_krw: number;
 }
 
+// 첫 페이지 요약 (필터 조건 전체 기준)
+export interface HistorySummary {
+  count: number;
+  total_amount_usd?: number; // 배당금만
+  tickers?: string[]; // 배당금만, 종목 필터와 무관한 전체 배당 종목
+}
+
+// 키셋 페이지네이션 응답 (limit/cursor 지정 시)
+export interface HistoryPage<T> {
+  items: T[];
+  next_cursor: string | null;
+  has_more: boolean;
+  summary?: HistorySummary; // 첫 페이지에만 포함
+}
+
+export interface HistoryFilters {
+  ticker?: string;
+  type?: 'BUY' | 'SELL';
+  from?: string; // YYYY-MM-DD
+  to?: string; // YYYY-MM-DD
+  fields?: string[]; // 응답에 포함할 필드 (없으면 전체)
+}
+
+// 페이지별 요청 URL (이전 페이지의 next_cursor 이후부터, 마지막 페이지면 null)
+const historyPageKey =
+  (endpoint: string, filters: HistoryFilters, pageSize: number) =>
+  (pageIndex: number, previousPage: HistoryPage<unknown> | null) => {
+    if (previousPage && !previousPage.has_more) return null;
+
+    const params = new URLSearchParams({ limit: String(pageSize) });
+    if (filters.ticker) params.set('ticker', filters.ticker);
+    if (filters.type) params.set('type', filters.type);
+    if (filters.from) params.set('from', filters.from);
+    if (filters.to) params.set('to', filters.to);
+    if (filters.fields?.length) params.set('fields', filters.fields.join(','));
+    if (pageIndex > 0 && previousPage?.next_cursor) {
+      params.set('cursor', previousPage.next_cursor);
+    }
+    return `${endpoint}?${params.toString()}`;
+  };
+
+const useHistoryPages = <T>(
+  endpoint: string,
+  filters: HistoryFilters,
+  pageSize: number
+) => {
+  const { data, error, isLoading, size, setSize, mutate } = useSWRInfinite<
+    HistoryPage<T>
+  >(historyPageKey(endpoint, filters, pageSize), {
+    refreshInterval: pollUnlessStreaming(300000), // 스트림 끊김 시 5분마다 새로고침
+  });
+
+  // 스트림 변경 이벤트/입력 완료 시 불러온 페이지 재검증
+  useEffect(
+    () => subscribeHistoryRefresh(endpoint, () => mutate()),
+    [endpoint, mutate]
+  );
+
+  return {
+    pages: data,
+    summary: data?.[0]?.summary,
+    hasMore: data ? data[data.length - 1].has_more : false,
+    error,
+    isLoading,
+    size,
+    setSize,
+    mutate,
+  };
+};
+
 // API 훅들
 export const useHoldings = () => {
   const { data, error, isLoading, mutate } = useSWR<Holding[]>(
     API_ENDPOINTS.holdings,
-    { refreshInterval: 3600000 } // 1시간마다 새로고침 (사이트 접속 시 업데이트되므로)
+    { refreshInterval: pollUnlessStreaming(3600000) } // 스트림 끊김 시 1시간마다 새로고침
   );
 
   return {
@@ -79,7 +157,7 @@ export const useHoldings = () => {
 export const usePortfolio = () => {
   const { data, error, isLoading, mutate } = useSWR<PortfolioSummary>(
     API_ENDPOINTS.portfolio,
-    { refreshInterval: 3600000 } // 1시간마다 새로고침 (사이트 접속 시 업데이트되므로)
+    { refreshInterval: pollUnlessStreaming(3600000) } // 스트림 끊김 시 1시간마다 새로고침
   );
 
   return {
@@ -93,7 +171,7 @@ export const usePortfolio = () => {
 export const useTransactions = () => {
   const { data, error, isLoading, mutate } = useSWR<Transaction[]>(
     API_ENDPOINTS.transactions,
-    { refreshInterval: 300000 } // 5분마다 새로고침
+    { refreshInterval: pollUnlessStreaming(300000) } // 스트림 끊김 시 5분마다 새로고침
   );
 
   return {
@@ -107,7 +185,7 @@ export const useTransactions = () => {
 export const useDividends = () => {
   const { data, error, isLoading, mutate } = useSWR<Dividend[]>(
     API_ENDPOINTS.dividends,
-    { refreshInterval: 300000 }
+    { refreshInterval: pollUnlessStreaming(300000) }
   );
 
   return {
@@ -118,11 +196,22 @@ export const useDividends = () => {
   };
 };
 
+// 거래/배당금 내역을 필요한 페이지와 필드만 조회 (setSize로 다음 페이지 로드)
+export const useTransactionPages = <T = Transaction>(
+  filters: HistoryFilters = {},
+  pageSize = 20
+) => useHistoryPages<T>(API_ENDPOINTS.transactions, filters, pageSize);
+
+export const useDividendPages = <T = Dividend>(
+  filters: HistoryFilters = {},
+  pageSize = 20
+) => useHistoryPages<T>(API_ENDPOINTS.dividends, filters, pageSize);
+
 // 특정 종목의 상세 정보 조회
 export const useHolding = (ticker: string) => {
   const { data, error, isLoading, mutate } = useSWR<Holding>(
     ticker ? `${API_ENDPOINTS.holdings}/${ticker}` : null,
-    { refreshInterval: 3600000 } // 1시간마다 새로고침
+    { refreshInterval: pollUnlessStreaming(3600000) } // 스트림 끊김 시 1시간마다 새로고침
   );
 
   return {
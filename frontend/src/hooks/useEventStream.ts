@@ -0,0 +1,158 @@
+import { useEffect } from 'react';
+import { mutate } from 'swr';
+import { API_BASE_URL, API_ENDPOINTS } from '../lib/api';
+import { authTokenManager } from '../lib/auth';
+import { refreshHistory } from '../lib/historyRefresh';
+import {
+  useDashboardStore,
+  StreamPriceUpdate,
+  TransactionData,
+} from '../store/dashboardStore';
+
+const RECONNECT_DELAY = 5000; // 인증 실패 등으로 연결이 닫혔을 때 재연결 대기 (ms)
+
+let connected = false;
+
+// 스트림이 연결되어 있으면 SWR 폴링을 멈추기 위해 사용
+export const isLiveStreamConnected = () => connected;
+
+// SWR 캐시의 목록 맨 앞에 새 항목 추가 (중복 제거)
+const prependToList = <T extends { id: number }>(key: string, item: T) =>
+  mutate<T[]>(
+    key,
+    current =>
+      Array.isArray(current)
+        ? [item, ...current.filter(existing => existing.id !== item.id)]
+        : current,
+    { revalidate: false }
+  );
+
+const revalidateAll = () => {
+  const store = useDashboardStore.getState();
+  store.fetchAllData();
+  mutate(
+    key =>
+      typeof key === 'string' &&
+      Object.values(API_ENDPOINTS).some(endpoint => key.startsWith(endpoint))
+  );
+  refreshHistory(API_ENDPOINTS.transactions, API_ENDPOINTS.dividends);
+};
+
+/**
+ * 서버 변경 이벤트(SSE) 구독
+ * 폴링 대신 커밋된 변경분(가격, 거래, 배당금, 보유 종목, 환율)만 받아 캐시에 반영
+ */
+export const useLiveUpdates = (enabled: boolean) => {
+  useEffect(() => {
+    if (!enabled) return;
+
+    let source: EventSource | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let disposed = false;
+    let lastEventId: string | null = null;
+
+    const connect = () => {
+      const token = authTokenManager.getAccessToken();
+      if (!token || disposed) return;
+
+      const params = new URLSearchParams({ token });
+      if (lastEventId) params.set('last_event_id', lastEventId);
+      source = new EventSource(
+        `${API_BASE_URL}${API_ENDPOINTS.stream}?${params.toString()}`
+      );
+
+      const handle =
+        (handler: (data: any) => void) => (event: MessageEvent) => {
+          lastEventId = event.lastEventId || lastEventId;
+          handler(JSON.parse(event.data));
+        };
+
+      source.onopen = () => {
+        connected = true;
+      };
+
+      source.addEventListener(
+        'prices',
+        handle((data: { updates: StreamPriceUpdate[] }) => {
+          useDashboardStore.getState().applyPriceUpdates(data.updates);
+          useDashboardStore.getState().fetchPortfolio();
+          mutate(API_ENDPOINTS.holdings);
+          mutate(API_ENDPOINTS.portfolio);
+        })
+      );
+
+      source.addEventListener(
+        'transaction',
+        handle((data: { transaction?: TransactionData }) => {
+          // 거래 내역 화면은 불러온 페이지만 재검증 (전체 목록을 다시 받지 않음)
+          refreshHistory(API_ENDPOINTS.transactions);
+          // 일괄 입력(batch_created)은 개별 항목 없이 건수만 오므로 목록 재조회
+          if (!data.transaction) {
+            mutate(API_ENDPOINTS.transactions);
+            return;
+          }
+          useDashboardStore.getState().upsertTransaction(data.transaction);
+          prependToList(API_ENDPOINTS.transactions, data.transaction);
+        })
+      );
+
+      source.addEventListener(
+        'dividend',
+        handle((data: { dividend?: any }) => {
+          const store = useDashboardStore.getState();
+          refreshHistory(API_ENDPOINTS.dividends);
+          if (data.dividend) {
+            store.upsertDividend(data.dividend);
+            prependToList(API_ENDPOINTS.dividends, data.dividend);
+          } else {
+            mutate(API_ENDPOINTS.dividends);
+          }
+          store.fetchPortfolio();
+          mutate(API_ENDPOINTS.portfolio);
+        })
+      );
+
+      source.addEventListener(
+        'holding',
+        handle(() => {
+          const store = useDashboardStore.getState();
+          store.fetchHoldings();
+          store.fetchPortfolio();
+          mutate(API_ENDPOINTS.holdings);
+          mutate(API_ENDPOINTS.portfolio);
+        })
+      );
+
+      source.addEventListener(
+        'fx',
+        handle(() => {
+          useDashboardStore.getState().fetchPortfolio();
+          mutate(API_ENDPOINTS.portfolio);
+        })
+      );
+
+      // 서버가 놓친 이벤트를 보장할 수 없을 때 전체 데이터 재조회
+      source.addEventListener('resync', handle(revalidateAll));
+
+      source.onerror = () => {
+        // 네트워크 끊김은 EventSource가 자동 재연결, 인증 실패 등으로 닫힌 경우만 직접 재연결
+        if (source?.readyState === EventSource.CLOSED) {
+          connected = false;
+          source.close();
+          if (!disposed) {
+            reconnectTimer = setTimeout(connect, RECONNECT_DELAY);
+          }
+        }
+      };
+    };
+
+    connect();
+
+    return () => {
+      disposed = true;
+      connected = false;
+      if (reconnectTimer) clearTimeout(reconnectTimer);
+      source?.close();
+    };
+  }, [enabled]);
+};
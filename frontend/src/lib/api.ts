@@ -2,7 +2,7 @@ import axios from 'axios';
 import { authTokenManager } from './auth';
 
 // API 기본 설정
-const API_BASE_URL =
+export const API_BASE_URL =
   import.meta.env.VITE_API_BASE_URL ||
   (import.meta.env.PROD
     ? '/api' // 프로덕션에서는 nginx 프록시 사용
@@ -207,6 +207,10 @@ export interface ApiEndpoints {
 
   // 가격 업데이트
   updatePrice: '/update-price';
+  priceRefreshStatus: '/price-refresh/status';
+
+  // 실시간 변경 스트림 (SSE)
+  stream: '/stream';
 }
 
 // API 엔드포인트 상수
@@ -217,4 +221,6 @@ export const API_ENDPOINTS: ApiEndpoints = {
   dividends: '/dividends',
   status: '/status',
   updatePrice: '/update-price',
+  priceRefreshStatus: '/price-refresh/status',
+  stream: '/stream',
 };
@@ -0,0 +1,25 @@
+// 거래/배당금 내역 페이지(useSWRInfinite) 재검증 알림
+// 무한 스크롤 캐시 키는 엔드포인트 문자열과 달라 전역 mutate로 찾을 수 없으므로,
+// 내역 화면이 엔드포인트별로 구독하고 스트림 이벤트/입력 완료 시 자신의 mutate를 호출
+type Listener = () => void;
+
+const listeners = new Map<string, Set<Listener>>();
+
+export const subscribeHistoryRefresh = (
+  endpoint: string,
+  listener: Listener
+) => {
+  const endpointListeners = listeners.get(endpoint) ?? new Set<Listener>();
+  endpointListeners.add(listener);
+  listeners.set(endpoint, endpointListeners);
+
+  return () => {
+    endpointListeners.delete(listener);
+  };
+};
+
+export const refreshHistory = (...endpoints: string[]) => {
+  endpoints.forEach(endpoint =>
+    listeners.get(endpoint)?.forEach(listener => listener())
+  );
+};
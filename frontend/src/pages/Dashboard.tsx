@@ -24,6 +24,7 @@ import { useExchangeRateStore } from '../store/exchangeRateStore';
 import { useDashboardStore } from '../store/dashboardStore';
 import { useAuthStore } from '../store/authStore';
 import { authTokenManager } from '../lib/auth';
+import { useLiveUpdates } from '../hooks/useEventStream';
 
 const Dashboard = () => {
   const navigate = useNavigate();
@@ -33,12 +34,8 @@ const Dashboard = () => {
     isInitialized,
     holdingsLoading,
     portfolioLoading,
-    transactionsLoading,
-    dividendsLoading,
     holdingsError,
     portfolioError,
-    transactionsError,
-    dividendsError,
     fetchAllData,
     clearErrors,
   } = useDashboardStore();
@@ -46,6 +43,9 @@ const Dashboard = () => {
   const isInitializing = useRef(false);
   const isDataLoading = useRef(false);
 
+  // 서버 변경 이벤트 구독 (거래/배당금/가격 변경분만 반영)
+  useLiveUpdates(isAuthenticated === true);
+
   // 인증 상태 확인 및 대시보드 초기화 (한 번만 실행)
   useEffect(() => {
     if (isInitializing.current) return;
@@ -89,12 +89,8 @@ const Dashboard = () => {
     isInitialized,
     holdingsLoading,
     portfolioLoading,
-    transactionsLoading,
-    dividendsLoading,
     holdingsError,
     portfolioError,
-    transactionsError,
-    dividendsError,
   });
 
   // 인증 상태가 아직 확인되지 않은 경우 로딩 표시
@@ -115,17 +111,11 @@ const Dashboard = () => {
     );
   }
 
-  // 전체 로딩 상태 계산
-  const isLoading =
-    !isInitialized ||
-    holdingsLoading ||
-    portfolioLoading ||
-    transactionsLoading ||
-    dividendsLoading;
+  // 전체 로딩 상태 계산 (거래/배당금 내역은 각 탭에서 페이지 단위로 로딩/에러 표시)
+  const isLoading = !isInitialized || holdingsLoading || portfolioLoading;
 
   // 에러 상태 계산
-  const hasError =
-    holdingsError || portfolioError || transactionsError || dividendsError;
+  const hasError = holdingsError || portfolioError;
 
   console.log('🔍 렌더링 조건:', { isLoading, hasError });
 
@@ -143,7 +133,7 @@ const Dashboard = () => {
             대시보드 데이터를 불러오는 중...
           </Text>
           <Text mt={2} color='gray.500' fontSize={{ base: 'xs', md: 'sm' }}>
-            포트폴리오, 거래 내역, 배당금 데이터를 가져오고 있습니다.
+            포트폴리오 데이터를 가져오고 있습니다.
           </Text>
         </Box>
       </Container>
@@ -165,10 +155,6 @@ const Dashboard = () => {
               <Alert.Description>
                 {holdingsError && <div>• 보유 종목: {holdingsError}</div>}
                 {portfolioError && <div>• 포트폴리오: {portfolioError}</div>}
-                {transactionsError && (
-                  <div>• 거래 내역: {transactionsError}</div>
-                )}
-                {dividendsError && <div>• 배당금: {dividendsError}</div>}
               </Alert.Description>
             </Alert.Content>
           </Alert.Root>
@@ -247,7 +233,8 @@ const Dashboard = () => {
       <TokenExpiryNotification />
 
       {/* 메인 탭 인터페이스 */}
-      <Tabs.Root defaultValue='portfolio'>
+      {/* 탭 내용은 처음 열 때 마운트 (분석 탭의 전체 목록 조회를 열기 전까지 미룸) */}
+      <Tabs.Root defaultValue='portfolio' lazyMount>
         <Tabs.List
           gap={0}
           py={{ base: 1, md: 2 }}
@@ -1,6 +1,7 @@
 import { create } from 'zustand';
 import { devtools } from 'zustand/middleware';
 import { apiClient, API_ENDPOINTS } from '../lib/api';
+import { refreshHistory } from '../lib/historyRefresh';
 
 // Type definitions - moved exports above
 
@@ -55,6 +56,30 @@ interface PriceUpdate {
   difference: number;
 }
 
+export interface StreamPriceUpdate {
+  ticker: string;
+  old_price: number;
+  new_price: number;
+  source: string | null;
+}
+
+// API 배당금 응답을 화면용 형식으로 변환
+const normalizeDividend = (item: any): DividendData => ({
+  id: item.id || Date.now() + Math.random(),
+  created_at: item.created_at || new Date().toISOString().split('T')[0],
+  ticker: item.ticker || 'UNKNOWN',
+  amount_usd: typeof item.amount_usd === 'number' ? item.amount_usd : 0,
+  shares: typeof item.shares === 'number' ? item.shares : undefined,
+  dividendPerShare:
+    typeof item.dividend_per_share === 'number'
+      ? item.dividend_per_share
+      : undefined,
+  payment_date:
+    item.payment_date ||
+    item.created_at ||
+    new Date().toISOString().split('T')[0],
+});
+
 interface HoldingsResponse {
   holdings: HoldingData[];
   price_updates: PriceUpdate[];
@@ -110,6 +135,7 @@ interface DashboardState {
   // Actions
   fetchHoldings: () => Promise<void>;
   fetchPortfolio: () => Promise<void>;
+  // 전체 거래/배당금 목록은 분석 화면이 열릴 때만 조회 (내역 화면은 페이지 단위 조회)
   fetchTransactions: () => Promise<void>;
   fetchDividends: () => Promise<void>;
   fetchAllData: () => Promise<void>;
@@ -122,6 +148,11 @@ interface DashboardState {
     dividend: Omit<DividendData, 'id' | 'created_at'>
   ) => Promise<void>;
 
+  // Live stream (SSE) deltas
+  applyPriceUpdates: (updates: StreamPriceUpdate[]) => void;
+  upsertTransaction: (transaction: TransactionData) => void;
+  upsertDividend: (dividend: any) => void;
+
   // Clear errors
   clearErrors: () => void;
   clearHoldingsError: () => void;
@@ -236,21 +267,7 @@ export const useDashboardStore = create<DashboardState>()(
 
           // Normalize dividend data
           const normalizedData = Array.isArray(response.data)
-            ? response.data.map((item: any) => ({
-                id: item.id || Date.now() + Math.random(),
-                created_at:
-                  item.created_at || new Date().toISOString().split('T')[0],
-                ticker: item.ticker || 'UNKNOWN',
-                amount_usd:
-                  typeof item.amount_usd === 'number' ? item.amount_usd : 0,
-                shares:
-                  typeof item.shares === 'number' ? item.shares : undefined,
-                dividendPerShare:
-                  typeof item.dividend_per_share === 'number'
-                    ? item.dividend_per_share
-                    : undefined,
-                payment_date: item.payment_date || item.created_at || new Date().toISOString().split('T')[0],
-              }))
+            ? response.data.map(normalizeDividend)
             : [];
 
           set({
@@ -268,7 +285,7 @@ export const useDashboardStore = create<DashboardState>()(
         }
       },
 
-      // Fetch all data at once
+      // Fetch dashboard data (보유 종목/포트폴리오만, 전체 거래/배당금 목록은 미리 받지 않음)
       fetchAllData: async () => {
         const state = get();
 
@@ -276,8 +293,6 @@ export const useDashboardStore = create<DashboardState>()(
         await Promise.allSettled([
           state.fetchHoldings(),
           state.fetchPortfolio(),
-          state.fetchTransactions(),
-          state.fetchDividends(),
         ]);
 
         set({ isInitialized: true });
@@ -291,13 +306,10 @@ export const useDashboardStore = create<DashboardState>()(
             transactionData
           );
 
-          // Refresh transactions and holdings after adding
+          // Refresh holdings after adding (거래 내역은 불러온 페이지만 재검증)
           const state = get();
-          await Promise.all([
-            state.fetchTransactions(),
-            state.fetchHoldings(),
-            state.fetchPortfolio(),
-          ]);
+          refreshHistory(API_ENDPOINTS.transactions);
+          await Promise.all([state.fetchHoldings(), state.fetchPortfolio()]);
         } catch (error) {
           console.error('Add transaction error:', error);
           throw error;
@@ -312,15 +324,60 @@ export const useDashboardStore = create<DashboardState>()(
             dividendData
           );
 
-          // Refresh dividends and portfolio after adding
+          // Refresh portfolio after adding (배당금 내역은 불러온 페이지만 재검증)
           const state = get();
-          await Promise.all([state.fetchDividends(), state.fetchPortfolio()]);
+          refreshHistory(API_ENDPOINTS.dividends);
+          await state.fetchPortfolio();
         } catch (error) {
           console.error('Add dividend error:', error);
           throw error;
         }
       },
 
+      // 스트림으로 받은 가격 변경분만 보유 종목에 반영
+      applyPriceUpdates: updates => {
+        const prices = new Map(updates.map(u => [u.ticker, u.new_price]));
+        set(state => ({
+          holdings: state.holdings.map(holding => {
+            const price = prices.get(holding.ticker);
+            if (price === undefined) return holding;
+            const currentValueUsd = holding.total_shares * price;
+            const unrealizedPnlUsd = currentValueUsd - holding.total_invested_usd;
+            return {
+              ...holding,
+              current_price: price,
+              current_value_usd: currentValueUsd,
+              unrealized_pnl_usd: unrealizedPnlUsd,
+              return_rate_usd:
+                holding.total_invested_usd > 0
+                  ? (unrealizedPnlUsd / holding.total_invested_usd) * 100
+                  : 0,
+            };
+          }),
+        }));
+      },
+
+      // 스트림으로 받은 새 거래를 목록 맨 앞에 추가 (중복 제거)
+      upsertTransaction: transaction => {
+        set(state => ({
+          transactions: [
+            transaction,
+            ...state.transactions.filter(t => t.id !== transaction.id),
+          ],
+        }));
+      },
+
+      // 스트림으로 받은 새 배당금을 목록 맨 앞에 추가 (중복 제거)
+      upsertDividend: dividend => {
+        const normalized = normalizeDividend(dividend);
+        set(state => ({
+          dividends: [
+            normalized,
+            ...state.dividends.filter(d => d.id !== normalized.id),
+          ],
+        }));
+      },
+
       // Clear all errors
       clearErrors: () => {
         set({
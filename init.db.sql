@@ -41,6 +41,7 @@ CREATE TABLE IF NOT EXISTS holdings (
     
     -- 원화 투자 정보
     total_invested_krw DECIMAL(18, 2) DEFAULT 0, -- 총 투입 원화
+    total_cost_krw DECIMAL(18, 2), -- 매수 시점 환율로 환산한 원가 합계 (가중평균 환율 계산용)
     
     -- 배당금 정보 세분화
     total_dividends_received DECIMAL(18, 8) DEFAULT 0, -- 총 수령 배당금
@@ -136,6 +137,98 @@ CREATE TABLE IF NOT EXISTS price_updates (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- 8-1. price_quotes 테이블 생성 (시세 이력, 갱신 경로에서 조회한 가격 누적)
+CREATE TABLE IF NOT EXISTS price_quotes (
+    quote_id INT AUTO_INCREMENT PRIMARY KEY,
+    ticker VARCHAR(10) NOT NULL,
+    timestamp TIMESTAMP NOT NULL, -- UTC
+    price DECIMAL(18, 8) NOT NULL,
+    source VARCHAR(50) NOT NULL, -- 'toss', 'finnhub', 'yfinance', 'manual' 등
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    -- 같은 시각/출처의 중복 기록 방지 (INSERT IGNORE), (ticker, timestamp) 범위 조회 인덱스 겸용
+    UNIQUE KEY uq_price_quotes_ticker_timestamp_source (ticker, timestamp, source)
+);
+
+-- 8-2. tax_lots 테이블 생성 (매수 로트별 잔여 수량/원가)
+CREATE TABLE IF NOT EXISTS tax_lots (
+    lot_id INT AUTO_INCREMENT PRIMARY KEY,
+    ticker VARCHAR(10) NOT NULL,
+    buy_transaction_id INT NOT NULL UNIQUE, -- 로트를 만든 매수 거래
+    acquired_date DATE NOT NULL,
+    exchange_rate DECIMAL(10, 2), -- 매수 환율
+    original_shares DECIMAL(18, 8) NOT NULL,
+    remaining_shares DECIMAL(18, 8) NOT NULL,
+    cost_basis_usd DECIMAL(18, 8) NOT NULL,
+    remaining_cost_usd DECIMAL(18, 8) NOT NULL,
+    cost_basis_krw DECIMAL(18, 2) NOT NULL,
+    remaining_cost_krw DECIMAL(18, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    INDEX idx_tax_lots_ticker_acquired (ticker, acquired_date)
+);
+
+-- 8-3. realized_gains 테이블 생성 (매도 시 로트별 실현 손익)
+CREATE TABLE IF NOT EXISTS realized_gains (
+    gain_id INT AUTO_INCREMENT PRIMARY KEY,
+    sell_transaction_id INT NOT NULL,
+    lot_id INT,
+    buy_transaction_id INT,
+    ticker VARCHAR(10) NOT NULL,
+    method VARCHAR(20) NOT NULL, -- 'fifo', 'average', 'specific'
+    sell_date DATE NOT NULL,
+    acquired_date DATE,
+    shares DECIMAL(18, 8) NOT NULL,
+    proceeds_usd DECIMAL(18, 8) NOT NULL,
+    cost_basis_usd DECIMAL(18, 8) NOT NULL,
+    realized_pnl_usd DECIMAL(18, 8) NOT NULL,
+    proceeds_krw DECIMAL(18, 2) NOT NULL,
+    cost_basis_krw DECIMAL(18, 2) NOT NULL,
+    realized_pnl_krw DECIMAL(18, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    INDEX idx_realized_gains_ticker_date (ticker, sell_date),
+    INDEX idx_realized_gains_sell_date (sell_date),
+    INDEX idx_realized_gains_sell_txn (sell_transaction_id)
+);
+
+-- 8-4. imported_records 테이블 생성 (증권사 거래내역 가져오기 중복 방지용 내용 해시)
+CREATE TABLE IF NOT EXISTS imported_records (
+    record_id INT AUTO_INCREMENT PRIMARY KEY,
+    content_hash VARCHAR(64) NOT NULL UNIQUE, -- SHA-256
+    record_type VARCHAR(20) NOT NULL, -- 'transaction', 'dividend', 'exchange_rate'
+    source_format VARCHAR(20), -- 'usd_statement', 'krw_statement'
+    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 8-5. portfolio_snapshots 테이블 생성 (일별 포트폴리오 스냅샷, 종목별 + 합계)
+CREATE TABLE IF NOT EXISTS portfolio_snapshots (
+    snapshot_id INT AUTO_INCREMENT PRIMARY KEY,
+    snapshot_date DATE NOT NULL, -- 한국 시간 기준 날짜
+    ticker VARCHAR(10) NOT NULL, -- '*' = 포트폴리오 합계
+    shares DECIMAL(18, 8), -- 합계 행은 NULL
+    market_price DECIMAL(18, 8), -- 합계 행은 NULL
+    exchange_rate DECIMAL(10, 4) NOT NULL, -- 평가에 사용한 USD/KRW
+    cost_basis_usd DECIMAL(18, 8) NOT NULL DEFAULT 0,
+    invested_krw DECIMAL(18, 2) NOT NULL DEFAULT 0,
+    market_value_usd DECIMAL(18, 8) NOT NULL DEFAULT 0,
+    market_value_krw DECIMAL(18, 2) NOT NULL DEFAULT 0,
+    unrealized_pnl_usd DECIMAL(18, 8) NOT NULL DEFAULT 0,
+    unrealized_pnl_krw DECIMAL(18, 2) NOT NULL DEFAULT 0,
+    dividends_usd DECIMAL(18, 8) NOT NULL DEFAULT 0, -- 누적 수령 배당금
+    captured_at TIMESTAMP NOT NULL, -- 마지막 기록 시각 (UTC)
+    
+    -- 하루에 종목당 한 행 (upsert), (ticker, snapshot_date) 범위 조회 인덱스 겸용
+    UNIQUE KEY uq_portfolio_snapshots_ticker_date (ticker, snapshot_date)
+);
+
+-- 8-6. data_versions 테이블 생성 (테이블별 데이터 버전, 커밋하는 트랜잭션 안에서 증가)
+CREATE TABLE IF NOT EXISTS data_versions (
+    table_name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
 -- 인덱스 추가
 CREATE INDEX idx_dividends_ticker_date ON dividends (ticker, date);
 CREATE INDEX idx_exchange_rates_date ON exchange_rates (date);
@@ -77,6 +77,14 @@ INSERT INTO dividends (date, ticker, shares_held, amount, reinvested_amount, wit
 ('2025-06-23', 'NVDY', 98.00000000, 55.99000000, 0.00000000, 55.99000000),
 ('2025-07-21', 'NVDY', 113.00000000, 98.79000000, 0.00000000, 98.79000000);
 
+-- 데이터 버전 갱신 (서버의 ETag/파생 데이터 캐시가 변경을 감지하도록, 행이 없으면 현재 시각(ms)으로 생성)
+INSERT INTO data_versions (table_name, version) VALUES
+('exchange_rates', FLOOR(UNIX_TIMESTAMP(NOW(3)) * 1000)),
+('transactions', FLOOR(UNIX_TIMESTAMP(NOW(3)) * 1000)),
+('dividends', FLOOR(UNIX_TIMESTAMP(NOW(3)) * 1000)),
+('holdings', FLOOR(UNIX_TIMESTAMP(NOW(3)) * 1000))
+ON DUPLICATE KEY UPDATE version = version + 1;
+
 -- 4. 데이터 검증 쿼리
 SELECT 'EXCHANGE_RATES' as table_name, COUNT(*) as row_count FROM exchange_rates
 UNION ALL
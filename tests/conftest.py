@@ -0,0 +1,32 @@
+"""
+테스트 공통 설정
+앱 모듈을 임포트하기 전에 저장소 루트를 sys.path에 추가하고 메모리 SQLite를 사용하도록 환경 변수를 설정합니다.
+(텔레그램 봇 모듈은 토큰이 없으면 종료하므로 더미 토큰 설정)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ.setdefault('TELEGRAM_BOT_TOKEN', 'test-token')
+
+import pytest
+
+from app import app as flask_app
+from app.models import db
+
+
+@pytest.fixture
+def app():
+    """빈 테이블로 다시 만든 DB와 앱 컨텍스트"""
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.rollback()
+
+
+@pytest.fixture
+def session(app):
+    return db.session
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+평균 원가 벡터 엔진 회귀 테스트
+compute_positions 결과가 거래 한 건씩 Decimal로 재계산한 값과 일치하는지 확인합니다.
+
+실행:
+    python -m pytest tests/test_cost_basis.py
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.cost_basis import compute_final_states, verify_against_decimal
+
+
+def _txn(ticker, type, shares, amount, amount_krw=0, exchange_rate=1300):
+    return SimpleNamespace(ticker=ticker, type=type, shares=shares, amount=amount,
+                           exchange_rate=exchange_rate, amount_krw=amount_krw)
+
+
+def _repeated_partial_sells(cycles: int):
+    """BUY 10 후 (BUY 10, SELL 10) 반복: 매도마다 원가에 0.5를 곱하므로 구간 누적곱이 0.5^cycles"""
+    rows = [_txn('TRIM', 'BUY', 10, 1000, 1300000)]
+    for i in range(cycles):
+        rows.append(_txn('TRIM', 'BUY', 10, 1000 + i, 1300000))
+        rows.append(_txn('TRIM', 'SELL', 10, 1100))
+    rows.append(_txn('OTHER', 'BUY', 1, 5, 6500))
+    return rows
+
+
+def test_long_partial_sell_runs_match_decimal_replay():
+    # 0.5^1100, 0.5^1500은 float 최솟값보다 작아 누적곱이 0으로 언더플로하던 경우
+    for cycles in (600, 1100, 1500):
+        rows = _repeated_partial_sells(cycles)
+        assert verify_against_decimal(rows) == [], cycles
+
+        state = compute_final_states(rows)['TRIM']
+        assert state.shares == Decimal('10')
+        # 마지막 매도 후 남은 원가 = (직전 원가 + 마지막 매수) / 2 → 수렴값 1000 + cycles - 2
+        assert state.cost_basis == Decimal(1000 + cycles - 2)
+
+
+def test_full_liquidation_resets_cost_basis():
+    rows = [
+        _txn('AAA', 'BUY', 10, 1000, 1300000),
+        _txn('AAA', 'SELL', 4, 500),
+        _txn('AAA', 'SELL', 6, 700),
+        _txn('AAA', 'BUY', 5, 600, 780000),
+    ]
+    assert verify_against_decimal(rows) == []
+    state = compute_final_states(rows)['AAA']
+    assert state.shares == Decimal('5')
+    assert state.cost_basis == Decimal('600')
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+GET /portfolio 쿼리 수 회귀 테스트
+보유 종목/배당금 수가 늘어나도 /portfolio가 실행하는 SQL 수가 일정한지 확인합니다 (종목별 배당금 조회 N+1 방지).
+
+실행:
+    python -m pytest tests/test_portfolio_queries.py
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from app.models import db, User, Holding, Dividend
+from app.auth_utils import JWTService
+
+# JWT 사용자 조회 1 + 데이터 버전 조회 1 + 평가 서비스(캐시 미스: 보유 종목/최신 환율/종목별 배당금) 3
+# + 수익률 엔진(캐시 미스: 거래/배당금/보유 현황) 3
+PORTFOLIO_QUERY_COUNT = 8
+# 데이터 변경이 없으면 평가/수익률 캐시를 재사용해 SQL을 실행하지 않음
+# (테스트는 한 앱 컨텍스트에서 세션을 공유하므로 JWT 사용자는 identity map, 데이터 버전은 같은 트랜잭션에서 읽은 값을 재사용)
+CACHED_PORTFOLIO_QUERY_COUNT = 0
+
+
+def _seed(holding_count: int, dividends_per_holding: int = 3):
+    """보유 종목과 배당금을 holding_count개 종목까지 채움 (배당금은 등록 경로와 같이 Holding 집계도 갱신)"""
+    existing = Holding.query.count()
+    for i in range(existing, holding_count):
+        ticker = f"T{i:03d}"
+        withdrawn = Decimal('0')
+        for d in range(dividends_per_holding):
+            amount = Decimal('1.25')
+            db.session.add(Dividend(ticker=ticker, date=date(2025, 1, 1) + timedelta(days=30 * d),
+                                    shares_held=10, dividend_per_share=Decimal('0.125'),
+                                    amount=amount, withdrawn_amount=amount))
+            withdrawn += amount
+        db.session.add(Holding(ticker=ticker, current_shares=10, avg_purchase_price=100,
+                               total_cost_basis=1000, total_invested_krw=1300000, avg_exchange_rate=1300,
+                               current_market_price=110, total_dividends_received=withdrawn,
+                               dividends_withdrawn=withdrawn))
+    db.session.commit()
+
+
+def _count_queries(client, headers) -> int:
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/portfolio', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200, response.get_json()
+    return len(statements)
+
+
+def test_portfolio_query_count_is_constant(app):
+    user = User(username='tester', email='tester@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {JWTService.generate_access_token(user.id, user.username)}'}
+    client = app.test_client()
+
+    counts = {}
+    for holding_count in (1, 5, 25):
+        _seed(holding_count)
+        counts[holding_count] = _count_queries(client, headers)
+
+    assert set(counts.values()) == {PORTFOLIO_QUERY_COUNT}, counts
+    assert _count_queries(client, headers) == CACHED_PORTFOLIO_QUERY_COUNT
+
+    # 배당금 합계는 종목 수와 무관하게 Holding 집계에서 읽음
+    response = client.get('/portfolio', headers=headers).get_json()
+    assert response['total_dividends_usd'] == 25 * 3 * 1.25
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+수익률 엔진 테스트
+XIRR(벡터 Newton + 이분법)과 TWR이 손으로 계산한 값과 일치하는지 확인합니다.
+
+실행:
+    python -m pytest tests/test_returns_engine.py
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from app.models import db, Holding, Transaction
+from app.returns_engine import get_returns, solve_xirr
+
+
+def test_solve_xirr_known_rates():
+    # 그룹 0: -100 → 1년 후 110 (10%), 그룹 1: -100 → 2년 후 121 (10%),
+    # 그룹 2: 1년 후 -100 → 50 (-50%), 그룹 3: 유입이 없어 해 없음
+    groups = np.array([0, 0, 1, 1, 2, 2, 3, 3])
+    times = np.array([0.0, 1.0, 0.0, 2.0, 0.0, 1.0, 0.0, 1.0])
+    flows = np.array([-100.0, 110.0, -100.0, 121.0, -100.0, 50.0, -100.0, -10.0])
+
+    rates, _ = solve_xirr(groups, times, flows, 4)
+
+    assert rates[:3] == pytest.approx([0.1, 0.1, -0.5], abs=1e-9)
+    assert np.isnan(rates[3])
+
+
+def test_solve_xirr_warm_start_matches_cold_start():
+    groups = np.array([0, 0, 0])
+    times = np.array([0.0, 0.5, 1.5])
+    flows = np.array([-100.0, -50.0, 180.0])
+
+    cold, _ = solve_xirr(groups, times, flows, 1)
+    warm, iterations = solve_xirr(groups, times, flows, 1, guess=cold)
+
+    assert warm == pytest.approx(cold, abs=1e-12)
+    assert iterations == 1
+
+
+def _buy(ticker, shares, price, day):
+    shares, price = Decimal(str(shares)), Decimal(str(price))
+    db.session.add(Transaction(ticker=ticker, type='BUY', date=day, shares=shares,
+                               price_per_share=price, amount=shares * price))
+
+
+def _hold(ticker, shares, price):
+    db.session.add(Holding(ticker=ticker, current_shares=shares, total_cost_basis=0,
+                           current_market_price=price))
+
+
+def test_get_returns_single_buy_one_year(session):
+    # 2024-01-01 100달러 매수 → 365일 후 평가액 110달러
+    _buy('ONE', 10, 10, date(2024, 1, 1))
+    _hold('ONE', 10, 11)
+    db.session.commit()
+
+    result = get_returns(date(2024, 12, 31))
+
+    assert result['tickers']['ONE']['xirr'] == pytest.approx(0.1, abs=1e-9)
+    assert result['tickers']['ONE']['twr'] == pytest.approx(0.1)
+    assert result['portfolio']['xirr'] == pytest.approx(0.1, abs=1e-9)
+
+
+def test_twr_ignores_timing_of_additional_investment(session):
+    # 100 → 120 (+20%) 시점에 120 추가 매수, 이후 240 → 264 (+10%): TWR = 1.2 × 1.1 - 1
+    _buy('TWO', 10, 10, date(2024, 1, 1))
+    _buy('TWO', 10, 12, date(2024, 7, 1))
+    _hold('TWO', 20, Decimal('13.2'))
+    db.session.commit()
+
+    result = get_returns(date(2024, 12, 31))
+
+    assert result['tickers']['TWO']['twr'] == pytest.approx(0.32)
+    assert result['portfolio']['twr'] == pytest.approx(0.32)
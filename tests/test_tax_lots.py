@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+로트 매칭/실현 손익 테스트
+FIFO 부분 소진, 평균 방식, 지정 로트 매도가 로트 잔여 수량/원가와 실현 손익을 올바르게 기록하는지 확인합니다.
+
+실행:
+    python -m pytest tests/test_tax_lots.py
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models import db, TaxLot, Transaction
+from app.tax_lots import apply_transaction_lots
+
+
+def _trade(type, shares, price, day, exchange_rate=1300, method=None, selections=None, ticker='LOT'):
+    """거래 등록 경로와 같이 INSERT → flush → 로트 반영 → 커밋"""
+    shares, price = Decimal(str(shares)), Decimal(str(price))
+    txn = Transaction(ticker=ticker, type=type, date=day, shares=shares, price_per_share=price,
+                      amount=shares * price, exchange_rate=Decimal(exchange_rate),
+                      amount_krw=shares * price * exchange_rate)
+    db.session.add(txn)
+    db.session.flush()
+    gains = apply_transaction_lots(txn, method, selections)
+    db.session.commit()
+    return txn, gains
+
+
+def _lots():
+    return TaxLot.query.order_by(TaxLot.acquired_date, TaxLot.lot_id).all()
+
+
+def test_fifo_partial_sell_spans_two_lots(session):
+    _trade('BUY', 10, 10, date(2024, 1, 2))
+    _trade('BUY', 10, 20, date(2024, 2, 1), exchange_rate=1400)
+    _, gains = _trade('SELL', 15, 30, date(2024, 3, 4), exchange_rate=1350, method='fifo')
+
+    # 첫 로트 전량(10주) + 두 번째 로트 5주
+    assert [(gain.shares, gain.cost_basis_usd) for gain in gains] == [
+        (Decimal('10'), Decimal('100')), (Decimal('5'), Decimal('100')),
+    ]
+    assert sum(gain.proceeds_usd for gain in gains) == Decimal('450')
+    assert sum(gain.realized_pnl_usd for gain in gains) == Decimal('250')
+    # 원화 실현 손익 = 매도 원화 450 × 1350 - 원가 (100 × 1300 + 100 × 1400)
+    assert sum(gain.realized_pnl_krw for gain in gains) == Decimal('337500')
+
+    first, second = _lots()
+    assert first.remaining_shares == 0 and first.remaining_cost_usd == 0
+    assert second.remaining_shares == Decimal('5')
+    assert second.remaining_cost_usd == Decimal('100')
+    assert second.remaining_cost_krw == Decimal('140000')
+
+
+def test_average_sell_draws_every_lot_pro_rata(session):
+    _trade('BUY', 10, 10, date(2024, 1, 2))
+    _trade('BUY', 30, 20, date(2024, 2, 1))
+    _, gains = _trade('SELL', 8, 25, date(2024, 3, 4), method='average')
+
+    # 잔여 수량 비율(1:3)대로 소진 → 실현 원가 = 평균 원가 17.5 × 8주
+    assert [gain.shares for gain in gains] == [Decimal('2'), Decimal('6')]
+    assert sum(gain.cost_basis_usd for gain in gains) == Decimal('140')
+    assert sum(gain.realized_pnl_usd for gain in gains) == Decimal('60')
+    assert all(gain.method == 'average' for gain in gains)
+
+    first, second = _lots()
+    assert (first.remaining_shares, second.remaining_shares) == (Decimal('8'), Decimal('24'))
+    assert first.remaining_cost_usd + second.remaining_cost_usd == Decimal('560')
+
+
+def test_specific_sell_uses_selected_lot_only(session):
+    first_buy, _ = _trade('BUY', 10, 10, date(2024, 1, 2))
+    second_buy, _ = _trade('BUY', 10, 20, date(2024, 2, 1))
+    _, gains = _trade('SELL', 4, 15, date(2024, 3, 4), method='specific',
+                      selections=[{'buy_transaction_id': second_buy.transaction_id, 'shares': 4}])
+
+    assert len(gains) == 1
+    assert gains[0].buy_transaction_id == second_buy.transaction_id
+    assert gains[0].cost_basis_usd == Decimal('80')
+    assert gains[0].realized_pnl_usd == Decimal('-20')
+
+    first, second = _lots()
+    assert first.buy_transaction_id == first_buy.transaction_id
+    assert first.remaining_shares == Decimal('10')  # 지정하지 않은 먼저 산 로트는 그대로
+    assert second.remaining_shares == Decimal('6')
+
+
+def test_specific_sell_rejects_quantity_mismatch(session):
+    buy, _ = _trade('BUY', 10, 10, date(2024, 1, 2))
+    with pytest.raises(ValueError):
+        _trade('SELL', 5, 15, date(2024, 3, 4), method='specific',
+               selections=[{'buy_transaction_id': buy.transaction_id, 'shares': 3}])